@@ -0,0 +1,148 @@
+# Cache warming.
+#
+# Fills the response cache before the first requests pay for it: after a
+# deploy or a Redis flush, after a data load, and (on a schedule) after the
+# dashboards expire at midnight. Warmed are the dashboards, profiles and
+# details of the most recently active employees, the first page of the
+# focus group and survey listings, and the risk categorization. Jobs go
+# through the endpoints' own cached code paths, so entries that are already
+# cached are left alone, and run CACHE_WARM_CONCURRENCY at a time, each on
+# its own session. Progress is kept in warm_progress and shown by /metrics.
+
+import asyncio
+import functools
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy import func, select
+
+from app.api.endpoints.employee import (
+    get_employee_details,
+    get_employee_risk_categorization,
+)
+from app.api.endpoints.employeeDashboard.dashboard import fetch_dashboards
+from app.api.endpoints.employeeDashboard.profile import get_employee_profile
+from app.api.endpoints.focus_group import get_all_groups, get_all_groups_minified
+from app.api.endpoints.survey import get_all_surveys
+from app.config import settings
+from app.models.schema import ActivityTrackerDataset
+from app.utils.cache import cache_available
+from app.utils.db import AsyncSessionLocal
+from app.utils.pagination import PageParams
+
+
+class WarmProgress:
+    def __init__(self):
+        self.running = False
+        self.reason = None
+        self.started_at = None
+        self.finished_at = None
+        self.total = 0
+        self.done = Counter()
+        self.failed = Counter()
+
+    def start(self, reason):
+        self.running = True
+        self.reason = reason
+        self.started_at = time.time()
+        self.finished_at = None
+        self.total = 0
+        self.done.clear()
+        self.failed.clear()
+
+    def finish(self):
+        self.running = False
+        self.finished_at = time.time()
+
+    def snapshot(self):
+        done = sum(self.done.values()) + sum(self.failed.values())
+        return {
+            "running": self.running,
+            "reason": self.reason,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "jobs": self.total,
+            "progress": round(done / self.total, 4) if self.total else None,
+            "done": dict(self.done),
+            "failed": dict(self.failed),
+        }
+
+
+warm_progress = WarmProgress()
+
+
+async def recently_active_employees(db):
+    """Employees with the latest activity rows, most recent first."""
+    since = date.today() - timedelta(days=settings.CACHE_WARM_ACTIVE_DAYS)
+    query = (
+        select(ActivityTrackerDataset.employee_id)
+        .where(ActivityTrackerDataset.date >= since)
+        .group_by(ActivityTrackerDataset.employee_id)
+        .order_by(func.max(ActivityTrackerDataset.date).desc())
+        .limit(settings.CACHE_WARM_EMPLOYEES)
+    )
+    return (await db.scalars(query)).all()
+
+
+def warm_jobs(employee_ids):
+    """(kind, job) pairs; each job is awaited as job(db=session)."""
+    # What clients get without query parameters
+    page = PageParams()
+    jobs = [
+        ("groups", functools.partial(get_all_groups, page=page)),
+        ("groups", functools.partial(get_all_groups_minified, page=page)),
+        ("surveys", functools.partial(get_all_surveys, page=page)),
+        ("risk_categorization", get_employee_risk_categorization),
+    ]
+    # Dashboard misses are loaded a batch per query
+    for start in range(0, len(employee_ids), settings.CACHE_WARM_BATCH_SIZE):
+        batch = employee_ids[start : start + settings.CACHE_WARM_BATCH_SIZE]
+        jobs.append(
+            ("dashboards", functools.partial(fetch_dashboards, employee_ids=batch))
+        )
+    for employee_id in employee_ids:
+        jobs.append(("profiles", functools.partial(get_employee_profile, employee_id)))
+        jobs.append(("details", functools.partial(get_employee_details, employee_id)))
+    return jobs
+
+
+async def warm_cache(reason="manual"):
+    """Warm the hot keys; skipped while a run is going or Redis is down."""
+    if warm_progress.running:
+        print(f"Cache warming ({reason}) skipped: a run is in progress")
+        return
+    if not cache_available():
+        print(f"Cache warming ({reason}) skipped: the cache is bypassed")
+        return
+
+    warm_progress.start(reason)
+    semaphore = asyncio.Semaphore(settings.CACHE_WARM_CONCURRENCY)
+
+    async def run(kind, job):
+        async with semaphore:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await job(db=db)
+                warm_progress.done[kind] += 1
+            except Exception as e:
+                warm_progress.failed[kind] += 1
+                print(f"Cache warming of {kind} failed: {e}")
+
+    try:
+        async with AsyncSessionLocal() as db:
+            employee_ids = await recently_active_employees(db)
+        jobs = warm_jobs(employee_ids)
+        warm_progress.total = len(jobs)
+        print(
+            f"Cache warming ({reason}): {len(jobs)} jobs for "
+            f"{len(employee_ids)} active employees"
+        )
+        await asyncio.gather(*(run(kind, job) for kind, job in jobs))
+    finally:
+        warm_progress.finish()
+    print(
+        f"Cache warming ({reason}) finished in "
+        f"{warm_progress.finished_at - warm_progress.started_at:.1f}s: "
+        f"{dict(warm_progress.done)} done, {dict(warm_progress.failed)} failed"
+    )
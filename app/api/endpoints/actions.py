@@ -1,16 +1,31 @@
-import json
 from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.queries import (
+    ACTIONS_ORDER,
+    action_detail_query,
+    actions_query,
+    format_group,
+)
 from app.models.schema import Action, FocusGroup
-from app.utils.db import get_db
+from app.utils.cache import (
+    ACTIONS_TAG,
+    SHARED_CACHE_CONTROL,
+    action_tag,
+    cached,
+    group_tag,
+    invalidate,
+)
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from app.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
@@ -37,18 +52,19 @@ class ActionData(BaseModel):
 
 @router.get("")
 async def get_all_actions(
-    is_completed: Optional[bool] = None, db: Session = Depends(get_db)
+    is_completed: Optional[bool] = None,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Fetch all actions from the database.
+    Fetch a page of actions from the database, newest first.
     """
     try:
-        if is_completed is not None:
-            actions = db.query(Action).filter(Action.is_completed == is_completed).all()
-        else:
-            actions = db.query(Action).all()
+        actions, pagination = await paginate(
+            db, actions_query(is_completed), ACTIONS_ORDER, page
+        )
 
-        if not actions:
+        if not actions and not page.cursor:
             raise HTTPException(status_code=404, detail="No actions found.")
 
         action_list = []
@@ -61,20 +77,13 @@ async def get_all_actions(
                 "steps": action.steps,
                 "is_completed": action.is_completed,
                 "target_groups": [
-                    {
-                        "name": group.name,
-                        "description": group.description,
-                        "created_at": str(group.created_at),
-                        "focus_group_id": group.focus_group_id,
-                        "metrics": group.metrics,
-                    }
-                    for group in action.target_groups
+                    format_group(group) for group in action.target_groups
                 ],
                 "created_at": str(action.created_at),
             }
             action_list.append(action_dict)
 
-        return format_response(data=action_list)
+        return format_response(data=action_list, pagination=pagination)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -84,36 +93,35 @@ async def get_all_actions(
         )
 
 
+def action_cache_tags(result, action_id, **arguments):
+    # Member counts of the target groups are part of the response
+    return [
+        action_tag(action_id),
+        *(
+            group_tag(group["focus_group_id"])
+            for group in result["data"]["target_groups"]
+        ),
+    ]
+
+
 @router.get("/{action_id}")
-async def get_action(action_id: str, db: Session = Depends(get_db)):
+@cached(
+    "action:{action_id}", tags=action_cache_tags, cache_control=SHARED_CACHE_CONTROL
+)
+async def get_action(action_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Fetch a specific action from the database by its ID.
     """
     try:
-        # Generate a unique Redis key for the action
-        cache_key = f"action:{action_id}"
-
-        # Try to fetch data from Redis cache
-        cached_data = await redis_client.get(cache_key)
-        if cached_data:
-            return format_response(data=json.loads(cached_data))
-
         # Fetch the action from the database
-        action = db.query(Action).filter(Action.action_id == action_id).first()
+        action = await db.scalar(action_detail_query(action_id))
         if not action:
             raise HTTPException(status_code=404, detail="Action not found.")
 
-        formatted_groups = []
-        for group in action.target_groups:
-            formatted_group = {
-                "focus_group_id": group.focus_group_id,
-                "name": group.name,
-                "description": group.description,
-                "created_at": str(group.created_at),
-                "metrics": group.metrics,
-                "members": len(group.users),
-            }
-            formatted_groups.append(formatted_group)
+        formatted_groups = [
+            format_group(group, with_member_count=True)
+            for group in action.target_groups
+        ]
 
         action_dict = {
             "action_id": action.action_id,
@@ -126,9 +134,6 @@ async def get_action(action_id: str, db: Session = Depends(get_db)):
             "created_at": str(action.created_at),
         }
 
-        # Cache the action data in Redis
-        await redis_client.set(cache_key, json.dumps(action_dict), ex=300)
-
         return format_response(data=action_dict)
     except HTTPException as e:
         raise e
@@ -140,7 +145,7 @@ async def get_action(action_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("")
-async def create_action(action: ActionCreate, db: Session = Depends(get_db)):
+async def create_action(action: ActionCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new action in the database.
     """
@@ -154,10 +159,8 @@ async def create_action(action: ActionCreate, db: Session = Depends(get_db)):
             is_completed=action.is_completed,
         )
         for group_id in action.target_groups:
-            group = (
-                db.query(FocusGroup)
-                .filter(FocusGroup.focus_group_id == group_id)
-                .first()
+            group = await db.scalar(
+                select(FocusGroup).where(FocusGroup.focus_group_id == group_id)
             )
             if not group:
                 raise HTTPException(
@@ -167,8 +170,12 @@ async def create_action(action: ActionCreate, db: Session = Depends(get_db)):
             new_action.target_groups.append(group)
 
         db.add(new_action)
-        db.commit()
-        db.refresh(new_action)
+        await db.commit()
+        await db.refresh(new_action)
+        await invalidate(
+            ACTIONS_TAG,
+            *(group_tag(group_id) for group_id in action.target_groups),
+        )
 
         # Return the formatted response
         return format_response(data=new_action)
@@ -183,26 +190,30 @@ async def create_action(action: ActionCreate, db: Session = Depends(get_db)):
 
 @router.put("/{action_id}")
 async def update_action(
-    action_id: str, action: ActionData, db: Session = Depends(get_db)
+    action_id: str, action: ActionData, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing action in the database.
     """
     try:
-        db_action = db.query(Action).filter(Action.action_id == action_id).first()
+        db_action = await db.scalar(
+            select(Action)
+            .where(Action.action_id == action_id)
+            .options(selectinload(Action.target_groups))
+        )
         if not db_action:
             raise HTTPException(status_code=404, detail="Action not found.")
 
+        group_ids = {group.focus_group_id for group in db_action.target_groups}
+        group_ids.update(action.target_groups)
         for key, value in action.dict().items():
             if key != "target_groups":
                 setattr(db_action, key, value)
 
         db_action.target_groups.clear()
         for group_id in action.target_groups:
-            group = (
-                db.query(FocusGroup)
-                .filter(FocusGroup.focus_group_id == group_id)
-                .first()
+            group = await db.scalar(
+                select(FocusGroup).where(FocusGroup.focus_group_id == group_id)
             )
             if not group:
                 raise HTTPException(
@@ -211,8 +222,9 @@ async def update_action(
                 )
             db_action.target_groups.append(group)
 
-        db.commit()
-        db.refresh(db_action)
+        await db.commit()
+        await db.refresh(db_action)
+        await invalidate(ACTIONS_TAG, action_tag(action_id), *map(group_tag, group_ids))
         return format_response(data=db_action)
     except HTTPException as e:
         raise e
@@ -224,17 +236,23 @@ async def update_action(
 
 
 @router.delete("/{action_id}")
-async def delete_action(action_id: str, db: Session = Depends(get_db)):
+async def delete_action(action_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete an action from the database.
     """
     try:
-        db_action = db.query(Action).filter(Action.action_id == action_id).first()
+        db_action = await db.scalar(
+            select(Action)
+            .where(Action.action_id == action_id)
+            .options(selectinload(Action.target_groups))
+        )
         if not db_action:
             raise HTTPException(status_code=404, detail="Action not found.")
 
-        db.delete(db_action)
-        db.commit()
+        group_ids = [group.focus_group_id for group in db_action.target_groups]
+        await db.delete(db_action)
+        await db.commit()
+        await invalidate(ACTIONS_TAG, action_tag(action_id), *map(group_tag, group_ids))
         return JSONResponse(
             content={"message": "Action Deleted successfully."},
             status_code=status.HTTP_204_NO_CONTENT,
@@ -1,13 +1,18 @@
 import random
-from datetime import datetime, timedelta
 from typing import List
 
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.schema import FocusGroup, User
-from app.utils.db import get_db
+from app.api.endpoints.employeeDashboard.vibemeter import VIBE_SCORE_MAX
+from app.models.admin_views import (
+    admin_concern_frequency,
+    admin_focus_group_risk,
+    admin_vibe_monthly,
+)
+from app.utils.db import get_async_db
 
 router = APIRouter()
 
@@ -79,10 +84,19 @@ first_names = [
 ]
 
 
+# Most recent months shown in the vibe chart
+CHART_MONTHS = 6
+
+
 def generate_random_name():
     return random.choice(first_names)
 
 
+def to_percent(score):
+    # Vibe scores are charted as a percentage of the highest possible reading
+    return round(score * 100 / VIBE_SCORE_MAX, 1) if score is not None else 0.0
+
+
 # Pydantic models for data validation and serialization
 class Metric(BaseModel):
     label: str
@@ -122,56 +136,59 @@ class BubbleData(BaseModel):
     description: str
 
 
+class FocusGroupRisk(BaseModel):
+    focus_group_id: str
+    name: str
+    members: int
+    targeted: int
+
+
 class DashboardResponse(BaseModel):
     employee_satisfaction: EmployeeSatisfaction
     vibemeter_scores: VibemeterScore
     high_concern_employees: List[Employee]
     bubble_data: List[BubbleData]
+    focus_group_risk: List[FocusGroupRisk] = []
 
 
 @router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard_data(db: Session = Depends(get_db)):
+async def get_dashboard_data(db: AsyncSession = Depends(get_async_db)):
     """
     Returns dashboard data for the admin dashboard including:
     - Employee satisfaction gauge data
     - Vibemeter chart data
     - High concern employees list
     - Major concerns bubble chart data
+    - Targeted members per focus group
+
+    The aggregates are read from the materialized admin views, which are
+    refreshed in the background (see app.models.admin_views).
     """
-    # Get the last 6 months for chart data
-    months = []
-    current_date = datetime.now()
-    for i in range(6):
-        month_date = current_date - timedelta(days=30 * i)
-        months.insert(
-            0, month_date.strftime("%b")
-        )  # Insert at beginning to maintain chronological order
-
-    total_users = db.query(User).count()
-    risk_users = (
-        db.query(FocusGroup)
-        .filter(FocusGroup.name == "Consistently Dissatisfied")
-        .count()
-    )
+    # Last 6 months of the monthly vibe rollup, oldest first
+    monthly = (
+        await db.execute(
+            select(admin_vibe_monthly)
+            .order_by(admin_vibe_monthly.c.month.desc())
+            .limit(CHART_MONTHS)
+        )
+    ).all()[::-1]
+    latest = monthly[-1] if monthly else None
 
-    # Employee satisfaction data
+    # Employee satisfaction data: share of the latest month's responses that
+    # score 4 or more out of VIBE_SCORE_MAX (the admin_vibe_monthly view, v0004)
     employee_satisfaction = EmployeeSatisfaction(
-        percentage=round((risk_users * 100 / total_users), 2),
-        change=5.3,
+        percentage=latest.satisfied_pct if latest else 0.0,
+        change=(latest.satisfied_change or 0.0) if latest else 0.0,
         period="1 month",
     )
 
     # Vibemeter scores
     vibemeter_scores = VibemeterScore(
-        average=78,
-        percentageChange=5.3,
+        average=to_percent(latest.avg_score) if latest else 0.0,
+        percentageChange=(latest.avg_change_pct or 0.0) if latest else 0.0,
         scores=[
-            ScoreData(month=months[0], score=65),
-            ScoreData(month=months[1], score=67),
-            ScoreData(month=months[2], score=72),
-            ScoreData(month=months[3], score=78),
-            ScoreData(month=months[4], score=75),
-            ScoreData(month=months[5], score=85),
+            ScoreData(month=row.month.strftime("%b"), score=to_percent(row.avg_score))
+            for row in monthly
         ],
     )
 
@@ -227,41 +244,35 @@ async def get_dashboard_data(db: Session = Depends(get_db)):
             )
         )
 
-    # Major concerns bubble chart data
+    # Major concerns bubble chart data: employees raising each concern
+    concerns = (
+        await db.execute(
+            select(admin_concern_frequency).order_by(
+                admin_concern_frequency.c.employees.desc()
+            )
+        )
+    ).all()
     bubble_data = [
         BubbleData(
-            name="Workload", value=80, description="High workload for employees"
-        ),
-        BubbleData(
-            name="Engagement", value=65, description="Moderate engagement levels"
-        ),
-        BubbleData(
-            name="Team Morale", value=30, description="Low team morale observed"
-        ),
-        BubbleData(name="Stress", value=15, description="Very low stress levels"),
-        BubbleData(
-            name="Communication",
-            value=50,
-            description="Average communication between teams",
-        ),
-        BubbleData(name="Collaboration", value=70, description="Good collaboration"),
-        BubbleData(name="Feedback", value=90, description="High feedback scores"),
-        BubbleData(name="Recognition", value=20, description="Very low recognition"),
-        BubbleData(
-            name="Growth", value=40, description="Moderate growth opportunities"
-        ),
-        BubbleData(name="Retention", value=60, description="Good retention rates"),
-        BubbleData(name="Diversity", value=75, description="High diversity scores"),
-        BubbleData(
-            name="Inclusion", value=85, description="Very high inclusion scores"
-        ),
-        BubbleData(
-            name="Innovation", value=55, description="Moderate innovation levels"
-        ),
-        BubbleData(
-            name="Leadership", value=45, description="Average leadership quality"
-        ),
-        BubbleData(name="Culture", value=25, description="Low cultural alignment"),
+            name=row.concern,
+            value=row.employees,
+            description=f"{row.employees} employees flagged for {row.concern.lower()}",
+        )
+        for row in concerns
+    ]
+
+    focus_group_risk = [
+        FocusGroupRisk(**row._mapping)
+        for row in (
+            await db.execute(
+                select(
+                    admin_focus_group_risk.c.focus_group_id,
+                    admin_focus_group_risk.c.name,
+                    admin_focus_group_risk.c.members,
+                    admin_focus_group_risk.c.targeted,
+                ).order_by(admin_focus_group_risk.c.targeted.desc())
+            )
+        ).all()
     ]
 
     return DashboardResponse(
@@ -269,4 +280,5 @@ async def get_dashboard_data(db: Session = Depends(get_db)):
         vibemeter_scores=vibemeter_scores,
         high_concern_employees=high_concern_employees,
         bubble_data=bubble_data,
+        focus_group_risk=focus_group_risk,
     )
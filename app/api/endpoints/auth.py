@@ -9,6 +9,7 @@ from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
 from app.models.schema import User
+from app.utils.cache import GROUPS_TAG, employee_tag, invalidate_sync
 from app.utils.db import get_db
 from app.utils.helpers import send_verification_email
 
@@ -91,6 +92,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
 
         user.is_verified = True
         db.commit()
+        invalidate_sync(employee_tag(user.employee_id), GROUPS_TAG)
 
         return {"message": "Email verified successfully"}
 
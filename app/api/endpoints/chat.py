@@ -1,18 +1,36 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from sqlalchemy import select
 
-from app.ml.chatbot import ChatbotAgent, ReportGeneratorAgent, graph_builder
+from app.ml.chatbot import ChatbotAgent, ReportGeneratorAgent
+from app.ml.graph_cache import get_employee_analysis
+from app.ml.snapshots import snapshot_manager
 from app.models.schema import EmployeeReport, User
 from app.socket import manager
-from app.utils.db import get_db
+from app.utils.db import AsyncSessionLocal
+from app.utils.helpers import format_response
 
 router = APIRouter()
 
 
+@router.post("/snapshot/refresh")
+async def refresh_snapshot(force: bool = False):
+    """
+    Reload the chat datasets in the background and swap them in.
+
+    Live conversations keep the snapshot they started with.
+    """
+    await snapshot_manager.refresh(force)
+    return format_response(snapshot_manager.stats())
+
+
 @router.websocket("/{user_id}")
 async def chat(websocket: WebSocket, user_id: str):
     await manager.connect(websocket, user_id)
 
-    knowledge_graph, issues = graph_builder.run(user_id)
+    # The session keeps this snapshot even if a newer one is swapped in
+    snapshot = await snapshot_manager.acquire()
+    analysis = await get_employee_analysis(snapshot, user_id)
+    knowledge_graph, issues = analysis["graph"], analysis["issues"]
     agent = ChatbotAgent()
     report_generator = ReportGeneratorAgent()
     greeting = agent.start_conversation(issues)
@@ -74,62 +92,65 @@ I hope these recommendations are helpful. Your feedback is valuable and will hel
                 # Generate and save report after conversation is complete
                 print("\nGenerating employee report...")
                 report = report_generator.run(
-                    user_id, knowledge_graph, issues, agent.conversation
+                    user_id,
+                    knowledge_graph,
+                    issues,
+                    agent.conversation,
+                    analysis["metrics"],
                 )
                 intervention = report_generator.get_hr_intervention(report)
                 print(f"Successfully generated report for employee {user_id}")
 
                 # Save report to database
                 try:
-                    db = next(get_db())
-
-                    # Create consolidated report data
-                    report_data = {
-                        "full_report": report,
-                        "conversation_summary": {
-                            "issues_discussed": list(agent.explored_issues.keys()),
-                            "root_causes": agent.root_causes,
-                            "themes": list(agent.themes),
-                        },
-                        "recommendations": [
-                            line.strip()
-                            for line in solutions.split("\n")
-                            if line.strip().startswith("•")
-                        ],
-                        "metrics": {
-                            "vibe_trend": knowledge_graph.nodes[f"{user_id}_vibe"][
-                                "trend"
+                    # Short-lived session, closed before the socket waits again
+                    async with AsyncSessionLocal() as db:
+                        # Create consolidated report data
+                        report_data = {
+                            "full_report": report,
+                            "conversation_summary": {
+                                "issues_discussed": list(agent.explored_issues.keys()),
+                                "root_causes": agent.root_causes,
+                                "themes": list(agent.themes),
+                            },
+                            "recommendations": [
+                                line.strip()
+                                for line in solutions.split("\n")
+                                if line.strip().startswith("•")
                             ],
-                            "performance_rating": knowledge_graph.nodes.get(
-                                f"{user_id}_performance", {}
-                            ).get("rating"),
-                            "avg_work_hours": knowledge_graph.nodes.get(
-                                f"{user_id}_activity", {}
-                            ).get("avg_work_hours"),
-                        },
-                        "hr_intervention": intervention,
-                    }
-
-                    if intervention.get("urgent_action_required", False):
-                        user = (
-                            db.query(User).filter(User.employee_id == user_id).first()
+                            "metrics": {
+                                "vibe_trend": knowledge_graph.nodes[f"{user_id}_vibe"][
+                                    "trend"
+                                ],
+                                "performance_rating": knowledge_graph.nodes.get(
+                                    f"{user_id}_performance", {}
+                                ).get("rating"),
+                                "avg_work_hours": knowledge_graph.nodes.get(
+                                    f"{user_id}_activity", {}
+                                ).get("avg_work_hours"),
+                            },
+                            "hr_intervention": intervention,
+                        }
+
+                        if intervention.get("urgent_action_required", False):
+                            user = await db.scalar(
+                                select(User).where(User.employee_id == user_id)
+                            )
+                            if user:
+                                # Send escalation message to HR
+                                user.escalated = True
+                                db.add(user)
+                                await db.commit()
+                            await manager.send_escalation(user_id)
+
+                        # Create new report entry
+                        db_report = EmployeeReport(
+                            employee_id=user_id, report_content=report_data
                         )
-                        if user:
-                            # Send escalation message to HR
-                            user.escalated = True
-                            db.add(user)
-                            db.commit()
-                            db.refresh(user)
-                        await manager.send_escalation(user_id)
-
-                    # Create new report entry
-                    db_report = EmployeeReport(
-                        employee_id=user_id, report_content=report_data
-                    )
-
-                    db.add(db_report)
-                    db.commit()
-                    print(f"Report saved to database for employee {user_id}")
+
+                        db.add(db_report)
+                        await db.commit()
+                        print(f"Report saved to database for employee {user_id}")
 
                 except Exception as e:
                     print(f"Error saving report to database: {e}")
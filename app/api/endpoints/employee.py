@@ -1,14 +1,30 @@
 import datetime
-import json
 import random
 from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from app.models.schema import Action, FocusGroup, RewardsDataset, User
-from app.utils.db import get_db
-from app.utils.redis_client import redis_client
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.models.queries import user_with_groups_query
+from app.models.schema import (
+    Action,
+    EmployeeFeatures,
+    EmployeeTargeting,
+    FocusGroup,
+    RewardsDataset,
+    User,
+)
+from app.utils.cache import (
+    GROUPS_TAG,
+    cached,
+    employee_tag,
+    group_tag,
+    json_response,
+)
+from app.utils.db import get_async_db
+from app.utils.helpers import encode_json
 
 router = APIRouter()
 
@@ -84,34 +100,69 @@ def generate_random_name():
     return random.choice(first_names)
 
 
+async def risk_summaries(db, employee_ids):
+    """
+    Each employee's precomputed risk (employee_targeting) and vibe average
+    (employee_features), keyed by employee_id.
+    """
+    rows = await db.execute(
+        select(
+            User.employee_id,
+            EmployeeTargeting.risk_score,
+            EmployeeTargeting.primary_concern,
+            EmployeeFeatures.vibe_mean,
+        )
+        .outerjoin(EmployeeTargeting, EmployeeTargeting.employee_id == User.employee_id)
+        .outerjoin(EmployeeFeatures, EmployeeFeatures.employee_id == User.employee_id)
+        .where(User.employee_id.in_(list(employee_ids)))
+    )
+    return {
+        row.employee_id: {
+            "risk_score": row.risk_score,
+            "primary_concern": row.primary_concern,
+            "vibe_mean": round(row.vibe_mean, 2) if row.vibe_mean is not None else None,
+        }
+        for row in rows
+    }
+
+
+def risk_categorization_tags(result, **arguments):
+    # The scores change with the listed employees' feature rows
+    return [
+        GROUPS_TAG,
+        *(
+            employee_tag(employee["employee_id"])
+            for employees in result.values()
+            for employee in employees
+        ),
+    ]
+
+
 @router.get("")
+@cached("employee_risk_categorization", tags=risk_categorization_tags)
 async def get_employee_risk_categorization(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> Dict[str, List[Dict]]:
     """
     Categorize 15 employees into risk levels with random risk scores.
 
     Returns:
     - A dictionary with three risk categories: high_risk_employees,
-      medium_risk_employees, and low_risk_employees
+      medium_risk_employees, and low_risk_employees; each employee carries
+      their precomputed risk_score, primary_concern and vibe_mean
     """
-    cache_key = "employee_risk_categorization"
     try:
-        # Check if data is cached
-        cached_data = await redis_client.get(cache_key)
-        if cached_data:
-            return json.loads(cached_data)
-
         risk_categories: Dict[str, List[Dict]] = {
             "high_risk_employees": [],
             "medium_risk_employees": [],
             "low_risk_employees": [],
         }
 
-        group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.name == "Consistently Dissatisfied")
-            .first()
+        group = await db.scalar(
+            select(FocusGroup)
+            .where(FocusGroup.name == "Consistently Dissatisfied")
+            .options(selectinload(FocusGroup.users))
+            .limit(1)
         )
         users = group.users
         risk_categories["high_risk_employees"] = [
@@ -128,10 +179,11 @@ async def get_employee_risk_categorization(
             for user in users
         ]
 
-        group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.name == "Volatile but Generally Happy")
-            .first()
+        group = await db.scalar(
+            select(FocusGroup)
+            .where(FocusGroup.name == "Volatile but Generally Happy")
+            .options(selectinload(FocusGroup.users))
+            .limit(1)
         )
         users = group.users
         risk_categories["medium_risk_employees"] = [
@@ -149,10 +201,12 @@ async def get_employee_risk_categorization(
         ]
 
         group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.name == "Inconsistent Satisfaction")
-            .all()
-        )
+            await db.scalars(
+                select(FocusGroup)
+                .where(FocusGroup.name == "Inconsistent Satisfaction")
+                .options(selectinload(FocusGroup.users))
+            )
+        ).all()
         users = []
         for group in group:
             users.extend(group.users)
@@ -170,6 +224,18 @@ async def get_employee_risk_categorization(
             for user in users
         ]
 
+        summaries = await risk_summaries(
+            db,
+            {
+                employee["employee_id"]
+                for employees in risk_categories.values()
+                for employee in employees
+            },
+        )
+        for employees in risk_categories.values():
+            for employee in employees:
+                employee.update(summaries.get(employee["employee_id"], {}))
+
         # # Fetch first 15 users from the database
         # all_users = db.query(User).limit(15).all()
         # high_risk_employee = (
@@ -215,11 +281,6 @@ async def get_employee_risk_categorization(
         #     else:
         #         risk_categories["low_risk_employees"].append(employee_info)
 
-        # Cache the data
-        await redis_client.set(
-            cache_key, json.dumps(risk_categories), ex=3600
-        )  # Cache for 1 hour
-
         return risk_categories
 
     except Exception as e:
@@ -253,7 +314,7 @@ def get_dummy_vibemeter(employee_id: str) -> Dict:
 
 
 @router.get("/high-risk")
-async def get_high_risk_employees(db: Session = Depends(get_db)):
+async def get_high_risk_employees(db: AsyncSession = Depends(get_async_db)):
     """
     Fetch high-risk employees from the database.
     """
@@ -265,12 +326,14 @@ async def get_high_risk_employees(db: Session = Depends(get_db)):
         #     return json.loads(cached_data)
 
         # Fetch high-risk employees
-        focus_group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.name == "Consistently Dissatisfied")
-            .first()
+        focus_group = await db.scalar(
+            select(FocusGroup)
+            .where(FocusGroup.name == "Consistently Dissatisfied")
+            .options(selectinload(FocusGroup.users))
+            .limit(1)
         )
         users = focus_group.users
+        summaries = await risk_summaries(db, {user.employee_id for user in users})
 
         # Format the response data
         response_data = [
@@ -283,6 +346,7 @@ async def get_high_risk_employees(db: Session = Depends(get_db)):
                 "focus_groups": "Consistently Dissatisfied",
                 "escalated": user.escalated,
                 "meet_scheduled": user.meet_scheduled,
+                **summaries.get(user.employee_id, {}),
             }
             for user in users
         ]
@@ -292,7 +356,7 @@ async def get_high_risk_employees(db: Session = Depends(get_db)):
         #     cache_key, json.dumps(response_data), ex=3600
         # )  # Cache for 1 hour
 
-        return {"data": response_data}
+        return json_response(encode_json({"data": response_data}))
 
     except Exception as e:
         raise HTTPException(
@@ -301,26 +365,31 @@ async def get_high_risk_employees(db: Session = Depends(get_db)):
         )
 
 
+def employee_details_tags(result, employee_id, **arguments):
+    # The employee's groups and their actions are part of the response
+    return [
+        employee_tag(employee_id),
+        *(group_tag(group["focus_group_id"]) for group in result["focus_groups"]),
+    ]
+
+
 @router.get("/by-id/{employee_id}")
+@cached("employee_details:{employee_id}", tags=employee_details_tags)
 async def get_employee_details(
-    employee_id: str, db: Session = Depends(get_db)
+    employee_id: str, db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
 
-    # Check if data is cached
-    cache_key = f"employee_details:{employee_id}"
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
-
     # Fetch the user
-    user = db.query(User).filter(User.employee_id == employee_id).first()
+    user = await db.scalar(user_with_groups_query(employee_id))
     if not user:
         raise HTTPException(status_code=404, detail="Employee not found")
 
     # Fetch rewards data
     awards = (
-        db.query(RewardsDataset).filter(RewardsDataset.employee_id == employee_id).all()
-    )
+        await db.scalars(
+            select(RewardsDataset).where(RewardsDataset.employee_id == employee_id)
+        )
+    ).all()
 
     awards_list = [
         {
@@ -356,18 +425,19 @@ async def get_employee_details(
             "description": groups.description,
             "created_at": str(groups.created_at) if groups.created_at else None,
             "metrics": groups.metrics,
-            "members": len(groups.users),
+            "members": groups.member_count,
         }
         formatted_groups.append(formatted_group)
 
     # Fetch action plans
     action_plans = (
-        db.query(Action)
-        .join(Action.target_groups)
-        .join(FocusGroup.users)
-        .filter(User.employee_id == employee_id)
-        .all()
-    )
+        await db.scalars(
+            select(Action)
+            .join(Action.target_groups)
+            .join(FocusGroup.users)
+            .where(User.employee_id == employee_id)
+        )
+    ).all()
 
     action_plans_list = [
         {
@@ -407,9 +477,4 @@ async def get_employee_details(
         "action_plans": action_plans_list,
     }
 
-    # Cache the data
-    await redis_client.set(
-        cache_key, json.dumps(employee_details), ex=3600
-    )  # Cache for 1 hour
-
     return employee_details
@@ -1,19 +1,51 @@
-import json
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-
-from app.models.schema import ActivityTrackerDataset, LeaveDataset, Task, User
-from app.utils.db import get_db
-from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from sqlalchemy import JSON, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.ml.analytics import analyze_employee_vibes
+from app.ml.features import VIBE_FEATURE_MAX
+from app.models.queries import PAST_LEAVES_ORDER, past_leaves_query
+from app.models.schema import (
+    ActivityTrackerDataset,
+    EmployeeFeatures,
+    LeaveDataset,
+    Task,
+    User,
+    VibeMeterDataset,
+)
+from app.utils.cache import (
+    PRIVATE_CACHE_CONTROL,
+    cache_generation,
+    cache_get_many,
+    cache_set_many,
+    cached,
+    employee_tag,
+    employee_tags,
+    invalidate,
+    json_response,
+    pack_entry,
+    unpack_entry,
+)
+from app.utils.db import get_async_db
+from app.utils.db_routing import read_from_primary
+from app.utils.helpers import encode_json, format_response
+from app.utils.pagination import PageParams, encode_cursor, page_params, paginate
 
 router = APIRouter()
 
+# Days of activity shown on the dashboard
+DASHBOARD_DAYS = 30
+# Assuming a total leave allocation of 30 days per year
+TOTAL_LEAVE_ALLOCATION = 30
+# Most recent past leaves inlined in the dashboard; the rest are paginated
+PAST_LEAVES_SHOWN = 10
+
 
 class WorkHoursData(BaseModel):
     date: date
@@ -62,6 +94,10 @@ class UserData(BaseModel):
     created_at: date
 
 
+class DashboardBatchRequest(BaseModel):
+    employee_ids: List[str]
+
+
 class AwardsData(BaseModel):
     id: int
     title: str
@@ -69,175 +105,357 @@ class AwardsData(BaseModel):
     date: str
 
 
-@router.get("/employee/{employee_id}/dashboard")
-async def get_employee_dashboard(employee_id: str, db: Session = Depends(get_db)):
+def json_object(**fields):
+    """json_build_object with the keys inlined (asyncpg cannot type them)."""
+    return func.json_build_object(
+        *(
+            part
+            for key, value in fields.items()
+            for part in (literal_column(f"'{key}'"), value)
+        )
+    )
+
+
+def dashboard_query(employee_ids, today):
     """
-    Fetch comprehensive employee data including:
-    - Work hours per day
-    - Leave balance
-    - Upcoming leaves
-    - Past leave history
-    - Attendance & punctuality stats
+    One statement returning every dashboard section for the given employees:
+    a CTE aggregates each employee's last 30 days of activity in a single
+    scan and another folds their leaves into the used total, the upcoming
+    list and the most recent past ones. A third collects the vibe history,
+    on the scale of the features, for its trend. All-time aggregates come
+    from the employee's employee_features row.
     """
-    try:
-        cached_key = f"employee_dashboard:{employee_id}"
-        # Check if data is cached in Redis
-        cached_data = await redis_client.get(cached_key)
-        if cached_data:
-            return json.loads(cached_data)
-        # Check if employee exists
-        user = db.query(User).filter(User.employee_id == employee_id).first()
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
+    since = today - timedelta(days=DASHBOARD_DAYS)
+    activity = ActivityTrackerDataset
+
+    # Past and upcoming leaves numbered newest first within each employee
+    ranked = (
+        select(
+            LeaveDataset,
+            func.row_number()
+            .over(
+                partition_by=(
+                    LeaveDataset.employee_id,
+                    LeaveDataset.leave_end_date < today,
+                ),
+                order_by=PAST_LEAVES_ORDER.order_by(),
             )
-
-        # Get current date for calculations
-        today = date.today()
-
-        # 1. Get work hours per day for the last 30 days
-        thirty_days_ago = today - timedelta(days=30)
-        work_hours_data = (
-            db.query(ActivityTrackerDataset.date, ActivityTrackerDataset.work_hours)
-            .filter(
-                ActivityTrackerDataset.employee_id == employee_id,
-                ActivityTrackerDataset.date >= thirty_days_ago,
-                ActivityTrackerDataset.date <= today,
+            .label("recency"),
+        )
+        .where(LeaveDataset.employee_id.in_(employee_ids))
+        .subquery()
+    )
+    leave = aliased(LeaveDataset, ranked)
+
+    activity_cte = (
+        select(
+            activity.employee_id,
+            func.json_agg(
+                aggregate_order_by(
+                    json_object(date=activity.date, hours=activity.work_hours),
+                    activity.date,
+                ),
+                type_=JSON,
             )
-            .order_by(ActivityTrackerDataset.date)
-            .all()
+            .filter(activity.date <= today)
+            .label("work_hours"),
+            func.avg(activity.work_hours).label("avg_work_hours"),
+            func.count().filter(activity.work_hours > 0).label("days_present"),
         )
+        .where(activity.employee_id.in_(employee_ids), activity.date >= since)
+        .group_by(activity.employee_id)
+        .cte("activity")
+    )
 
-        # 2. Calculate leave balance
-        # Assuming a total leave allocation of 30 days per year
-        total_leave_allocation = 30
-
-        # Get total leave days used this year
-        start_of_year = date(today.year, 1, 1)
-        leaves_used = (
-            db.query(func.sum(LeaveDataset.leave_days))
+    leave_json = json_object(
+        id=leave.id,
+        leave_type=leave.leave_type,
+        leave_days=leave.leave_days,
+        start_date=leave.leave_start_date,
+        end_date=leave.leave_end_date,
+    )
+    leave_cte = (
+        select(
+            leave.employee_id,
+            func.sum(leave.leave_days)
             .filter(
-                LeaveDataset.employee_id == employee_id,
-                LeaveDataset.leave_start_date >= start_of_year,
-                LeaveDataset.leave_end_date <= today,
+                leave.leave_start_date >= date(today.year, 1, 1),
+                leave.leave_end_date <= today,
+            )
+            .label("leaves_used"),
+            func.json_agg(
+                aggregate_order_by(leave_json, leave.leave_start_date), type_=JSON
+            )
+            .filter(leave.leave_start_date > today)
+            .label("upcoming_leaves"),
+            func.json_agg(
+                aggregate_order_by(
+                    leave_json, leave.leave_start_date.desc(), leave.id.desc()
+                ),
+                type_=JSON,
             )
-            .scalar()
-            or 0
+            .filter(leave.leave_end_date < today, ranked.c.recency <= PAST_LEAVES_SHOWN)
+            .label("past_leaves"),
+            func.count().filter(leave.leave_end_date < today).label("past_leave_count"),
         )
+        .group_by(leave.employee_id)
+        .cte("leaves")
+    )
 
-        leave_balance = total_leave_allocation - leaves_used
+    vibe = VibeMeterDataset
+    vibe_cte = (
+        select(
+            vibe.employee_id,
+            func.array_agg(
+                aggregate_order_by(
+                    func.least(vibe.vibe_score, VIBE_FEATURE_MAX), vibe.response_date
+                )
+            ).label("vibe_scores"),
+            func.array_agg(
+                aggregate_order_by(vibe.response_date, vibe.response_date)
+            ).label("vibe_dates"),
+        )
+        .where(vibe.employee_id.in_(employee_ids))
+        .group_by(vibe.employee_id)
+        .cte("vibes")
+    )
 
-        # 3. Get upcoming leaves
-        upcoming_leaves = (
-            db.query(LeaveDataset)
-            .filter(
-                LeaveDataset.employee_id == employee_id,
-                LeaveDataset.leave_start_date > today,
-            )
-            .order_by(LeaveDataset.leave_start_date)
-            .all()
+    return (
+        select(
+            User.employee_id,
+            activity_cte.c.work_hours,
+            activity_cte.c.avg_work_hours,
+            activity_cte.c.days_present,
+            leave_cte.c.leaves_used,
+            leave_cte.c.upcoming_leaves,
+            leave_cte.c.past_leaves,
+            leave_cte.c.past_leave_count,
+            EmployeeFeatures.recent_avg_work_hours,
+            EmployeeFeatures.leave_days_by_type,
+            EmployeeFeatures.performance_rating,
+            EmployeeFeatures.reward_points,
+            EmployeeFeatures.vibe_mean,
+            EmployeeFeatures.recent_vibe_scores,
+            vibe_cte.c.vibe_scores,
+            vibe_cte.c.vibe_dates,
         )
+        .outerjoin(activity_cte, activity_cte.c.employee_id == User.employee_id)
+        .outerjoin(leave_cte, leave_cte.c.employee_id == User.employee_id)
+        .outerjoin(vibe_cte, vibe_cte.c.employee_id == User.employee_id)
+        .outerjoin(EmployeeFeatures, EmployeeFeatures.employee_id == User.employee_id)
+        .where(User.employee_id.in_(employee_ids))
+    )
 
-        # 4. Get past leave history
-        past_leaves = (
-            db.query(LeaveDataset)
-            .filter(
-                LeaveDataset.employee_id == employee_id,
-                LeaveDataset.leave_end_date < today,
+
+def format_dashboard(row, today):
+    """Shape one dashboard_query row into the dashboard response."""
+    thirty_days_ago = today - timedelta(days=DASHBOARD_DAYS)
+    avg_work_hours = row.avg_work_hours or 0
+    days_present = row.days_present or 0
+    leaves_used = row.leaves_used or 0
+    past_leaves = row.past_leaves or []
+
+    # Working days in the last 30 days (excluding weekends)
+    working_days = sum(
+        1
+        for day in range(DASHBOARD_DAYS)
+        if (thirty_days_ago + timedelta(days=day)).weekday() < 5
+    )
+    days_absent = max(working_days - days_present, 0)
+
+    # Punctuality: average work hours compared to a standard 8-hour day
+    punctuality_score = (
+        min(100, (avg_work_hours / 8) * 100) if avg_work_hours > 0 else 0
+    )
+
+    # Same statistics as the chat's vibe node (app.ml.analytics)
+    vibe_trend = analyze_employee_vibes(row.vibe_scores or [], row.vibe_dates)
+
+    return {
+        "employee_id": row.employee_id,
+        "work_hours": row.work_hours or [],
+        "leave_info": {
+            "leave_balance": TOTAL_LEAVE_ALLOCATION - leaves_used,
+            "total_allocation": TOTAL_LEAVE_ALLOCATION,
+            "leaves_used": leaves_used,
+            "upcoming_leaves": row.upcoming_leaves or [],
+            "past_leave_history": past_leaves,
+            "past_leave_count": row.past_leave_count or 0,
+            # Continue with GET /employee/{employee_id}/leaves/history
+            "past_leave_history_cursor": (
+                encode_cursor([past_leaves[-1]["start_date"], past_leaves[-1]["id"]])
+                if (row.past_leave_count or 0) > len(past_leaves)
+                else None
+            ),
+        },
+        "attendance_stats": {
+            "avg_work_hours": round(avg_work_hours, 2),
+            "total_days_present": days_present,
+            "total_days_absent": days_absent,
+            "punctuality_score": round(punctuality_score, 2),
+            "period": f"{thirty_days_ago.isoformat()} to {today.isoformat()}",
+        },
+        "highlights": {
+            "recent_avg_work_hours": (
+                round(row.recent_avg_work_hours, 2)
+                if row.recent_avg_work_hours is not None
+                else None
+            ),
+            "leave_days_by_type": row.leave_days_by_type or {},
+            "performance_rating": row.performance_rating,
+            "reward_points": row.reward_points or 0,
+            "vibe_mean": round(row.vibe_mean, 2) if row.vibe_mean is not None else None,
+            "recent_vibe_scores": row.recent_vibe_scores or [],
+            "vibe_trend": {
+                "trend": vibe_trend.get("trend"),
+                "slope": _rounded(vibe_trend.get("slope")),
+                "volatility": _rounded(vibe_trend.get("volatility")),
+                "change_point_date": vibe_trend.get("change_point_date"),
+                "change_point_shift": _rounded(vibe_trend.get("change_point_shift")),
+            },
+        },
+    }
+
+
+def _rounded(value):
+    return round(value, 2) if value is not None else None
+
+
+async def fetch_dashboards(db, employee_ids):
+    """
+    JSON-encoded dashboards for several employees keyed by employee_id,
+    served from the cache where present; all misses are loaded with a single
+    query and cached until the employee's rows change or the day ends.
+    Unknown employees are left out.
+    """
+    employee_ids = list(dict.fromkeys(employee_ids))
+    if not employee_ids:
+        return {}
+    keys = [f"employee_dashboard:{employee_id}" for employee_id in employee_ids]
+    dashboards = {}
+    for employee_id, payload in zip(employee_ids, await cache_get_many(keys)):
+        entry = unpack_entry(payload) if payload else None
+        if entry is not None:
+            dashboards[employee_id] = entry.body
+
+    missing = [e for e in employee_ids if e not in dashboards]
+    if missing:
+        generation = await cache_generation()
+        today = date.today()
+        with read_from_primary():
+            rows = (await db.execute(dashboard_query(missing, today))).all()
+        entries = []
+        for row in rows:
+            body = encode_json(format_dashboard(row, today))
+            dashboards[row.employee_id] = body
+            entries.append(
+                (
+                    f"employee_dashboard:{row.employee_id}",
+                    pack_entry(body),
+                    [employee_tag(row.employee_id)],
+                )
             )
-            .order_by(LeaveDataset.leave_start_date.desc())
-            .all()
-        )
+        # The 30-day window moves at midnight
+        end_of_day = datetime.combine(today + timedelta(days=1), time.min)
+        if entries and generation is not None:
+            await cache_set_many(
+                entries,
+                ttl=max(int((end_of_day - datetime.now()).total_seconds()), 1),
+                generation=generation,
+            )
+    return dashboards
 
-        # 5. Calculate attendance & punctuality stats
-        # a. Average work hours
-        avg_work_hours = (
-            db.query(func.avg(ActivityTrackerDataset.work_hours))
-            .filter(
-                ActivityTrackerDataset.employee_id == employee_id,
-                ActivityTrackerDataset.date >= thirty_days_ago,
+
+@router.get("/employee/{employee_id}/dashboard")
+async def get_employee_dashboard(
+    employee_id: str, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Fetch comprehensive employee data including:
+    - Work hours per day
+    - Leave balance
+    - Upcoming leaves
+    - Past leave history
+    - Attendance & punctuality stats
+    - Highlights from the employee's precomputed features and vibe trend
+    """
+    try:
+        dashboards = await fetch_dashboards(db, [employee_id])
+        if employee_id not in dashboards:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
             )
-            .scalar()
-            or 0
+        return json_response(
+            dashboards[employee_id], request, cache_control=PRIVATE_CACHE_CONTROL
         )
 
-        # b. Days present in last 30 days
-        days_present = (
-            db.query(func.count(ActivityTrackerDataset.date))
-            .filter(
-                ActivityTrackerDataset.employee_id == employee_id,
-                ActivityTrackerDataset.date >= thirty_days_ago,
-                ActivityTrackerDataset.work_hours > 0,
-            )
-            .scalar()
-            or 0
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}",
         )
 
-        # c. Days absent (excluding weekends)
-        # Get all dates the employee worked
-        [record.date for record in work_hours_data]
 
-        # Calculate working days in the last 30 days (excluding weekends)
-        working_days = sum(
-            1
-            for day in range(30)
-            if (thirty_days_ago + timedelta(days=day)).weekday() < 5
+@router.post("/employees/dashboard")
+async def get_employee_dashboards(
+    request: DashboardBatchRequest, db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Fetch the dashboards of several employees at once, keyed by employee_id.
+    Cache misses are loaded together in one database round trip.
+    """
+    try:
+        dashboards = await fetch_dashboards(db, request.employee_ids)
+        # Spliced from the encoded dashboards: format_response({id: dashboard})
+        data = b",".join(
+            encode_json(employee_id) + b":" + body
+            for employee_id, body in dashboards.items()
+        )
+        return json_response(b'{"data":{' + data + b'},"status":"success"}')
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An unexpected error occurred: {str(e)}",
         )
 
-        # Calculate days absent
-        days_absent = working_days - days_present
-        if days_absent < 0:  # Safeguard against negative values
-            days_absent = 0
 
-        # d. Calculate punctuality score (based on average work hours compared to standard 8-hour day)
-        punctuality_score = (
-            min(100, (avg_work_hours / 8) * 100) if avg_work_hours > 0 else 0
+@router.get("/employee/{employee_id}/leaves/history")
+async def get_past_leaves(
+    employee_id: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Fetch a page of an employee's past leaves, most recent first.
+    """
+    try:
+        user = await db.scalar(
+            select(User.employee_id).where(User.employee_id == employee_id)
         )
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
+            )
 
-        # Format and return the response
-        format_response = {
-            "employee_id": employee_id,
-            "work_hours": [
-                {"date": str(record.date), "hours": record.work_hours}
-                for record in work_hours_data
+        leaves, pagination = await paginate(
+            db, past_leaves_query(employee_id, date.today()), PAST_LEAVES_ORDER, page
+        )
+        body = format_response(
+            data=[
+                LeaveData(
+                    id=leave.id,
+                    leave_type=leave.leave_type,
+                    leave_days=leave.leave_days,
+                    start_date=leave.leave_start_date,
+                    end_date=leave.leave_end_date,
+                ).model_dump()
+                for leave in leaves
             ],
-            "leave_info": {
-                "leave_balance": leave_balance,
-                "total_allocation": total_leave_allocation,
-                "leaves_used": leaves_used,
-                "upcoming_leaves": [
-                    {
-                        "id": leave.id,
-                        "leave_type": leave.leave_type,
-                        "leave_days": leave.leave_days,
-                        "start_date": str(leave.leave_start_date),
-                        "end_date": str(leave.leave_end_date),
-                    }
-                    for leave in upcoming_leaves
-                ],
-                "past_leave_history": [
-                    {
-                        "id": leave.id,
-                        "leave_type": leave.leave_type,
-                        "leave_days": leave.leave_days,
-                        "start_date": str(leave.leave_start_date),
-                        "end_date": str(leave.leave_end_date),
-                    }
-                    for leave in past_leaves
-                ],
-            },
-            "attendance_stats": {
-                "avg_work_hours": round(avg_work_hours, 2),
-                "total_days_present": days_present,
-                "total_days_absent": days_absent,
-                "punctuality_score": round(punctuality_score, 2),
-                "period": f"{thirty_days_ago.isoformat()} to {today.isoformat()}",
-            },
-        }
-        await redis_client.set(
-            f"employee_dashboard:{employee_id}", json.dumps(format_response), ex=3600
+            pagination=pagination,
         )
-        return format_response
+        return json_response(encode_json(body))
 
     except HTTPException as e:
         raise e
@@ -250,9 +468,9 @@ async def get_employee_dashboard(employee_id: str, db: Session = Depends(get_db)
 
 @router.post("/employee/{employee_id}/tasks", response_model=TaskOut)
 async def create_task(
-    employee_id: str, task: TaskCreate, db: Session = Depends(get_db)
+    employee_id: str, task: TaskCreate, db: AsyncSession = Depends(get_async_db)
 ):
-    user = db.query(User).filter(User.employee_id == employee_id).first()
+    user = await db.scalar(select(User).where(User.employee_id == employee_id))
     if not user:
         raise HTTPException(status_code=404, detail="Employee not found")
 
@@ -263,29 +481,22 @@ async def create_task(
         due_date=task.due_date,
     )
     db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
+    await db.commit()
+    await db.refresh(new_task)
+    await invalidate(employee_tag(employee_id))
     return new_task
 
 
 @router.get("/employee/{employee_id}/tasks", response_model=List[TaskOut])
-async def get_tasks(employee_id: str, db: Session = Depends(get_db)):
-
-    # Check if tasks are cached in Redis
-    cache_key = f"employee:{employee_id}:tasks"
-    cached_tasks = await redis_client.get(cache_key)
-
-    if cached_tasks:
-        # Return cached tasks if available
-        return json.loads(cached_tasks)
+@cached("employee:{employee_id}:tasks", tags=employee_tags)
+async def get_tasks(employee_id: str, db: AsyncSession = Depends(get_async_db)):
 
     # Fetch tasks from the database
     tasks = (
-        db.query(Task)
-        .filter(Task.employee_id == employee_id)
-        .order_by(Task.due_date)
-        .all()
-    )
+        await db.scalars(
+            select(Task).where(Task.employee_id == employee_id).order_by(Task.due_date)
+        )
+    ).all()
 
     tasks_data = [
         {
@@ -298,47 +509,49 @@ async def get_tasks(employee_id: str, db: Session = Depends(get_db)):
         for task in tasks
     ]
 
-    # Cache the tasks in Redis with a TTL (e.g., 3600 seconds)
-    await redis_client.set(cache_key, json.dumps(tasks_data), ex=3600)
-
     return tasks_data
 
 
 @router.put("/employee/{employee_id}/tasks/{task_id}", response_model=TaskOut)
 async def update_task_status(
-    employee_id: str, task_id: int, is_completed: bool, db: Session = Depends(get_db)
+    employee_id: str,
+    task_id: int,
+    is_completed: bool,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    task = (
-        db.query(Task)
-        .filter(Task.employee_id == employee_id, Task.id == task_id)
-        .first()
+    task = await db.scalar(
+        select(Task).where(Task.employee_id == employee_id, Task.id == task_id)
     )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
     task.is_completed = is_completed
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    await invalidate(employee_tag(employee_id))
     return task
 
 
 @router.delete("/employee/{employee_id}/tasks/{task_id}")
-async def delete_task(employee_id: str, task_id: int, db: Session = Depends(get_db)):
-    task = (
-        db.query(Task)
-        .filter(Task.employee_id == employee_id, Task.id == task_id)
-        .first()
+async def delete_task(
+    employee_id: str, task_id: int, db: AsyncSession = Depends(get_async_db)
+):
+    task = await db.scalar(
+        select(Task).where(Task.employee_id == employee_id, Task.id == task_id)
     )
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
+    await invalidate(employee_tag(employee_id))
     return {"detail": "Task deleted successfully"}
 
 
 @router.get("/employee/{employee_id}")
-async def get_persona_dashboard(employee_id: str, db: Session = Depends(get_db)):
+async def get_persona_dashboard(
+    employee_id: str, db: AsyncSession = Depends(get_async_db)
+):
     """
     Fetch all leaves for a given employee.
     """
@@ -352,7 +565,7 @@ async def get_persona_dashboard(employee_id: str, db: Session = Depends(get_db))
     #     profile_picture="",
     # )
 
-    user_data = db.query(User).filter(User.employee_id == employee_id).first()
+    user_data = await db.scalar(select(User).where(User.employee_id == employee_id))
     if not user_data:
         raise HTTPException(status_code=404, detail="User not found")
 
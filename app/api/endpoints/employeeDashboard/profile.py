@@ -1,48 +1,48 @@
-import json
-
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.schema import EmployeeReport, OnboardingDataset, RewardsDataset, User
-from app.utils.db import get_db
-from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from app.models.queries import REPORTS_ORDER, employee_reports_query
+from app.models.schema import EmployeeFeatures, RewardsDataset, User
+from app.utils.cache import cached, employee_tags, json_response
+from app.utils.db import get_async_db
+from app.utils.helpers import encode_json, format_response
+from app.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
 
 @router.get("/employee/{employee_id}")
-async def get_employee_profile(employee_id: str, db: Session = Depends(get_db)):
+@cached("employee_profile:{employee_id}", tags=employee_tags)
+async def get_employee_profile(
+    employee_id: str, db: AsyncSession = Depends(get_async_db)
+):
     """
     Retrieve employee profile information including personal details and recognition.
     """
-    # Check if data is cached in Redis
-    cache_key = f"employee_profile:{employee_id}"
-    cached_data = await redis_client.get(cache_key)
-
-    if cached_data:
-        return json.loads(cached_data)
-
-    # Query to get user details using ORM
-    user = db.query(User).filter(User.employee_id == employee_id).first()
+    # User details with the joining date from the employee's feature row
+    row = (
+        await db.execute(
+            select(User, EmployeeFeatures.joining_date)
+            .outerjoin(
+                EmployeeFeatures, EmployeeFeatures.employee_id == User.employee_id
+            )
+            .where(User.employee_id == employee_id)
+        )
+    ).first()
 
-    if not user:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
         )
-
-    # Query to get joining date from onboarding_dataset using ORM
-    joining_date_result = (
-        db.query(OnboardingDataset)
-        .filter(OnboardingDataset.employee_id == employee_id)
-        .first()
-    )
-    joining_date = joining_date_result.joining_date if joining_date_result else None
+    user, joining_date = row
 
     # Query to get awards and recognition using ORM
     awards = (
-        db.query(RewardsDataset).filter(RewardsDataset.employee_id == employee_id).all()
-    )
+        await db.scalars(
+            select(RewardsDataset).where(RewardsDataset.employee_id == employee_id)
+        )
+    ).all()
 
     # Prepare the response data
     response_data = {
@@ -64,35 +64,32 @@ async def get_employee_profile(employee_id: str, db: Session = Depends(get_db)):
         ],
     }
 
-    # Cache the response data in Redis
-    await redis_client.set(
-        cache_key, json.dumps(response_data), ex=3600
-    )  # Cache for 1 hour
-
     return format_response(response_data)
 
 
 @router.get("/employee/{employee_id}/reports")
-async def get_employee_reports(employee_id: str, db: Session = Depends(get_db)):
+async def get_employee_reports(
+    employee_id: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Retrieve all reports generated for an employee from chatbot conversations.
+    Retrieve a page of the reports generated for an employee from chatbot
+    conversations, newest first.
     """
     # Check if employee exists
-    user = db.query(User).filter(User.employee_id == employee_id).first()
+    user = await db.scalar(select(User).where(User.employee_id == employee_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Employee not found"
         )
 
-    # Get all reports for the employee
-    reports = (
-        db.query(EmployeeReport)
-        .filter(EmployeeReport.employee_id == employee_id)
-        .order_by(EmployeeReport.generated_at.desc())
-        .all()
+    # Get a page of reports for the employee
+    reports, pagination = await paginate(
+        db, employee_reports_query(employee_id), REPORTS_ORDER, page
     )
 
-    return format_response(
+    body = format_response(
         {
             "reports": [
                 {
@@ -102,5 +99,7 @@ async def get_employee_reports(employee_id: str, db: Session = Depends(get_db)):
                 }
                 for report in reports
             ]
-        }
+        },
+        pagination=pagination,
     )
+    return json_response(encode_json(body))
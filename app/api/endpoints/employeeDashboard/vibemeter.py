@@ -2,23 +2,31 @@ from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.schema import VibeMeterDataset
-from app.utils.db import get_db
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
 from app.utils.redis_client import redis_client
 
 router = APIRouter()
 
+# Range of a vibe meter reading
+VIBE_SCORE_MIN = 1
+VIBE_SCORE_MAX = 6
+
 
 # Pydantic model for request validation
 class VibeMeterSubmission(BaseModel):
-    vibe_score: int = Field(..., ge=1, le=6)
+    vibe_score: int = Field(..., ge=VIBE_SCORE_MIN, le=VIBE_SCORE_MAX)
 
 
 @router.get("/check-today/{employee_id}")
-async def check_today_submission(employee_id: str, db: Session = Depends(get_db)):
+async def check_today_submission(
+    employee_id: str, db: AsyncSession = Depends(get_async_db)
+):
     """
     Check if an employee has submitted their vibe meter reading for today.
     Returns whether submission is needed and any existing data.
@@ -26,8 +34,11 @@ async def check_today_submission(employee_id: str, db: Session = Depends(get_db)
     today = date.today()
     cache_key = f"vibemeter:{employee_id}:{today}"
 
-    # Check Redis cache first
-    cached_result = redis_client.get(cache_key)
+    # Check Redis cache first; without Redis the database answers
+    try:
+        cached_result = await redis_client.get(cache_key)
+    except RedisError:
+        cached_result = None
     if cached_result:
         return format_response(
             {
@@ -37,18 +48,21 @@ async def check_today_submission(employee_id: str, db: Session = Depends(get_db)
         )
 
     # Query for today's entry using SQLAlchemy ORM
-    result = (
-        db.query(VibeMeterDataset)
-        .filter(
+    result = await db.scalar(
+        select(VibeMeterDataset)
+        .where(
             VibeMeterDataset.employee_id == employee_id,
             VibeMeterDataset.response_date == today,
         )
-        .first()
+        .limit(1)
     )
 
     if result:
         # Cache the result in Redis
-        redis_client.set(cache_key, "submitted", ex=86400)  # Cache for 1 day
+        try:
+            await redis_client.set(cache_key, "submitted", ex=86400)  # 1 day
+        except RedisError as e:
+            print(f"Could not cache vibe meter submission of {employee_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Vibe meter already submitted for today",
@@ -61,7 +75,9 @@ async def check_today_submission(employee_id: str, db: Session = Depends(get_db)
 
 @router.post("/submit/{employee_id}")
 async def submit_vibemeter(
-    employee_id: str, submission: VibeMeterSubmission, db: Session = Depends(get_db)
+    employee_id: str,
+    submission: VibeMeterSubmission,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Submit a daily vibe meter reading for an employee.
@@ -69,13 +85,13 @@ async def submit_vibemeter(
     today = date.today()
 
     # Check for existing submission using SQLAlchemy ORM
-    existing = (
-        db.query(VibeMeterDataset)
-        .filter(
+    existing = await db.scalar(
+        select(VibeMeterDataset)
+        .where(
             VibeMeterDataset.employee_id == employee_id,
             VibeMeterDataset.response_date == today,
         )
-        .first()
+        .limit(1)
     )
 
     if existing:
@@ -95,8 +111,8 @@ async def submit_vibemeter(
         )
 
         db.add(new_submission)
-        db.commit()
-        db.refresh(new_submission)
+        await db.commit()
+        await db.refresh(new_submission)
 
         return format_response(
             {
@@ -111,7 +127,7 @@ async def submit_vibemeter(
         )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error submitting vibe meter: {str(e)}",
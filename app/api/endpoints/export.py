@@ -0,0 +1,55 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.utils.bulk_export import FORMATS, SOURCES, export_rows
+
+router = APIRouter()
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = "ndjson",
+    employee_id: Optional[List[str]] = Query(None),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """
+    Stream every row of a dataset ("activity", "leave", "onboarding",
+    "performance", "rewards", "vibemeter") or of the employee reports
+    ("reports") as NDJSON or CSV with a header row.
+
+    Repeat `employee_id` to export only those employees; `start` and `end`
+    (inclusive days) filter on the dataset's date column. Rows are read in
+    batches through a server-side cursor, so large exports use constant
+    memory.
+    """
+    if dataset not in SOURCES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset {dataset}; expected one of {', '.join(SOURCES)}",
+        )
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format {format}; expected one of {', '.join(FORMATS)}",
+        )
+    if (start or end) and SOURCES[dataset].date_column is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{dataset} has no date column to filter on",
+        )
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end",
+        )
+
+    return StreamingResponse(
+        export_rows(dataset, format, employee_id, start, end),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'},
+    )
@@ -1,16 +1,33 @@
-import json
 from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.queries import (
+    FOCUS_GROUPS_ORDER,
+    GROUP_MEMBERS_ORDER,
+    focus_group_detail_query,
+    focus_groups_query,
+    format_group,
+    group_members_query,
+)
 from app.models.schema import FocusGroup, User
-from app.utils.db import get_db
+from app.utils.cache import (
+    GROUPS_TAG,
+    SHARED_CACHE_CONTROL,
+    SURVEYS_TAG,
+    cached,
+    employee_tag,
+    group_tag,
+    invalidate,
+)
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from app.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
@@ -41,38 +58,36 @@ class GroupData(BaseModel):
     surveys: List
 
 
+def format_member(user):
+    return {
+        "employee_id": user.employee_id,
+        "email": user.email,
+        "is_verified": user.is_verified,
+        "profile_picture": user.profile_picture,
+    }
+
+
 @router.get("")
-async def get_all_groups(db: Session = Depends(get_db)):
+@cached(
+    "all_focus_groups:{page.cache_key}",
+    tags=[GROUPS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_all_groups(
+    page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """
-    Fetch all focus groups from the database .
+    Fetch a page of focus groups from the database, newest first.
     """
     try:
-        # Check if data is cached in Redis
-        cache_key = "all_focus_groups"
-        cached_data = await redis_client.get(cache_key)
-        if cached_data:
-            return format_response(data=json.loads(cached_data))
-
         # Fetch data from the database
-        groups = db.query(FocusGroup).all()
-        formatted_groups = []
-        for group in groups:
-            formatted_group = {
-                "focus_group_id": group.focus_group_id,
-                "name": group.name,
-                "description": group.description,
-                "created_at": str(group.created_at),
-                "metrics": group.metrics,
-                "members": len(group.users),
-            }
-            formatted_groups.append(formatted_group)
-
-        # Cache the data in Redis
-        await redis_client.set(
-            cache_key, json.dumps(formatted_groups), ex=3600
-        )  # Cache for 1 hour
-
-        return format_response(data=formatted_groups)
+        groups, pagination = await paginate(
+            db, focus_groups_query(), FOCUS_GROUPS_ORDER, page
+        )
+        return format_response(
+            data=[format_group(group, with_member_count=True) for group in groups],
+            pagination=pagination,
+        )
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -83,17 +98,24 @@ async def get_all_groups(db: Session = Depends(get_db)):
 
 
 @router.get("/minified")
-async def get_all_groups_minified(db: Session = Depends(get_db)):
+@cached(
+    "all_focus_groups_minified:{page.cache_key}",
+    tags=[GROUPS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_all_groups_minified(
+    page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """
-    Fetch all focus groups from the database in a minified format.
+    Fetch a page of focus groups from the database in a minified format.
     """
     try:
-        # Check if data is cached in Redis
-        cache_key = "all_focus_groups_minified"
-        cached_data = await redis_client.get(cache_key)
-        if cached_data:
-            return format_response(data=json.loads(cached_data))
-        groups = db.query(FocusGroup).all()
+        groups, pagination = await paginate(
+            db,
+            focus_groups_query(with_member_counts=False),
+            FOCUS_GROUPS_ORDER,
+            page,
+        )
         formatted_groups = []
         for group in groups:
             formatted_group = {
@@ -101,10 +123,7 @@ async def get_all_groups_minified(db: Session = Depends(get_db)):
                 "name": group.name,
             }
             formatted_groups.append(formatted_group)
-        await redis_client.set(
-            cache_key, json.dumps(formatted_groups), ex=3600
-        )  # Cache for 1 hour
-        return format_response(data=formatted_groups)
+        return format_response(data=formatted_groups, pagination=pagination)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -114,31 +133,33 @@ async def get_all_groups_minified(db: Session = Depends(get_db)):
         )
 
 
+# Group details list the members, actions and surveys: member changes come
+# with GROUPS_TAG (e.g. verification), action writes name their groups, and
+# survey writes only SURVEYS_TAG
 @router.get("/{focus_group_id}")
-async def get_group_details(focus_group_id: str, db: Session = Depends(get_db)):
+@cached(
+    "focus_group:{focus_group_id}:{members.cache_key}",
+    tags=["group:{focus_group_id}", GROUPS_TAG, SURVEYS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_group_details(
+    focus_group_id: str,
+    members: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Fetch focus group data from the database.
+    Fetch focus group data from the database. Members come one page at a
+    time (see users_pagination); the paging parameters apply to them.
     """
     try:
-        # Check if data is cached in Redis
-        group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.focus_group_id == focus_group_id)
-            .first()
-        )
+        group = await db.scalar(focus_group_detail_query(focus_group_id))
         if not group:
             raise HTTPException(status_code=404, detail="Focus Group not found.")
 
-        users_data = []
-        for user in group.users:
-            users_data.append(
-                {
-                    "employee_id": user.employee_id,
-                    "email": user.email,
-                    "is_verified": user.is_verified,
-                    "profile_picture": user.profile_picture,
-                }
-            )
+        users, users_pagination = await paginate(
+            db, group_members_query(focus_group_id), GROUP_MEMBERS_ORDER, members
+        )
+        users_data = [format_member(user) for user in users]
 
         formatted_group = {
             "focus_group_id": group.focus_group_id,
@@ -147,6 +168,7 @@ async def get_group_details(focus_group_id: str, db: Session = Depends(get_db)):
             "created_at": str(group.created_at),
             "metrics": group.metrics,
             "users": users_data,
+            "users_pagination": users_pagination,
             "actions": [
                 {
                     "action_id": action.action_id,
@@ -172,7 +194,7 @@ async def get_group_details(focus_group_id: str, db: Session = Depends(get_db)):
                 for survey in group.surveys
             ],
         }
-        
+
         return format_response(data=formatted_group)
     except HTTPException as e:
         raise e
@@ -183,8 +205,46 @@ async def get_group_details(focus_group_id: str, db: Session = Depends(get_db)):
         )
 
 
+@router.get("/{focus_group_id}/members")
+@cached(
+    "focus_group_members:{focus_group_id}:{page.cache_key}",
+    tags=["group:{focus_group_id}", GROUPS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_group_members(
+    focus_group_id: str,
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Fetch a page of a focus group's members, ordered by employee ID.
+    """
+    try:
+        group = await db.scalar(
+            select(FocusGroup.focus_group_id).where(
+                FocusGroup.focus_group_id == focus_group_id
+            )
+        )
+        if not group:
+            raise HTTPException(status_code=404, detail="Focus Group not found.")
+
+        users, pagination = await paginate(
+            db, group_members_query(focus_group_id), GROUP_MEMBERS_ORDER, page
+        )
+        return format_response(
+            data=[format_member(user) for user in users], pagination=pagination
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve group members: {str(e)}",
+        )
+
+
 @router.post("")
-async def create_group(group: GroupCreate, db: Session = Depends(get_db)):
+async def create_group(group: GroupCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new focus group in the database.
     """
@@ -197,7 +257,7 @@ async def create_group(group: GroupCreate, db: Session = Depends(get_db)):
         )
 
         for employee_id in group.users:
-            user = db.query(User).filter(User.employee_id == employee_id).first()
+            user = await db.scalar(select(User).where(User.employee_id == employee_id))
             if not user:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -206,8 +266,9 @@ async def create_group(group: GroupCreate, db: Session = Depends(get_db)):
             new_group.users.append(user)
 
         db.add(new_group)
-        db.commit()
-        db.refresh(new_group)
+        await db.commit()
+        await db.refresh(new_group)
+        await invalidate(GROUPS_TAG, *map(employee_tag, group.users))
 
         # Return the formatted response
         return format_response(data=new_group)
@@ -222,16 +283,14 @@ async def create_group(group: GroupCreate, db: Session = Depends(get_db)):
 
 @router.put("/{focus_group_id}")
 async def update_group(
-    focus_group_id: str, question: GroupData, db: Session = Depends(get_db)
+    focus_group_id: str, question: GroupData, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing focus group in the database.
     """
     try:
-        db_group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.focus_group_id == focus_group_id)
-            .first()
+        db_group = await db.scalar(
+            select(FocusGroup).where(FocusGroup.focus_group_id == focus_group_id)
         )
         if not db_group:
             raise HTTPException(status_code=404, detail="Focus Group not found.")
@@ -239,8 +298,9 @@ async def update_group(
         for key, value in question.dict().items():
             setattr(db_group, key, value)
 
-        db.commit()
-        db.refresh(db_group)
+        await db.commit()
+        await db.refresh(db_group)
+        await invalidate(GROUPS_TAG, group_tag(focus_group_id))
         return format_response(data=db_group)
     except HTTPException as e:
         raise e
@@ -252,21 +312,20 @@ async def update_group(
 
 
 @router.delete("/{focus_group_id}")
-async def delete_group(focus_group_id: str, db: Session = Depends(get_db)):
+async def delete_group(focus_group_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a focus group from the database.
     """
     try:
-        db_group = (
-            db.query(FocusGroup)
-            .filter(FocusGroup.focus_group_id == focus_group_id)
-            .first()
+        db_group = await db.scalar(
+            select(FocusGroup).where(FocusGroup.focus_group_id == focus_group_id)
         )
         if not db_group:
             raise HTTPException(status_code=404, detail="Focus Group not found.")
 
-        db.delete(db_group)
-        db.commit()
+        await db.delete(db_group)
+        await db.commit()
+        await invalidate(GROUPS_TAG, group_tag(focus_group_id))
         return JSONResponse(
             content={"message": "Focus Group Deleted successfully."},
             status_code=status.HTTP_204_NO_CONTENT,
@@ -0,0 +1,67 @@
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status
+
+from app.api.cache_warmer import warm_cache
+from app.utils.bulk_load import (
+    FORMATS,
+    TARGETS,
+    ingest,
+    request_refresh,
+    run_requested_refresh,
+)
+from app.utils.helpers import format_response
+
+router = APIRouter()
+
+
+@router.post("/{dataset}")
+async def bulk_ingest(
+    dataset: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = None,
+    batch_size: Optional[int] = None,
+):
+    """
+    Bulk load daily rows for a dataset ("vibemeter" or "activity").
+
+    The body is streamed as NDJSON (one object per line) or CSV with a header
+    row; the format comes from the `format` query parameter or else the
+    Content-Type. Rows are upserted on (employee_id, date), so re-sending a
+    day replaces it. The response reports received, inserted, updated and
+    rejected rows for every batch, with the first errors of each.
+    """
+    if dataset not in TARGETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset {dataset}; expected one of {', '.join(TARGETS)}",
+        )
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        format = "csv" if "csv" in content_type else "ndjson"
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported format {format}; expected one of {', '.join(FORMATS)}",
+        )
+    if batch_size is not None and batch_size < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="batch_size must be positive",
+        )
+
+    report = await ingest(dataset, request.stream(), format, batch_size)
+
+    if report["totals"]["inserted"] or report["totals"]["updated"]:
+        background_tasks.add_task(request_refresh)
+    return format_response(report)
+
+
+async def refresh_ingested():
+    """
+    Scheduled on the leader: once ingests have asked for it, rescore and
+    refresh the aggregates, then warm the entries the loads invalidated.
+    """
+    if await run_requested_refresh():
+        await warm_cache("ingest")
@@ -1,31 +1,32 @@
-import json
-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.schema import User
-from app.utils.db import get_db
+from app.utils.cache import cached, employee_tag
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
 
 router = APIRouter()
 
 
 @router.get("/{user_id}")
-async def get_meetings(user_id: str, db: Session = Depends(get_db)):
+@cached(
+    "user_meetings:{user_id}",
+    tags=lambda result, user_id, **arguments: [employee_tag(user_id)],
+)
+async def get_meetings(user_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get all meetings for a specific user .
     """
-    cache_key = f"user_meetings:{user_id}"
-
-    # Check if data exists in Redis cache
-    cached_data = await redis_client.get(cache_key)
-    if cached_data:
-        return format_response(json.loads(cached_data))
-
     # Fetch meetings from the database
     try:
-        user = db.query(User).filter(User.employee_id == user_id).first()
+        user = await db.scalar(
+            select(User)
+            .where(User.employee_id == user_id)
+            .options(selectinload(User.meetings))
+        )
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -45,12 +46,7 @@ async def get_meetings(user_id: str, db: Session = Depends(get_db)):
             for meeting in user.meetings
         ]
 
-        # Cache the meetings data in Redis
-        await redis_client.set(
-            cache_key, json.dumps(meetings_list), ex=3600
-        )  # Cache for 1 hour
-
-        return format_response(user.meetings)
+        return format_response(meetings_list)
     except HTTPException as http_exc:
         raise http_exc
     except Exception as e:
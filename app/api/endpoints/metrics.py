@@ -0,0 +1,28 @@
+from fastapi import APIRouter
+
+from app.api.cache_warmer import warm_progress
+from app.utils.cache import cache_stats, json_response
+from app.utils.db_pool import pool_stats
+from app.utils.db_routing import routing_stats
+from app.utils.helpers import encode_json, format_response
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_metrics():
+    """
+    Runtime metrics: connection pool usage of each engine, how requests
+    and statements were routed between the primary and the read replica,
+    the hit ratio of each response cache tier, and how far the latest
+    cache warming run got.
+    """
+    body = format_response(
+        {
+            "database": {name: stats.snapshot() for name, stats in pool_stats.items()},
+            "routing": routing_stats.snapshot(),
+            "cache": cache_stats.snapshot(),
+            "cache_warming": warm_progress.snapshot(),
+        }
+    )
+    return json_response(encode_json(body))
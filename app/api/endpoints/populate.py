@@ -1,15 +1,17 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.schema import FocusGroup
-from app.utils.db import get_db
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
 
 router = APIRouter()
 
 
 @router.get("/{group}")
-async def populate(group: str, db: Session = Depends(get_db)):
+async def populate(group: str, db: AsyncSession = Depends(get_async_db)):
     """
     Populate the database with initial data.
     """
@@ -3489,7 +3491,13 @@ async def populate(group: str, db: Session = Depends(get_db)):
     # )
     # db.add(new_group)
     # db.commit()
-    data = db.query(FocusGroup).filter(FocusGroup.focus_group_id == group).all()
+    data = (
+        await db.scalars(
+            select(FocusGroup)
+            .where(FocusGroup.focus_group_id == group)
+            .options(selectinload(FocusGroup.users))
+        )
+    ).all()
     if data:
         return format_response(data[0].users)
     return format_response([])
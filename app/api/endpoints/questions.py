@@ -3,12 +3,15 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.queries import QUESTIONS_ORDER
 from app.models.schema import Question
-from app.utils.db import get_db
+from app.utils.cache import QUESTIONS_TAG, SHARED_CACHE_CONTROL, cached, invalidate
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from app.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
@@ -27,23 +30,22 @@ class QuestionData(BaseModel):
 
 
 @router.get("")
-async def get_all_questions(db: Session = Depends(get_db)):
+@cached(
+    "all_questions:{page.cache_key}",
+    tags=[QUESTIONS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_all_questions(
+    page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """
-    Fetch all questions from the database.
+    Fetch a page of questions from the database, ordered by ID.
     """
     try:
-
-        cache_key = "all_questions"
-        cached_questions = await redis_client.get(cache_key)
-
-        if cached_questions:
-            # Return cached questions if available
-            return format_response(
-                data=eval(cached_questions)
-            )  # Convert string back to list
-
         # Fetch questions from the database if not cached
-        questions = db.query(Question).all()
+        questions, pagination = await paginate(
+            db, select(Question), QUESTIONS_ORDER, page
+        )
         questions = [
             {
                 "question_id": question.question_id,
@@ -54,10 +56,7 @@ async def get_all_questions(db: Session = Depends(get_db)):
             for question in questions
         ]
 
-        # Cache the questions in Redis
-        await redis_client.set(cache_key, str(questions), ex=3600)  # Cache for 1 hour
-
-        return format_response(data=questions)
+        return format_response(data=questions, pagination=pagination)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -68,7 +67,9 @@ async def get_all_questions(db: Session = Depends(get_db)):
 
 
 @router.post("")
-async def create_question(question: QuestionCreate, db: Session = Depends(get_db)):
+async def create_question(
+    question: QuestionCreate, db: AsyncSession = Depends(get_async_db)
+):
     """
     Create a new question in the database.
     """
@@ -81,8 +82,9 @@ async def create_question(question: QuestionCreate, db: Session = Depends(get_db
         )
 
         db.add(new_question)
-        db.commit()
-        db.refresh(new_question)
+        await db.commit()
+        await db.refresh(new_question)
+        await invalidate(QUESTIONS_TAG)
 
         # Return the formatted response
         return format_response(data=new_question)
@@ -97,14 +99,14 @@ async def create_question(question: QuestionCreate, db: Session = Depends(get_db
 
 @router.put("/{question_id}")
 async def update_question(
-    question_id: str, question: QuestionData, db: Session = Depends(get_db)
+    question_id: str, question: QuestionData, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing question in the database.
     """
     try:
-        db_question = (
-            db.query(Question).filter(Question.question_id == question_id).first()
+        db_question = await db.scalar(
+            select(Question).where(Question.question_id == question_id)
         )
         if not db_question:
             raise HTTPException(status_code=404, detail="Question not found.")
@@ -112,8 +114,9 @@ async def update_question(
         for key, value in question.dict().items():
             setattr(db_question, key, value)
 
-        db.commit()
-        db.refresh(db_question)
+        await db.commit()
+        await db.refresh(db_question)
+        await invalidate(QUESTIONS_TAG)
         return format_response(data=db_question)
     except HTTPException as e:
         raise e
@@ -125,19 +128,20 @@ async def update_question(
 
 
 @router.delete("/{question_id}")
-async def delete_question(question_id: str, db: Session = Depends(get_db)):
+async def delete_question(question_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a question from the database.
     """
     try:
-        db_question = (
-            db.query(Question).filter(Question.question_id == question_id).first()
+        db_question = await db.scalar(
+            select(Question).where(Question.question_id == question_id)
         )
         if not db_question:
             raise HTTPException(status_code=404, detail="Question not found.")
 
-        db.delete(db_question)
-        db.commit()
+        await db.delete(db_question)
+        await db.commit()
+        await invalidate(QUESTIONS_TAG)
         return JSONResponse(
             content={"message": "Question Deleted successfully."},
             status_code=status.HTTP_204_NO_CONTENT,
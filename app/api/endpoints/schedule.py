@@ -3,11 +3,13 @@ from typing import List, Literal
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.schema import Meeting, MeetingMembers, User
 from app.socket import manager
-from app.utils.db import get_db
+from app.utils.cache import employee_tag, invalidate
+from app.utils.db import get_async_db
 
 
 # Pydantic model for creating a meeting
@@ -30,11 +32,11 @@ router = APIRouter()
 # Endpoint to schedule a meeting
 @router.post("", response_model=MeetingCreateRequest)
 async def schedule_meet(
-    meeting_data: MeetingCreateRequest, db: Session = Depends(get_db)
+    meeting_data: MeetingCreateRequest, db: AsyncSession = Depends(get_async_db)
 ):
     # Check if the creator exists
-    creator = (
-        db.query(User).filter(User.employee_id == meeting_data.created_by_id).first()
+    creator = await db.scalar(
+        select(User).where(User.employee_id == meeting_data.created_by_id)
     )
     if not creator:
         raise HTTPException(status_code=404, detail="User not found")
@@ -51,13 +53,13 @@ async def schedule_meet(
 
     # Add the new meeting to the session
     db.add(new_meeting)
-    db.commit()
-    db.refresh(new_meeting)
+    await db.commit()
+    await db.refresh(new_meeting)
 
     # Add members to the meeting and emit the update event to each member
     for member_id in meeting_data.members:
         # Check if the member exists
-        member = db.query(User).filter(User.employee_id == member_id).first()
+        member = await db.scalar(select(User).where(User.employee_id == member_id))
         if not member:
             raise HTTPException(
                 status_code=404, detail=f"User with employee_id {member_id} not found"
@@ -65,15 +67,14 @@ async def schedule_meet(
 
         member.meet_scheduled = True
         db.add(member)
-        db.commit()
-        db.refresh(member)
+        await db.commit()
+        await db.refresh(member)
 
         # Add to meeting_members table
         meeting_member = MeetingMembers(
             meeting_id=new_meeting.meeting_id, user_id=member_id
         )
         db.add(meeting_member)
-        db.refresh(meeting_member)
 
         # Emit the `meeting_update` event to the member over WebSocket
         await manager.notify_meeting_update(
@@ -81,6 +82,9 @@ async def schedule_meet(
         )
 
     # Commit the changes to the database
-    db.commit()
+    await db.commit()
+    await invalidate(
+        *map(employee_tag, [meeting_data.created_by_id, *meeting_data.members])
+    )
 
     return meeting_data
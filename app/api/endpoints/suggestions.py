@@ -2,12 +2,12 @@ import json
 import os
 import re
 
-import pandas as pd
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException
 from google import genai
 from sqlalchemy.orm import Session
 
+from app.ml.targeting import load_targeting_frame
 from app.models.schema import FocusGroup
 from app.utils.db import get_db
 
@@ -112,19 +112,10 @@ def generate_suggestions(db: Session = Depends(get_db)):
         [f"Group {i}:\n {group}\n\n\n" for i, group in enumerate(target_groups)]
     )
 
-    csv_path = os.path.abspath(
-        os.path.join(
-            os.path.dirname(__file__), "../..", "data", "employee_targeting_results.csv"
-        )
-    )
-
-    # Read the CSV file with error handling
-    try:
-        df = pd.read_csv(csv_path)
-    except FileNotFoundError:
-        return "Error: The CSV file was not found."
-    except pd.errors.EmptyDataError:
-        return "Error: The CSV file is empty or invalid."
+    # Read the targeting results computed by the risk-scoring engine
+    df = load_targeting_frame(db.connection())
+    if df.empty:
+        return "Error: No targeting results found. Run the targeting engine first."
 
     # Convert the DataFrame into a markdown table
     try:
@@ -1,16 +1,32 @@
-import json
 from datetime import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.models.queries import (
+    SURVEYS_ORDER,
+    format_group,
+    survey_detail_query,
+    survey_member_count_query,
+    surveys_query,
+)
 from app.models.schema import FocusGroup, Survey
-from app.utils.db import get_db
+from app.utils.cache import (
+    GROUPS_TAG,
+    SHARED_CACHE_CONTROL,
+    SURVEYS_TAG,
+    cached,
+    invalidate,
+    survey_tag,
+)
+from app.utils.db import get_async_db
 from app.utils.helpers import format_response
-from app.utils.redis_client import redis_client
+from app.utils.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
@@ -39,17 +55,21 @@ class SurveyData(BaseModel):
     created_at: datetime
 
 
+# Surveys list their target groups, so group edits drop them too
 @router.get("")
-async def get_all_surveys(db: Session = Depends(get_db)):
+@cached(
+    "all_surveys:{page.cache_key}",
+    tags=[SURVEYS_TAG, GROUPS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_all_surveys(
+    page: PageParams = Depends(page_params), db: AsyncSession = Depends(get_async_db)
+):
     """
-    Fetch all surveys from the database.
+    Fetch a page of surveys from the database, newest first.
     """
     try:
-        cached_surveys = await redis_client.get("all_surveys")
-        if cached_surveys:
-            return format_response(data=json.loads(cached_surveys))
-
-        surveys = db.query(Survey).all()
+        surveys, pagination = await paginate(db, surveys_query(), SURVEYS_ORDER, page)
         formatted_surveys = []
         for survey in surveys:
             formatted_survey = {
@@ -59,25 +79,14 @@ async def get_all_surveys(db: Session = Depends(get_db)):
                 "ends_at": str(survey.ends_at),
                 "is_active": survey.is_active,
                 "target_groups": [
-                    {
-                        "name": group.name,
-                        "description": group.description,
-                        "created_at": str(group.created_at),
-                        "focus_group_id": group.focus_group_id,
-                        "metrics": group.metrics,
-                    }
-                    for group in survey.target_groups
+                    format_group(group) for group in survey.target_groups
                 ],
                 "created_at": str(survey.created_at),
                 "questions": survey.questions,
             }
             formatted_surveys.append(formatted_survey)
 
-        await redis_client.set(
-            "all_surveys", json.dumps(formatted_surveys), ex=3600
-        )  # Cache for 1 hour
-
-        return format_response(data=formatted_surveys)
+        return format_response(data=formatted_surveys, pagination=pagination)
     except HTTPException as e:
         raise e
     except Exception as e:
@@ -87,13 +96,19 @@ async def get_all_surveys(db: Session = Depends(get_db)):
         )
 
 
+# Target groups are shown with their member counts
 @router.get("/{survey_id}")
-async def get_survey(survey_id: str, db: Session = Depends(get_db)):
+@cached(
+    "survey:{survey_id}",
+    tags=lambda result, survey_id, **arguments: [survey_tag(survey_id), GROUPS_TAG],
+    cache_control=SHARED_CACHE_CONTROL,
+)
+async def get_survey(survey_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Fetch a specific survey from the database by its ID.
     """
     try:
-        db_survey = db.query(Survey).filter(Survey.survey_id == survey_id).first()
+        db_survey = await db.scalar(survey_detail_query(survey_id))
         if not db_survey:
             raise HTTPException(status_code=404, detail="Survey not found.")
         formatted_survey = {
@@ -102,7 +117,10 @@ async def get_survey(survey_id: str, db: Session = Depends(get_db)):
             "description": db_survey.description,
             "ends_at": str(db_survey.ends_at),
             "is_active": db_survey.is_active,
-            "target_groups": db_survey.target_groups,
+            "target_groups": [
+                format_group(group, with_member_count=True)
+                for group in db_survey.target_groups
+            ],
             "created_at": str(db_survey.created_at),
             "questions": db_survey.questions,
             "survey_status": {},
@@ -125,11 +143,9 @@ async def get_survey(survey_id: str, db: Session = Depends(get_db)):
             question["average"] = 3.8
             question["delta"] = +0.5
 
-        response_users = set()
-        for target_group in formatted_survey["target_groups"]:
-            for user in target_group.users:
-                response_users.add(user.employee_id)
-        formatted_survey["survey_status"]["total_responses"] = len(response_users)
+        formatted_survey["survey_status"]["total_responses"] = await db.scalar(
+            survey_member_count_query(survey_id)
+        )
         formatted_survey["survey_status"]["responses_filled"] = 1
 
         return format_response(data=formatted_survey)
@@ -143,7 +159,7 @@ async def get_survey(survey_id: str, db: Session = Depends(get_db)):
 
 
 @router.post("")
-async def create_survey(survey: SurveyCreate, db: Session = Depends(get_db)):
+async def create_survey(survey: SurveyCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new survey in the database.
     """
@@ -155,10 +171,8 @@ async def create_survey(survey: SurveyCreate, db: Session = Depends(get_db)):
             questions=survey.questions,
         )
         for group_id in survey.target_groups:
-            group = (
-                db.query(FocusGroup)
-                .filter(FocusGroup.focus_group_id == group_id)
-                .first()
+            group = await db.scalar(
+                select(FocusGroup).where(FocusGroup.focus_group_id == group_id)
             )
             if not group:
                 raise HTTPException(
@@ -168,8 +182,9 @@ async def create_survey(survey: SurveyCreate, db: Session = Depends(get_db)):
             new_survey.target_groups.append(group)
 
         db.add(new_survey)
-        db.commit()
-        db.refresh(new_survey)
+        await db.commit()
+        await db.refresh(new_survey)
+        await invalidate(SURVEYS_TAG)
         return format_response(data=new_survey)
     except HTTPException as e:
         raise e
@@ -182,13 +197,17 @@ async def create_survey(survey: SurveyCreate, db: Session = Depends(get_db)):
 
 @router.put("/{survey_id}")
 async def update_survey(
-    survey_id: str, survey: SurveyData, db: Session = Depends(get_db)
+    survey_id: str, survey: SurveyData, db: AsyncSession = Depends(get_async_db)
 ):
     """
     Update an existing survey in the database.
     """
     try:
-        db_survey = db.query(Survey).filter(Survey.survey_id == survey_id).first()
+        db_survey = await db.scalar(
+            select(Survey)
+            .where(Survey.survey_id == survey_id)
+            .options(selectinload(Survey.target_groups))
+        )
         if not db_survey:
             raise HTTPException(status_code=404, detail="Survey not found.")
 
@@ -198,10 +217,8 @@ async def update_survey(
 
         db_survey.target_groups.clear()
         for group_id in survey.target_groups:
-            group = (
-                db.query(FocusGroup)
-                .filter(FocusGroup.focus_group_id == group_id)
-                .first()
+            group = await db.scalar(
+                select(FocusGroup).where(FocusGroup.focus_group_id == group_id)
             )
             if not group:
                 raise HTTPException(
@@ -210,8 +227,9 @@ async def update_survey(
                 )
             db_survey.target_groups.append(group)
 
-        db.commit()
-        db.refresh(db_survey)
+        await db.commit()
+        await db.refresh(db_survey)
+        await invalidate(SURVEYS_TAG, survey_tag(survey_id))
         return format_response(data=db_survey)
     except HTTPException as e:
         raise e
@@ -223,17 +241,18 @@ async def update_survey(
 
 
 @router.delete("/{survey_id}")
-async def delete_survey(survey_id: str, db: Session = Depends(get_db)):
+async def delete_survey(survey_id: str, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a survey from the database.
     """
     try:
-        db_survey = db.query(Survey).filter(Survey.survey_id == survey_id).first()
+        db_survey = await db.scalar(select(Survey).where(Survey.survey_id == survey_id))
         if not db_survey:
             raise HTTPException(status_code=404, detail="Survey not found.")
 
-        db.delete(db_survey)
-        db.commit()
+        await db.delete(db_survey)
+        await db.commit()
+        await invalidate(SURVEYS_TAG, survey_tag(survey_id))
         return JSONResponse(
             content={"message": "Survey Deleted successfully."},
             status_code=status.HTTP_204_NO_CONTENT,
@@ -1,9 +1,99 @@
 # Configuration settings for the Conversational Bot application
+import os
 
 
 class Settings:
     APP_NAME: str = "Conversational Bot for Employee Engagement"
     DEBUG: bool = True
+    # Seconds between full rescoring runs of the targeting engine
+    TARGETING_REFRESH_SECONDS: int = int(
+        os.getenv("TARGETING_REFRESH_SECONDS", 60 * 60)
+    )
+    # Employees whose knowledge graph results are kept in process
+    GRAPH_CACHE_SIZE: int = int(os.getenv("GRAPH_CACHE_SIZE", 512))
+    # Seconds knowledge graph results live in the shared Redis tier
+    GRAPH_CACHE_TTL: int = int(os.getenv("GRAPH_CACHE_TTL", 24 * 60 * 60))
+    # Seconds between checks for changed chat dataset files
+    SNAPSHOT_REFRESH_SECONDS: int = int(os.getenv("SNAPSHOT_REFRESH_SECONDS", 5 * 60))
+    # Database connection pool (shared by the sync and async engines)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 10))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 20))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 30 * 60))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Behind pgbouncer (transaction pooling): no local pool, no statement cache
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    # Checkouts held longer than this are reported as suspected leaks
+    DB_POOL_LEAK_SECONDS: float = float(os.getenv("DB_POOL_LEAK_SECONDS", 60))
+    # Seconds a client's reads stay on the primary after it writes, so it
+    # reads its own writes while the replica catches up
+    DB_READ_YOUR_WRITES_SECONDS: int = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", 5))
+    # Seconds between checks that upcoming monthly partitions exist
+    PARTITION_MAINTENANCE_SECONDS: int = int(
+        os.getenv("PARTITION_MAINTENANCE_SECONDS", 24 * 60 * 60)
+    )
+    # Seconds between refreshes of the admin dashboard's materialized views
+    ADMIN_VIEWS_REFRESH_SECONDS: int = int(
+        os.getenv("ADMIN_VIEWS_REFRESH_SECONDS", 15 * 60)
+    )
+    # Rows validated and loaded per transaction by the bulk ingest endpoints
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", 5000))
+    # Seconds between the leader's checks for ingests awaiting the targeting
+    # rescore and admin view refresh
+    INGEST_REFRESH_POLL_SECONDS: int = int(os.getenv("INGEST_REFRESH_POLL_SECONDS", 30))
+    # Row errors listed per batch in an ingest report (all are counted)
+    INGEST_MAX_ERRORS: int = int(os.getenv("INGEST_MAX_ERRORS", 50))
+    # Redis server, or "memory" for the in-process stand-in (tests, local runs)
+    REDIS_BACKEND: str = os.getenv("REDIS_BACKEND", "redis")
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = int(os.getenv("REDIS_PORT", 6379))
+    REDIS_DB: int = int(os.getenv("REDIS_DB", 0))
+    REDIS_PASSWORD: str = os.getenv("REDIS_PASSWORD")
+    # Connections per client, and seconds to wait for one when all are busy
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT: float = float(os.getenv("REDIS_POOL_TIMEOUT", 1))
+    # Seconds before a Redis command or connection attempt gives up
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))
+    # Retries (with exponential backoff) of commands hit by connection errors
+    REDIS_RETRIES: int = int(os.getenv("REDIS_RETRIES", 2))
+    # Idle seconds after which a pooled connection is pinged before reuse
+    REDIS_HEALTH_CHECK_SECONDS: int = int(os.getenv("REDIS_HEALTH_CHECK_SECONDS", 30))
+    # Seconds the caches bypass Redis (serving from the database) after a
+    # Redis failure before trying it again
+    CACHE_DEGRADE_SECONDS: int = int(os.getenv("CACHE_DEGRADE_SECONDS", 30))
+    # Seconds API responses stay in the Redis cache; writes invalidate them
+    # by tag (see app/utils/cache.py), so this only bounds memory
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", 3 * 24 * 60 * 60))
+    # Seconds an expired entry is still served while one request refreshes it
+    CACHE_STALE_SECONDS: int = int(os.getenv("CACHE_STALE_SECONDS", 5 * 60))
+    # Seconds a request may hold the lock to recompute a cache entry
+    CACHE_LOCK_SECONDS: int = int(os.getenv("CACHE_LOCK_SECONDS", 30))
+    # Entries each worker keeps in its in-process tier in front of Redis, and
+    # for how many seconds at most (bounds staleness if an invalidation
+    # message is missed)
+    CACHE_LOCAL_SIZE: int = int(os.getenv("CACHE_LOCAL_SIZE", 1024))
+    CACHE_LOCAL_TTL: int = int(os.getenv("CACHE_LOCAL_TTL", 30))
+    # Cached response bodies of at least this many bytes are zstd-compressed
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+    # Cache warming: seconds between scheduled runs (one also runs at
+    # startup and after each ingest), jobs run at once, employees warmed
+    # (the most recently active within CACHE_WARM_ACTIVE_DAYS) and
+    # dashboards loaded per query
+    CACHE_WARM_SECONDS: int = int(os.getenv("CACHE_WARM_SECONDS", 60 * 60))
+    CACHE_WARM_CONCURRENCY: int = int(os.getenv("CACHE_WARM_CONCURRENCY", 8))
+    CACHE_WARM_EMPLOYEES: int = int(os.getenv("CACHE_WARM_EMPLOYEES", 500))
+    CACHE_WARM_ACTIVE_DAYS: int = int(os.getenv("CACHE_WARM_ACTIVE_DAYS", 7))
+    CACHE_WARM_BATCH_SIZE: int = int(os.getenv("CACHE_WARM_BATCH_SIZE", 100))
+    # Responses from this size up are compressed (zstd or gzip, as accepted)
+    RESPONSE_COMPRESS_MIN_BYTES: int = int(
+        os.getenv("RESPONSE_COMPRESS_MIN_BYTES", 1024)
+    )
+    # Rows fetched per server-side cursor batch by the export endpoints
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+    # Rows per page of the paginated list endpoints, by default and at most
+    PAGE_SIZE_DEFAULT: int = int(os.getenv("PAGE_SIZE_DEFAULT", 50))
+    PAGE_SIZE_MAX: int = int(os.getenv("PAGE_SIZE_MAX", 200))
     # Add additional configuration variables as needed
 
 
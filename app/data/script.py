@@ -1,13 +1,27 @@
+"""
+Load the dataset CSVs in this directory into the database. Run it from the
+repository root, after the migrations:
+
+    python -m app.data.script
+"""
+
+import asyncio
+import os
+
 import pandas as pd
-from sqlalchemy import create_engine
 from dotenv import load_dotenv
-import os
 from tqdm import tqdm
 
+from app.ml.features import rebuild_employee_features
+from app.ml.targeting import refresh_all_targeting
+from app.models.admin_views import refresh_admin_views
+from app.utils.bulk_load import TARGETS, ingest
+from app.utils.cache import GROUPS_TAG, employee_tag, invalidate_sync
+from app.utils.db import async_engine, engine
+
 load_dotenv()
 
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
 TABLES_AND_FILES = {
     "user":"user.csv",
     "activity_tracker_dataset":"activity_tracker_dataset_cleaned.csv",
@@ -17,16 +31,43 @@ TABLES_AND_FILES = {
     "rewards_dataset":"rewards_dataset.csv",
     "vibemeter_dataset": "vibemeter_dataset.csv",
 }
+# Daily tables go through the ingest upsert, so files that repeat an
+# (employee, day) replace it instead of failing on the unique index
+BULK_DATASETS = {target.table: dataset for dataset, target in TARGETS.items()}
+READ_CHUNK_BYTES = 1 << 20
+
+
+async def file_chunks(path):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK_BYTES):
+            yield chunk
+
+
+async def load_daily_tables():
+    try:
+        for table_name, dataset in BULK_DATASETS.items():
+            file_path = TABLES_AND_FILES[table_name]
+            print(f"Upserting table: {table_name} from file: {file_path}")
+            report = await ingest(
+                dataset, file_chunks(os.path.join(DATA_DIR, file_path)), "csv"
+            )
+            print(f"{table_name}: {report['totals']}")
+            for batch in report["batches"]:
+                for error in batch["errors"]:
+                    print(f"  line {error['line']}: {error['error']}")
+    finally:
+        await async_engine.dispose()
+
 
 def populate_database():
-    # Create a database connection
     try:
-        engine = create_engine(DATABASE_URL)
         with engine.connect() as conn:
             for table_name, file_path in TABLES_AND_FILES.items():
+                if table_name in BULK_DATASETS:
+                    continue
                 print(f"Processing table: {table_name} with file: {file_path}")
                 # Read the CSV file into a DataFrame
-                df = pd.read_csv(file_path)
+                df = pd.read_csv(os.path.join(DATA_DIR, file_path))
 
                 # Convert column names to lowercase
                 df.columns = map(str.lower, df.columns)
@@ -36,9 +77,20 @@ def populate_database():
                     chunk = df.iloc[i:i+1000]
                     chunk.to_sql(table_name, con=conn, if_exists='append', index=False)
 
-            print("All data successfully inserted into the database.")
+        # After the users, which the daily rows reference; ingest creates the
+        # partitions the rows need
+        asyncio.run(load_daily_tables())
+        print("All data successfully inserted into the database.")
+
+        # to_sql bypasses the session hooks that keep the derived tables and
+        # the response cache up to date, so refresh them all here
+        rebuild_employee_features(engine)
+        refresh_all_targeting(engine)
+        refresh_admin_views(engine)
+        employee_ids = pd.read_csv(os.path.join(DATA_DIR, TABLES_AND_FILES["user"]))
+        invalidate_sync(GROUPS_TAG, *map(employee_tag, employee_ids["Employee_ID"]))
     except Exception as e:
         print(f"An error occurred: {e}")
 
 if __name__ == "__main__":
-    populate_database()
\ No newline at end of file
+    populate_database()
@@ -1,6 +1,10 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.cache_warmer import warm_cache
 from app.api.endpoints import (
     actions,
     admin_dashboard,
@@ -8,8 +12,11 @@ from app.api.endpoints import (
     auth,
     chat,
     employee,
+    export,
     focus_group,
+    ingest,
     meetings,
+    metrics,
     questions,
     report,
     schedule,
@@ -18,9 +25,83 @@ from app.api.endpoints import (
     ws,
 )
 from app.api.endpoints.employeeDashboard import dashboard, profile, vibemeter
-from app.utils.db import Base, engine
+from app.config import settings
+from app.ml import features  # noqa: F401  (keeps employee_features in sync on writes)
+from app.ml.snapshots import snapshot_manager
+from app.ml.targeting import refresh_all_targeting
+from app.models.admin_views import refresh_admin_views
+from app.models.partitions import ensure_partitions
+from app.utils.cache import listen_for_invalidations
+from app.utils.compression import CompressionMiddleware
+from app.utils.db import async_replica_engine, engine
+from app.utils.db_routing import route_reads
+from app.utils.helpers import OrjsonResponse
+from app.utils.scheduler import leader_lock, schedule_job
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background jobs. Those that write shared tables or the shared cache are
+    # leader_only: a single worker of the deployment runs them
+    jobs = [
+        schedule_job(
+            settings.TARGETING_REFRESH_SECONDS,
+            refresh_all_targeting,
+            engine,
+            leader_only=True,
+        ),
+        # Keeps the next months' dataset partitions created ahead of time
+        schedule_job(
+            settings.PARTITION_MAINTENANCE_SECONDS,
+            ensure_partitions,
+            engine,
+            run_immediately=True,
+            leader_only=True,
+        ),
+        schedule_job(
+            settings.ADMIN_VIEWS_REFRESH_SECONDS,
+            refresh_admin_views,
+            engine,
+            leader_only=True,
+        ),
+        # Rescoring and view refresh requested by the ingest endpoints of
+        # any worker
+        schedule_job(
+            settings.INGEST_REFRESH_POLL_SECONDS,
+            ingest.refresh_ingested,
+            leader_only=True,
+        ),
+        # Builds the first chat snapshot, then swaps in changed datasets; the
+        # snapshot lives in this worker's memory, so every worker runs it
+        schedule_job(
+            settings.SNAPSHOT_REFRESH_SECONDS,
+            snapshot_manager.rebuild,
+            False,
+            run_immediately=True,
+        ),
+        # Keeps this worker's in-process cache tier coherent with the others
+        asyncio.create_task(listen_for_invalidations()),
+        # Fills the hot cache keys now and again after they expire
+        schedule_job(
+            settings.CACHE_WARM_SECONDS,
+            warm_cache,
+            "schedule",
+            run_immediately=True,
+            leader_only=True,
+        ),
+    ]
+    yield
+    for job in jobs:
+        job.cancel()
+    # Lets another worker take the shared jobs over right away
+    await asyncio.to_thread(leader_lock.release)
+
 
-app = FastAPI(title="Conversational Bot for Employee Engagement")
+app = FastAPI(
+    title="Conversational Bot for Employee Engagement",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse,
+)
 
 # allow all origins for now
 app.add_middleware(
@@ -31,6 +112,11 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+app.add_middleware(CompressionMiddleware)
+
+if async_replica_engine is not None:
+    app.middleware("http")(route_reads)
+
 # Include REST API routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Auth"])
 app.include_router(actions.router, prefix="/api/actions", tags=["Action"])
@@ -40,7 +126,9 @@ app.include_router(
 )
 app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 app.include_router(employee.router, prefix="/api/employee", tags=["Employee"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
 app.include_router(focus_group.router, prefix="/api/groups", tags=["FocusGroup"])
+app.include_router(ingest.router, prefix="/api/ingest", tags=["Ingest"])
 app.include_router(meetings.router, prefix="/api/meetings", tags=["Meetings"])
 app.include_router(profile.router, prefix="/api/profile", tags=["Profile"])
 app.include_router(questions.router, prefix="/api/question", tags=["Question"])
@@ -51,9 +139,7 @@ app.include_router(survey.router, prefix="/api/survey", tags=["Survey"])
 app.include_router(vibemeter.router, prefix="/api/vibemeter", tags=["Vibemeter"])
 app.include_router(ws.router, prefix="/api/ws", tags=["WebSocket"])
 app.include_router(admin_dashboard.router, prefix="/api/admin", tags=["AdminMetrics"])
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+# Versioned schema migrations.
+#
+# Every module in app/migrations/versions named vNNNN_<description>.py is one
+# migration with an upgrade(connection) function. Applied versions are
+# recorded in the schema_migrations table; pending ones run in version order.
+# Migrations run in a transaction unless the module sets TRANSACTIONAL = False
+# (needed for CREATE INDEX CONCURRENTLY).
+
+import importlib
+import pkgutil
+
+from sqlalchemy import (
+    TIMESTAMP,
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    select,
+    text,
+)
+
+from app.migrations import versions
+
+# Arbitrary key for pg_advisory_lock so concurrent deploys migrate only once
+MIGRATION_LOCK_ID = 7_351_902
+
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", TIMESTAMP, nullable=False, server_default=func.now()),
+)
+
+
+def discover_migrations():
+    """Return [(version, name, module)] for every migration, oldest first."""
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        prefix, _, name = module_info.name.partition("_")
+        if not (prefix.startswith("v") and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append((int(prefix[1:]), name, module))
+    return sorted(migrations, key=lambda migration: migration[0])
+
+
+def applied_versions(connection):
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(engine):
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+        applied = applied_versions(connection)
+    return [m for m in discover_migrations() if m[0] not in applied]
+
+
+def run_migrations(engine):
+    """Apply every pending migration; returns the versions that were applied."""
+    applied_now = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            for version, name, module in pending_migrations(engine):
+                print(f"Applying migration {version:04d} {name}...")
+                if getattr(module, "TRANSACTIONAL", True):
+                    with engine.begin() as connection:
+                        module.upgrade(connection)
+                        _record(connection, version, name)
+                else:
+                    module.upgrade(lock)
+                    with engine.begin() as connection:
+                        _record(connection, version, name)
+                applied_now.append(version)
+        finally:
+            lock.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+    return applied_now
+
+
+def _record(connection, version, name):
+    connection.execute(schema_migrations.insert().values(version=version, name=name))
+
+
+def migration_status(engine):
+    """[(version, name, applied)] for every known migration."""
+    with engine.begin() as connection:
+        metadata.create_all(connection)
+        applied = applied_versions(connection)
+    return [(v, name, v in applied) for v, name, _ in discover_migrations()]
@@ -0,0 +1,12 @@
+import sys
+
+from app.migrations import migration_status, run_migrations
+from app.utils.db import engine
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["status"]:
+        for version, name, applied in migration_status(engine):
+            print(f"{version:04d} {name}: {'applied' if applied else 'pending'}")
+    else:
+        applied = run_migrations(engine)
+        print(f"✅ Applied {len(applied)} migration(s)")
@@ -0,0 +1,312 @@
+"""
+The schema as it stood before migrations were introduced: the tables (and
+their column indexes) that the models' import-time create_all used to make.
+It is frozen here rather than taken from the live models, so fresh databases
+reach the current schema through the same migrations as existing ones;
+IF NOT EXISTS makes it a no-op on databases that predate the migrations.
+"""
+
+from sqlalchemy import text
+
+# In foreign key order
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS actions (
+        action_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        purpose VARCHAR NOT NULL,
+        metric VARCHAR[] NOT NULL,
+        steps JSON[] NOT NULL,
+        is_completed BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (action_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_actions_action_id ON actions (action_id)",
+    """
+    CREATE TABLE IF NOT EXISTS focus_groups (
+        focus_group_id VARCHAR NOT NULL,
+        name VARCHAR NOT NULL,
+        description VARCHAR,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        metrics VARCHAR[],
+        PRIMARY KEY (focus_group_id)
+    )
+    """,
+    (
+        "CREATE INDEX IF NOT EXISTS ix_focus_groups_focus_group_id "
+        "ON focus_groups (focus_group_id)"
+    ),
+    """
+    CREATE TABLE IF NOT EXISTS questions (
+        question_id VARCHAR NOT NULL,
+        text VARCHAR NOT NULL,
+        tags VARCHAR[],
+        severity VARCHAR NOT NULL,
+        PRIMARY KEY (question_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_questions_question_id ON questions (question_id)",
+    """
+    CREATE TABLE IF NOT EXISTS survey (
+        survey_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        description VARCHAR NOT NULL,
+        is_active BOOLEAN,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        ends_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        questions JSON[] NOT NULL,
+        PRIMARY KEY (survey_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_survey_survey_id ON survey (survey_id)",
+    """
+    CREATE TABLE IF NOT EXISTS "user" (
+        employee_id VARCHAR NOT NULL,
+        email VARCHAR NOT NULL,
+        password VARCHAR NOT NULL,
+        is_verified BOOLEAN,
+        profile_picture VARCHAR,
+        escalated BOOLEAN,
+        meet_scheduled BOOLEAN,
+        employee_name VARCHAR,
+        PRIMARY KEY (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_tracker_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        date DATE NOT NULL,
+        teams_messages_sent INTEGER NOT NULL,
+        emails_sent INTEGER NOT NULL,
+        meetings_attended INTEGER NOT NULL,
+        work_hours FLOAT NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS employee_features (
+        employee_id VARCHAR NOT NULL,
+        activity_days INTEGER NOT NULL,
+        avg_work_hours FLOAT,
+        max_work_hours FLOAT,
+        recent_avg_work_hours FLOAT,
+        recent_avg_messages FLOAT,
+        recent_avg_emails FLOAT,
+        recent_avg_meetings FLOAT,
+        last_activity_date DATE,
+        leave_count INTEGER NOT NULL,
+        leave_days_total INTEGER NOT NULL,
+        leave_types JSON,
+        leave_days_by_type JSON,
+        performance_review_period VARCHAR,
+        performance_rating INTEGER,
+        manager_feedback VARCHAR,
+        promotion_consideration BOOLEAN,
+        reward_count INTEGER NOT NULL,
+        reward_points INTEGER NOT NULL,
+        reward_types JSON,
+        vibe_count INTEGER NOT NULL,
+        vibe_mean FLOAT,
+        vibe_min INTEGER,
+        vibe_max INTEGER,
+        vibe_std FLOAT,
+        vibe_low_count INTEGER NOT NULL,
+        recent_vibe_scores INTEGER[],
+        last_vibe_date DATE,
+        joining_date DATE,
+        onboarding_feedback VARCHAR,
+        mentor_assigned BOOLEAN,
+        initial_training_completed BOOLEAN,
+        updated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (employee_id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS employee_reports (
+        report_id VARCHAR NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        report_content JSON NOT NULL,
+        generated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (report_id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    (
+        "CREATE INDEX IF NOT EXISTS ix_employee_reports_report_id "
+        "ON employee_reports (report_id)"
+    ),
+    """
+    CREATE TABLE IF NOT EXISTS employee_targeting (
+        employee_id VARCHAR NOT NULL,
+        risk_score INTEGER NOT NULL,
+        should_target BOOLEAN NOT NULL,
+        primary_concern VARCHAR NOT NULL,
+        outreach_category VARCHAR NOT NULL,
+        issue_count INTEGER NOT NULL,
+        issues VARCHAR NOT NULL,
+        avg_vibe_score FLOAT,
+        recent_vibe_trend FLOAT,
+        low_mood_flag BOOLEAN NOT NULL,
+        negative_trend_flag BOOLEAN NOT NULL,
+        avg_work_hours FLOAT,
+        max_work_hours FLOAT,
+        overworked_flag BOOLEAN NOT NULL,
+        total_leave_days FLOAT,
+        insufficient_leave_flag BOOLEAN NOT NULL,
+        performance_rating FLOAT,
+        has_improvement_feedback BOOLEAN,
+        performance_concern_flag BOOLEAN NOT NULL,
+        reward_points FLOAT,
+        award_count FLOAT,
+        recognition_concern_flag BOOLEAN NOT NULL,
+        joining_date DATE,
+        mentor_assigned BOOLEAN,
+        initial_training_completed BOOLEAN,
+        onboarding_concern_flag BOOLEAN NOT NULL,
+        computed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        PRIMARY KEY (employee_id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS group_action_association (
+        focus_group_id VARCHAR NOT NULL,
+        action_id VARCHAR NOT NULL,
+        PRIMARY KEY (focus_group_id, action_id),
+        FOREIGN KEY(focus_group_id) REFERENCES focus_groups (focus_group_id),
+        FOREIGN KEY(action_id) REFERENCES actions (action_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS group_survey_association (
+        focus_group_id VARCHAR NOT NULL,
+        survey_id VARCHAR NOT NULL,
+        PRIMARY KEY (focus_group_id, survey_id),
+        FOREIGN KEY(focus_group_id) REFERENCES focus_groups (focus_group_id),
+        FOREIGN KEY(survey_id) REFERENCES survey (survey_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS leave_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        leave_type VARCHAR NOT NULL,
+        leave_days INTEGER NOT NULL,
+        leave_start_date DATE NOT NULL,
+        leave_end_date DATE NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meeting (
+        meeting_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        date DATE NOT NULL,
+        time TIME WITHOUT TIME ZONE NOT NULL,
+        duration INTEGER NOT NULL,
+        meeting_type VARCHAR NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE,
+        created_by_id VARCHAR NOT NULL,
+        PRIMARY KEY (meeting_id),
+        FOREIGN KEY(created_by_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_meeting_meeting_id ON meeting (meeting_id)",
+    """
+    CREATE TABLE IF NOT EXISTS onboarding_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        joining_date DATE NOT NULL,
+        onboarding_feedback VARCHAR NOT NULL,
+        mentor_assigned BOOLEAN NOT NULL,
+        initial_training_completed BOOLEAN NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS performance_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        review_period VARCHAR NOT NULL,
+        performance_rating INTEGER NOT NULL,
+        manager_feedback VARCHAR NOT NULL,
+        promotion_consideration BOOLEAN NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rewards_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        award_type VARCHAR NOT NULL,
+        award_date DATE NOT NULL,
+        reward_points INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS survey_response (
+        survey_response_id INTEGER NOT NULL,
+        survey_id VARCHAR NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        responses JSON[] NOT NULL,
+        PRIMARY KEY (survey_response_id),
+        FOREIGN KEY(survey_id) REFERENCES survey (survey_id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS task (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        title VARCHAR NOT NULL,
+        description VARCHAR,
+        due_date DATE,
+        is_completed BOOLEAN,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_group_association (
+        employee_id VARCHAR NOT NULL,
+        focus_group_id VARCHAR NOT NULL,
+        PRIMARY KEY (employee_id, focus_group_id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id),
+        FOREIGN KEY(focus_group_id) REFERENCES focus_groups (focus_group_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS vibemeter_dataset (
+        id SERIAL NOT NULL,
+        employee_id VARCHAR NOT NULL,
+        response_date DATE NOT NULL,
+        vibe_score INTEGER NOT NULL,
+        emotion_zone VARCHAR NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(employee_id) REFERENCES "user" (employee_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS meeting_members (
+        meeting_id VARCHAR NOT NULL,
+        user_id VARCHAR NOT NULL,
+        PRIMARY KEY (meeting_id, user_id),
+        FOREIGN KEY(meeting_id) REFERENCES meeting (meeting_id),
+        FOREIGN KEY(user_id) REFERENCES "user" (employee_id)
+    )
+    """,
+]
+
+
+def upgrade(connection):
+    for statement in STATEMENTS:
+        connection.execute(text(statement))
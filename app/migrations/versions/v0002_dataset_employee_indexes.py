@@ -0,0 +1,51 @@
+"""
+Composite (employee_id, <date>) indexes for the per-employee dashboard and
+feature queries. Built CONCURRENTLY so ingestion keeps writing meanwhile.
+"""
+
+from sqlalchemy import text
+
+from app.models.partitions import INDEX_VALID
+
+TRANSACTIONAL = False
+
+INDEXES = {
+    "ix_activity_tracker_dataset_employee_id_date": (
+        "activity_tracker_dataset",
+        "employee_id, date",
+    ),
+    "ix_leave_dataset_employee_id_leave_start_date": (
+        "leave_dataset",
+        "employee_id, leave_start_date",
+    ),
+    "ix_onboarding_dataset_employee_id": ("onboarding_dataset", "employee_id"),
+    "ix_performance_dataset_employee_id_review_period": (
+        "performance_dataset",
+        "employee_id, review_period",
+    ),
+    "ix_rewards_dataset_employee_id_award_date": (
+        "rewards_dataset",
+        "employee_id, award_date",
+    ),
+    "ix_vibemeter_dataset_employee_id_response_date": (
+        "vibemeter_dataset",
+        "employee_id, response_date",
+    ),
+    "ix_task_employee_id_due_date": ("task", "employee_id, due_date"),
+}
+
+
+def upgrade(connection):
+    for name, (table, columns) in INDEXES.items():
+        valid = connection.execute(INDEX_VALID, {"name": name}).scalar()
+        if valid:
+            # Already built by an earlier, interrupted run
+            continue
+        if valid is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+        connection.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+            )
+        )
+        connection.execute(text(f"ANALYZE {table}"))
@@ -0,0 +1,123 @@
+"""
+Partition activity_tracker_dataset and vibemeter_dataset by month.
+
+The baseline's plain tables are swapped for partitioned tables of the same
+name in one short transaction; their rows are then moved over in batches,
+newest first, each batch in its own transaction so writes are never blocked
+for long. Rows keep their ids and id sequence. Until the move finishes,
+reads see the rows moved so far, which covers the recent days first. An
+interrupted run resumes moving from where it stopped.
+"""
+
+from sqlalchemy import text
+
+from app.migrations.versions.v0002_dataset_employee_indexes import INDEXES
+from app.models.partitions import (
+    PARTITIONED_TABLES,
+    create_missing_partitions,
+    create_partitioned_index,
+)
+
+TRANSACTIONAL = False
+
+# Rows moved from the plain table to the partitioned one per transaction
+MOVE_BATCH_SIZE = 10_000
+
+COLUMNS = {
+    "activity_tracker_dataset": [
+        ("employee_id", 'varchar NOT NULL REFERENCES "user" (employee_id)'),
+        ("date", "date NOT NULL"),
+        ("teams_messages_sent", "integer NOT NULL"),
+        ("emails_sent", "integer NOT NULL"),
+        ("meetings_attended", "integer NOT NULL"),
+        ("work_hours", "double precision NOT NULL"),
+    ],
+    "vibemeter_dataset": [
+        ("employee_id", 'varchar NOT NULL REFERENCES "user" (employee_id)'),
+        ("response_date", "date NOT NULL"),
+        ("vibe_score", "integer NOT NULL"),
+        ("emotion_zone", "varchar NOT NULL"),
+    ],
+}
+
+IS_PARTITIONED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+    "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table)"
+)
+
+
+TABLE_EXISTS = text("SELECT to_regclass(:table) IS NOT NULL")
+
+
+def unpartitioned_name(table):
+    return f"{table}_unpartitioned"
+
+
+def employee_index(table):
+    return next(name for name, (t, _) in INDEXES.items() if t == table)
+
+
+def swap_tables(engine, table, key):
+    """Rename the plain table away and create the partitioned one in its place."""
+    old = unpartitioned_name(table)
+    definitions = ", ".join(f"{name} {ddl}" for name, ddl in COLUMNS[table])
+
+    with engine.begin() as connection:
+        # Free the names the partitioned table will use
+        connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+        connection.execute(
+            text(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey")
+        )
+        connection.execute(text(f"DROP INDEX IF EXISTS {employee_index(table)}"))
+
+        connection.execute(
+            text(
+                f"CREATE TABLE {table} ("
+                f"id integer NOT NULL DEFAULT nextval('{table}_id_seq'), "
+                f"{definitions}, PRIMARY KEY (id, {key})) "
+                f"PARTITION BY RANGE ({key})"
+            )
+        )
+        connection.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+
+        first, last = connection.execute(
+            text(f"SELECT min({key}), max({key}) FROM {old}")
+        ).one()
+        create_missing_partitions(connection, first, last, tables=[table])
+
+
+def move_rows(connection, table):
+    """Move the plain table's rows over, one autocommitted batch at a time."""
+    old = unpartitioned_name(table)
+    columns = ", ".join(["id"] + [name for name, _ in COLUMNS[table]])
+    moved = 0
+    while True:
+        batch = connection.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {old} WHERE id IN "
+                f"(SELECT id FROM {old} ORDER BY id DESC LIMIT :limit) "
+                f"RETURNING {columns}) "
+                f"INSERT INTO {table} ({columns}) SELECT {columns} FROM moved"
+            ),
+            {"limit": MOVE_BATCH_SIZE},
+        ).rowcount
+        if not batch:
+            break
+        moved += batch
+        print(f"Moved {moved} rows into the partitioned {table}")
+    connection.execute(text(f"DROP TABLE {old}"))
+
+
+def upgrade(connection):
+    for table, key in PARTITIONED_TABLES.items():
+        if not connection.execute(IS_PARTITIONED, {"table": table}).scalar():
+            swap_tables(connection.engine, table, key)
+        if connection.execute(
+            TABLE_EXISTS, {"table": unpartitioned_name(table)}
+        ).scalar():
+            move_rows(connection, table)
+        index = employee_index(table)
+        create_partitioned_index(connection, index, table, INDEXES[index][1])
+        connection.execute(text(f"ANALYZE {table}"))
+    with connection.engine.begin() as transaction:
+        create_missing_partitions(transaction)
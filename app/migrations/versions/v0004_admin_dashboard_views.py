@@ -0,0 +1,71 @@
+"""
+Materialized aggregates behind the admin dashboard. Each view has a unique
+index so it can be refreshed CONCURRENTLY without blocking readers.
+"""
+
+from sqlalchemy import text
+
+VIEWS = {
+    # Organisation-wide vibe per month with the month-over-month change
+    "admin_vibe_monthly": (
+        """
+        SELECT month, responses, employees, avg_score, satisfied_pct,
+               round((avg_score - lag(avg_score) OVER w)
+                     / nullif(lag(avg_score) OVER w, 0) * 100, 2) AS avg_change_pct,
+               satisfied_pct - lag(satisfied_pct) OVER w AS satisfied_change
+        FROM (
+            SELECT date_trunc('month', response_date)::date AS month,
+                   count(*) AS responses,
+                   count(DISTINCT employee_id) AS employees,
+                   round(avg(vibe_score), 3) AS avg_score,
+                   round(avg((vibe_score >= 4)::int) * 100, 2) AS satisfied_pct
+            FROM vibemeter_dataset
+            GROUP BY 1
+        ) monthly
+        WINDOW w AS (ORDER BY month)
+        """,
+        "month",
+    ),
+    # Members of each focus group flagged by the targeting engine
+    "admin_focus_group_risk": (
+        """
+        SELECT g.focus_group_id, g.name,
+               count(m.employee_id) AS members,
+               count(*) FILTER (WHERE t.should_target) AS targeted,
+               round(avg(t.risk_score), 2) AS avg_risk_score
+        FROM focus_groups g
+        LEFT JOIN user_group_association m ON m.focus_group_id = g.focus_group_id
+        LEFT JOIN employee_targeting t ON t.employee_id = m.employee_id
+        GROUP BY g.focus_group_id, g.name
+        """,
+        "focus_group_id",
+    ),
+    # How many employees each targeting flag is raised for
+    "admin_concern_frequency": (
+        """
+        SELECT c.concern, count(*) FILTER (WHERE c.flagged) AS employees
+        FROM employee_targeting t
+        CROSS JOIN LATERAL (VALUES
+            ('Low Mood', t.low_mood_flag),
+            ('Declining Vibe', t.negative_trend_flag),
+            ('Overwork', t.overworked_flag),
+            ('Insufficient Leave', t.insufficient_leave_flag),
+            ('Performance', t.performance_concern_flag),
+            ('Recognition', t.recognition_concern_flag),
+            ('Onboarding', t.onboarding_concern_flag)
+        ) AS c (concern, flagged)
+        GROUP BY c.concern
+        """,
+        "concern",
+    ),
+}
+
+
+def upgrade(connection):
+    for name, (query, key) in VIEWS.items():
+        connection.execute(
+            text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {name} AS {query}")
+        )
+        connection.execute(
+            text(f"CREATE UNIQUE INDEX IF NOT EXISTS {name}_{key} ON {name} ({key})")
+        )
@@ -0,0 +1,57 @@
+"""
+One activity row and one vibe response per employee per day. Duplicates are
+removed (keeping the first row) and the (employee_id, <date>) indexes are
+rebuilt as unique, which lets bulk ingestion upsert with ON CONFLICT.
+
+The unique index is built concurrently, partition by partition, under a
+temporary name while the plain index keeps serving queries; the two are
+swapped in one short transaction at the end.
+"""
+
+from sqlalchemy import text
+
+from app.models.partitions import create_partitioned_index
+
+TRANSACTIONAL = False
+
+# index -> (table, date column)
+UNIQUE_INDEXES = {
+    "ix_activity_tracker_dataset_employee_id_date": (
+        "activity_tracker_dataset",
+        "date",
+    ),
+    "ix_vibemeter_dataset_employee_id_response_date": (
+        "vibemeter_dataset",
+        "response_date",
+    ),
+}
+
+# NULL when the index is missing
+INDEX_UNIQUE = text(
+    "SELECT i.indisunique FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE c.relname = :name"
+)
+
+
+def upgrade(connection):
+    for name, (table, key) in UNIQUE_INDEXES.items():
+        if connection.execute(INDEX_UNIQUE, {"name": name}).scalar():
+            continue
+        building = f"{name}_unique"
+
+        # A failed build (duplicates inserted meanwhile) is retried by
+        # rerunning the migration, which removes them again first
+        connection.execute(
+            text(
+                f"DELETE FROM {table} t USING {table} d "
+                f"WHERE t.employee_id = d.employee_id AND t.{key} = d.{key} "
+                f"AND t.id > d.id"
+            )
+        )
+        create_partitioned_index(
+            connection, building, table, f"employee_id, {key}", unique=True
+        )
+        with connection.engine.begin() as transaction:
+            transaction.execute(text(f"DROP INDEX IF EXISTS {name}"))
+            transaction.execute(text(f"ALTER INDEX {building} RENAME TO {name}"))
+        connection.execute(text(f"ANALYZE {table}"))
@@ -0,0 +1,41 @@
+"""
+Indexes matching the keyset orderings of the paginated list endpoints, so
+every page is an index range scan. Built CONCURRENTLY like those of 0002.
+"""
+
+from sqlalchemy import text
+
+from app.models.partitions import INDEX_VALID
+
+TRANSACTIONAL = False
+
+INDEXES = {
+    "ix_focus_groups_created_at_focus_group_id": (
+        "focus_groups",
+        "created_at, focus_group_id",
+    ),
+    "ix_actions_created_at_action_id": ("actions", "created_at, action_id"),
+    "ix_survey_created_at_survey_id": ("survey", "created_at, survey_id"),
+    "ix_employee_reports_employee_id_generated_at_report_id": (
+        "employee_reports",
+        "employee_id, generated_at, report_id",
+    ),
+    "ix_user_group_association_focus_group_id_employee_id": (
+        "user_group_association",
+        "focus_group_id, employee_id",
+    ),
+}
+
+
+def upgrade(connection):
+    for name, (table, columns) in INDEXES.items():
+        valid = connection.execute(INDEX_VALID, {"name": name}).scalar()
+        if valid:
+            continue
+        if valid is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY {name}"))
+        connection.execute(
+            text(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+            )
+        )
@@ -1,6 +1,276 @@
 # Additional analytics functions for processing employee feedback
+#
+# Vibe histories are packed into one right-aligned matrix (one row per
+# employee, most recent score in the last column, NaN padding on the left) so
+# rolling means, EWMA, slope, volatility and change-points are computed for
+# every employee at once with NumPy instead of employee by employee.
+
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 3
+EWMA_ALPHA = 0.5
+# Number of most recent scores used for slope and volatility
+TREND_WINDOW = 6
+# Slope (score points per response) beyond which a trend is reported
+TREND_SLOPE_THRESHOLD = 0.25
+# Minimum number of scores on each side of a change-point
+CHANGE_POINT_MIN_SEGMENT = 2
+# Minimum absolute mean shift (score points) for a change-point to count
+CHANGE_POINT_MIN_SHIFT = 1.5
+
+SUMMARY_COLUMNS = [
+    "count",
+    "mean",
+    "last_score",
+    "rolling_mean",
+    "ewma",
+    "slope",
+    "volatility",
+    "trend",
+    "change_point_date",
+    "change_point_shift",
+]
+
+
+def align_series(
+    df, id_col="employee_id", date_col="response_date", value_col="vibe_score"
+):
+    """
+    Pack every employee's history into a right-aligned, NaN-padded matrix.
+
+    Returns (ids, dates, values) where values[i, -1] is the most recent score
+    of ids[i] and dates holds the matching response dates (NaT padded).
+    """
+    if df.empty:
+        return np.array([], dtype=object), np.empty((0, 0)), np.empty((0, 0))
+
+    ordered = df.sort_values([id_col, date_col], kind="stable")
+    ids, codes = np.unique(ordered[id_col].to_numpy(), return_inverse=True)
+    counts = np.bincount(codes, minlength=len(ids))
+    width = counts.max()
+
+    # Position of every row counted from the end of its employee's history
+    position = np.arange(len(ordered)) - np.repeat(np.cumsum(counts) - counts, counts)
+    column = width - counts[codes] + position
+
+    values = np.full((len(ids), width), np.nan)
+    values[codes, column] = ordered[value_col].to_numpy(dtype=float)
+
+    dates = np.full((len(ids), width), np.datetime64("NaT"), dtype="datetime64[ns]")
+    dates[codes, column] = pd.to_datetime(ordered[date_col]).to_numpy()
+    return ids, dates, values
+
+
+def rolling_mean(values, window=ROLLING_WINDOW):
+    """Mean of the last `window` scores at every position (NaN-aware)."""
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    pad = np.zeros((values.shape[0], window))
+    sums = np.concatenate([pad, sums], axis=1)
+    counts = np.concatenate([pad, counts], axis=1)
+    window_sums = sums[:, window:] - sums[:, :-window]
+    window_counts = counts[:, window:] - counts[:, :-window]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = window_sums / window_counts
+    return np.where(valid, means, np.nan)
+
+
+def ewma(values, alpha=EWMA_ALPHA):
+    """Exponentially weighted moving average along each row."""
+    result = np.full_like(values, np.nan)
+    current = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        current = np.where(
+            np.isnan(x),
+            current,
+            np.where(np.isnan(current), x, alpha * x + (1 - alpha) * current),
+        )
+        result[:, t] = np.where(np.isnan(x), np.nan, current)
+    return result
+
+
+def _tail(values, window):
+    return values[:, -window:] if window else values
+
+
+def slope(values, window=TREND_WINDOW):
+    """Least-squares slope (score points per response) of the last scores."""
+    y = _tail(values, window)
+    valid = ~np.isnan(y)
+    x = np.broadcast_to(np.arange(y.shape[1], dtype=float), y.shape)
+    n = valid.sum(axis=1)
+    sx = np.where(valid, x, 0).sum(axis=1)
+    sy = np.where(valid, y, 0).sum(axis=1)
+    sxx = np.where(valid, x * x, 0).sum(axis=1)
+    sxy = np.where(valid, x * y, 0).sum(axis=1)
+    denominator = n * sxx - sx * sx
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = (n * sxy - sx * sy) / denominator
+    return np.where((n >= 2) & (denominator != 0), result, np.nan)
+
+
+def volatility(values, window=TREND_WINDOW):
+    """Population standard deviation of the last scores."""
+    y = _tail(values, window)
+    valid = ~np.isnan(y)
+    n = valid.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(valid, y, 0).sum(axis=1) / n
+        variance = np.where(valid, (y - mean[:, None]) ** 2, 0).sum(axis=1) / n
+    return np.where(n > 0, np.sqrt(variance), np.nan)
+
+
+def change_points(values, min_segment=CHANGE_POINT_MIN_SEGMENT):
+    """
+    Locate the strongest mean shift in every row.
+
+    Returns (index, shift): the column where the new level starts and the
+    difference between the mean after and before it (NaN when the history is
+    too short to split).
+    """
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+    counts = np.cumsum(valid, axis=1)
+    total_sum = sums[:, -1:]
+    total_count = counts[:, -1:]
+
+    # Split after column t: left = [..t], right = [t+1..]
+    left_sum, left_count = sums[:, :-1], counts[:, :-1]
+    right_sum, right_count = total_sum - left_sum, total_count - left_count
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shift = right_sum / right_count - left_sum / left_count
+    allowed = (left_count >= min_segment) & (right_count >= min_segment)
+    # Only consider splits that fall right after an actual response
+    allowed &= valid[:, :-1]
+    # Weight shifts by segment sizes so short tails do not dominate
+    weight = np.sqrt(left_count * right_count / np.maximum(total_count, 1))
+    score = np.where(allowed, np.abs(shift) * weight, -np.inf)
+
+    if score.shape[1] == 0:
+        empty = np.full(values.shape[0], np.nan)
+        return empty, empty
+
+    best = score.argmax(axis=1)
+    rows = np.arange(values.shape[0])
+    found = np.isfinite(score[rows, best])
+    return (
+        np.where(found, best + 1, np.nan),
+        np.where(found, shift[rows, best], np.nan),
+    )
+
+
+def classify_trend(slopes, threshold=TREND_SLOPE_THRESHOLD):
+    """Map slopes onto "declining", "improving" or "stable"."""
+    return np.where(
+        slopes <= -threshold,
+        "declining",
+        np.where(slopes >= threshold, "improving", "stable"),
+    )
+
+
+def _last_valid(values):
+    valid = ~np.isnan(values)
+    has_any = valid.any(axis=1)
+    last = values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    rows = np.arange(values.shape[0])
+    return np.where(has_any, values[rows, last] if values.size else np.nan, np.nan)
+
+
+def summarize_series(ids, dates, values):
+    """Summary statistics for every row of an aligned history matrix."""
+    count = (~np.isnan(values)).sum(axis=1)
+    slopes = slope(values)
+    cp_index, cp_shift = change_points(values)
+    significant = np.abs(cp_shift) >= CHANGE_POINT_MIN_SHIFT
+
+    # dates may hold positions instead of timestamps (single-employee API)
+    cp_date = np.full(len(ids), np.nan).astype(dates.dtype)
+    rows = np.flatnonzero(significant)
+    cp_date[rows] = dates[rows, cp_index[rows].astype(int)]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(values, axis=1) / count
+
+    summary = pd.DataFrame(
+        {
+            "count": count,
+            "mean": mean,
+            "last_score": _last_valid(values),
+            "rolling_mean": _last_valid(rolling_mean(values)),
+            "ewma": _last_valid(ewma(values)),
+            "slope": slopes,
+            "volatility": volatility(values),
+            "trend": classify_trend(slopes),
+            "change_point_date": cp_date,
+            "change_point_shift": np.where(significant, cp_shift, np.nan),
+        },
+        index=pd.Index(ids, name="employee_id"),
+    )
+    return summary[SUMMARY_COLUMNS]
+
+
+def summarize_vibe_history(vibemeter_df):
+    """
+    Batch API: one row of time-series statistics per employee.
+
+    vibemeter_df uses the database column names (employee_id, response_date,
+    vibe_score).
+    """
+    if vibemeter_df.empty:
+        return pd.DataFrame(
+            columns=SUMMARY_COLUMNS, index=pd.Index([], name="employee_id")
+        )
+    return summarize_series(*align_series(vibemeter_df))
+
+
+def analyze_employee_vibes(scores, dates=None):
+    """
+    Single-employee API: statistics plus per-response series for charts.
+
+    scores are ordered oldest first; dates (optional) must match them. The
+    result is JSON-ready: statistics the history is too short for (e.g. the
+    slope and trend of a single score) are None.
+    """
+    if not len(scores):
+        return {"count": 0, "rolling_mean": [], "ewma": []}
+
+    values = np.asarray(scores, dtype=float)[None, :]
+    positions = np.arange(values.shape[1], dtype=float)[None, :]
+    summary = summarize_series(np.array([None]), positions, values).iloc[0]
+    summary = {name: _json_value(value) for name, value in summary.items()}
+    if summary["slope"] is None:
+        summary["trend"] = None
+
+    index = summary.pop("change_point_date")
+    summary["change_point_index"] = None if index is None else int(index)
+    summary["change_point_date"] = (
+        None if dates is None or index is None else list(dates)[int(index)]
+    )
+    summary["rolling_mean"] = [_json_value(x) for x in rolling_mean(values)[0]]
+    summary["ewma"] = [_json_value(x) for x in ewma(values)[0]]
+    return summary
+
+
+def _json_value(value):
+    """A NumPy scalar as a Python value; None when it could not be computed."""
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
 
 
 def aggregate_feedback(feedback_list):
-    # Dummy aggregation: Replace with logic to compute metrics from feedback data
-    return {"average_sentiment": "neutral"}
+    """Aggregate a list of vibe scores (oldest first) into summary metrics."""
+    summary = analyze_employee_vibes(feedback_list)
+    mean = summary.get("mean")
+    if not summary["count"]:
+        sentiment = "neutral"
+    elif mean < 3:
+        sentiment = "negative"
+    elif mean > 4:
+        sentiment = "positive"
+    else:
+        sentiment = "neutral"
+    return {"average_sentiment": sentiment, **summary}
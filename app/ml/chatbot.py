@@ -7,6 +7,8 @@ import pandas as pd
 from google import genai
 from langgraph.graph import END, StateGraph
 
+from app.ml.features import load_employee_features, load_vibe_trends
+
 # Configure Gemini API
 model = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -18,6 +20,14 @@ ONBOARDING_PATH = os.path.join(DATA_DIR, "onboarding_dataset.csv")
 PERFORMANCE_PATH = os.path.join(DATA_DIR, "performance_dataset.csv")
 REWARDS_PATH = os.path.join(DATA_DIR, "rewards_dataset.csv")
 VIBEMETER_PATH = os.path.join(DATA_DIR, "vibemeter_dataset.csv")
+DATASET_PATHS = (
+    ACTIVITY_PATH,
+    LEAVE_PATH,
+    ONBOARDING_PATH,
+    PERFORMANCE_PATH,
+    REWARDS_PATH,
+    VIBEMETER_PATH,
+)
 
 
 # Function to load datasets from CSV files
@@ -111,6 +121,8 @@ class GraphBuilderAgent:
         performance_df,
         rewards_df,
         vibemeter_df,
+        features,
+        vibe_trends,
     ):
         self.activity_df = activity_df
         self.leave_df = leave_df
@@ -119,6 +131,17 @@ class GraphBuilderAgent:
         self.rewards_df = rewards_df
         self.vibemeter_df = vibemeter_df
 
+        # employee_features rows (see app.ml.features); each graph reads one
+        self.features = features
+        # Vibe time-series statistics from the same vibemeter rows
+        self.vibe_trends = vibe_trends
+
+    def employee_features(self, employee_id):
+        """Return the feature row of an employee, or None if there is no data."""
+        if employee_id not in self.features.index:
+            return None
+        return self.features.loc[employee_id]
+
     def build_knowledge_graph(self, employee_id):
         # Create an empty graph
         G = nx.Graph()
@@ -126,142 +149,100 @@ class GraphBuilderAgent:
         # Add employee node
         G.add_node(employee_id, type="employee")
 
+        features = self.employee_features(employee_id)
+
         # Process VibeMeter data
-        employee_vibes = self.vibemeter_df[
-            self.vibemeter_df["Employee_ID"] == employee_id
-        ]
-        vibe_scores = list(employee_vibes["Vibe_Score"])
-        list(employee_vibes["Response_Date"])
-
-        # Calculate vibe trend
-        vibe_trend = "stable"
-        if len(vibe_scores) > 3:
-            recent_vibes = vibe_scores[-3:]
-            if all(
-                recent_vibes[i] < recent_vibes[i - 1]
-                for i in range(1, len(recent_vibes))
-            ):
-                vibe_trend = "declining"
-            elif all(
-                recent_vibes[i] > recent_vibes[i - 1]
-                for i in range(1, len(recent_vibes))
-            ):
-                vibe_trend = "improving"
+        vibe_count = int(features["vibe_count"]) if features is not None else 0
+        vibe_scores = list(features["recent_vibe_scores"]) if vibe_count else []
+
+        # Vibe trend, volatility and change-point from the batch analytics
+        vibe_trend, volatility, change_shift, change_date = "stable", 0, 0, None
+        if vibe_count and employee_id in self.vibe_trends.index:
+            trends = self.vibe_trends.loc[employee_id]
+            vibe_trend = trends["trend"]
+            volatility = float(np.nan_to_num(trends["volatility"]))
+            if pd.notna(trends["change_point_date"]):
+                change_shift = float(trends["change_point_shift"])
+                change_date = str(trends["change_point_date"].date())
 
         # Add vibe node
         G.add_node(
-            f"{employee_id}_vibe", type="vibe", scores=vibe_scores, trend=vibe_trend
+            f"{employee_id}_vibe",
+            type="vibe",
+            scores=vibe_scores,
+            trend=vibe_trend,
+            average=features["vibe_mean"] if vibe_count else 0,
+            low_ratio=features["vibe_low_count"] / vibe_count if vibe_count else 0,
+            volatility=volatility,
+            change_shift=change_shift,
+            change_date=change_date,
         )
         G.add_edge(employee_id, f"{employee_id}_vibe", relation="has_vibe")
 
-        # Process Activity data
-        employee_activity = self.activity_df[
-            self.activity_df["Employee_ID"] == employee_id
-        ]
-
-        if not employee_activity.empty:
-            recent_activities = employee_activity.sort_values(
-                "Date", ascending=False
-            ).head(10)
-            avg_work_hours = recent_activities["Work_Hours"].mean()
-            avg_messages = recent_activities["Teams_Messages_Sent"].mean()
-            avg_emails = recent_activities["Emails_Sent"].mean()
-            avg_meetings = recent_activities["Meetings_Attended"].mean()
+        if features is None:
+            return G
 
+        # Process Activity data
+        if features["activity_days"]:
             # Add activity node
             G.add_node(
                 f"{employee_id}_activity",
                 type="activity",
-                avg_work_hours=avg_work_hours,
-                avg_messages=avg_messages,
-                avg_emails=avg_emails,
-                avg_meetings=avg_meetings,
+                avg_work_hours=features["recent_avg_work_hours"],
+                avg_messages=features["recent_avg_messages"],
+                avg_emails=features["recent_avg_emails"],
+                avg_meetings=features["recent_avg_meetings"],
             )
             G.add_edge(employee_id, f"{employee_id}_activity", relation="has_activity")
 
         # Process Leave data
-        employee_leaves = self.leave_df[self.leave_df["Employee_ID"] == employee_id]
-
-        if not employee_leaves.empty:
-            leave_count = len(employee_leaves)
-            leave_days_total = employee_leaves["Leave_Days"].sum()
-            leave_types = employee_leaves["Leave_Type"].value_counts().to_dict()
-
+        if features["leave_count"]:
             # Add leave node
             G.add_node(
                 f"{employee_id}_leave",
                 type="leave",
-                leave_count=leave_count,
-                leave_days_total=leave_days_total,
-                leave_types=leave_types,
+                leave_count=features["leave_count"],
+                leave_days_total=features["leave_days_total"],
+                leave_types=features["leave_types"],
             )
             G.add_edge(employee_id, f"{employee_id}_leave", relation="has_leave")
 
         # Process Performance data
-        employee_performance = self.performance_df[
-            self.performance_df["Employee_ID"] == employee_id
-        ]
-
-        if not employee_performance.empty:
-            recent_performance = employee_performance.sort_values(
-                "Review_Period", ascending=False
-            ).iloc[0]
-            rating = recent_performance["Performance_Rating"]
-            feedback = recent_performance["Manager_Feedback"]
-            promotion = recent_performance["Promotion_Consideration"]
-
+        if pd.notna(features["performance_rating"]):
             # Add performance node
             G.add_node(
                 f"{employee_id}_performance",
                 type="performance",
-                rating=rating,
-                feedback=feedback,
-                promotion=promotion,
+                rating=int(features["performance_rating"]),
+                feedback=features["manager_feedback"],
+                promotion=features["promotion_consideration"],
             )
             G.add_edge(
                 employee_id, f"{employee_id}_performance", relation="has_performance"
             )
 
         # Process Rewards data
-        employee_rewards = self.rewards_df[
-            self.rewards_df["Employee_ID"] == employee_id
-        ]
-
-        if not employee_rewards.empty:
-            reward_count = len(employee_rewards)
-            reward_types = employee_rewards["Award_Type"].value_counts().to_dict()
-            rewards_points = employee_rewards["Reward_Points"].sum()
-
+        if features["reward_count"]:
             # Add rewards node
             G.add_node(
                 f"{employee_id}_rewards",
                 type="rewards",
-                reward_count=reward_count,
-                reward_types=reward_types,
-                rewards_points=rewards_points,
+                reward_count=features["reward_count"],
+                reward_types=features["reward_types"],
+                rewards_points=features["reward_points"],
             )
             G.add_edge(employee_id, f"{employee_id}_rewards", relation="has_rewards")
 
         # Process Onboarding data
-        employee_onboarding = self.onboarding_df[
-            self.onboarding_df["Employee_ID"] == employee_id
-        ]
-
-        if not employee_onboarding.empty:
-            onboarding_data = employee_onboarding.iloc[0]
-            joining_date = onboarding_data["Joining_Date"]
-            feedback = onboarding_data["Onboarding_Feedback"]
-            mentor = onboarding_data["Mentor_Assigned"]
-            training = onboarding_data["Initial_Training_Completed"]
-
+        if pd.notna(features["joining_date"]):
             # Add onboarding node
             G.add_node(
                 f"{employee_id}_onboarding",
                 type="onboarding",
-                joining_date=joining_date,
-                feedback=feedback,
-                mentor=mentor,
-                training=training,
+                joining_date=features["joining_date"],
+                feedback=features["onboarding_feedback"],
+                mentor=features["mentor_assigned"],
+                training=features["initial_training_completed"],
             )
             G.add_edge(
                 employee_id, f"{employee_id}_onboarding", relation="has_onboarding"
@@ -285,8 +266,7 @@ class GraphBuilderAgent:
                 )
 
             # Check for consistently low vibe scores
-            vibe_scores = vibe_node["scores"]
-            if vibe_scores and sum(s < 5 for s in vibe_scores) / len(vibe_scores) > 0.5:
+            if vibe_node["low_ratio"] > 0.5:
                 issues.append(
                     {
                         "type": "vibe",
@@ -295,6 +275,17 @@ class GraphBuilderAgent:
                     }
                 )
 
+            # Check for a sudden drop in vibe level
+            if vibe_node["change_shift"] < 0:
+                issues.append(
+                    {
+                        "type": "vibe",
+                        "severity": "high",
+                        "description": "Sudden drop in vibe scores since "
+                        f"{vibe_node['change_date']}",
+                    }
+                )
+
         # Check for workload issues
         if f"{employee_id}_activity" in G.nodes:
             activity_node = G.nodes[f"{employee_id}_activity"]
@@ -970,13 +961,16 @@ class ReportGeneratorAgent:
     def __init__(self):
         pass
 
-    def generate_report(self, employee_id, knowledge_graph, issues, conversation):
+    def generate_report(
+        self, employee_id, knowledge_graph, issues, conversation, metrics=None
+    ):
         """Generate a structured employee report based on knowledge graph and conversation"""
-        # Convert the knowledge graph to a dictionary format for easier analysis
-        graph_data = self.graph_to_dict(knowledge_graph)
+        if metrics is None:
+            # Convert the knowledge graph to a dictionary format for easier analysis
+            graph_data = self.graph_to_dict(knowledge_graph)
 
-        # Extract key metrics from the graph
-        metrics = self.extract_metrics(graph_data, employee_id)
+            # Extract key metrics from the graph
+            metrics = self.extract_metrics(graph_data, employee_id)
 
         # Process conversation to extract key insights
         # Convert conversation to plain text format for analysis
@@ -1084,11 +1078,9 @@ class ReportGeneratorAgent:
         # Extract vibe metrics
         vibe_node = graph_data.get(f"{employee_id}_vibe", {})
         if vibe_node:
-            vibe_scores = vibe_node.get("scores", [])
-            metrics["average_vibe"] = (
-                sum(vibe_scores) / len(vibe_scores) if vibe_scores else 0
-            )
+            metrics["average_vibe"] = vibe_node.get("average", 0)
             metrics["vibe_trend"] = vibe_node.get("trend", "unknown")
+            metrics["vibe_volatility"] = vibe_node.get("volatility", 0)
 
         # Extract activity metrics
         activity_node = graph_data.get(f"{employee_id}_activity", {})
@@ -1135,10 +1127,12 @@ class ReportGeneratorAgent:
 
         return metrics
 
-    def run(self, employee_id, knowledge_graph, issues, conversation_history):
+    def run(
+        self, employee_id, knowledge_graph, issues, conversation_history, metrics=None
+    ):
         # Generate the report
         report = self.generate_report(
-            employee_id, knowledge_graph, issues, conversation_history
+            employee_id, knowledge_graph, issues, conversation_history, metrics
         )
 
         # Save the report to a file
@@ -1153,11 +1147,25 @@ class ReportGeneratorAgent:
 
 # Define the LangGraph workflow
 def build_workflow(
-    activity_df, leave_df, onboarding_df, performance_df, rewards_df, vibemeter_df
+    activity_df,
+    leave_df,
+    onboarding_df,
+    performance_df,
+    rewards_df,
+    vibemeter_df,
+    features,
+    vibe_trends,
 ):
     # Initialize agents
     graph_builder = GraphBuilderAgent(
-        activity_df, leave_df, onboarding_df, performance_df, rewards_df, vibemeter_df
+        activity_df,
+        leave_df,
+        onboarding_df,
+        performance_df,
+        rewards_df,
+        vibemeter_df,
+        features,
+        vibe_trends,
     )
     chatbot = ChatbotAgent()
     report_generator = ReportGeneratorAgent()
@@ -1219,10 +1227,19 @@ def run_hr_analysis(
     performance_df,
     rewards_df,
     vibemeter_df,
+    features,
+    vibe_trends,
 ):
     # Build the workflow
     workflow = build_workflow(
-        activity_df, leave_df, onboarding_df, performance_df, rewards_df, vibemeter_df
+        activity_df,
+        leave_df,
+        onboarding_df,
+        performance_df,
+        rewards_df,
+        vibemeter_df,
+        features,
+        vibe_trends,
     )
 
     # Run the workflow
@@ -1231,19 +1248,14 @@ def run_hr_analysis(
     return result
 
 
-activity_df, leave_df, onboarding_df, performance_df, rewards_df, vibemeter_df = (
-    load_datasets()
-)
-# Create the agents directly for better error handling
-graph_builder = GraphBuilderAgent(
-    activity_df, leave_df, onboarding_df, performance_df, rewards_df, vibemeter_df
-)
-
-
 # Example usage
 def main():
     # Load datasets
     try:
+        graph_builder = GraphBuilderAgent(
+            *load_datasets(), load_employee_features(), load_vibe_trends()
+        )
+
         # Run the analysis for an employee
         employee_id = "EMP0387"
 
@@ -0,0 +1,459 @@
+# Per-employee feature store.
+#
+# Aggregates that used to be recomputed from raw dataset rows by every consumer
+# (recent work hours, leave totals by type, latest performance review, reward
+# points, vibe statistics, onboarding details) are computed here once and kept
+# in the employee_features table, one row per employee. The chat graphs, the
+# dashboards and the risk-scoring engine read that row.
+#
+# Rows written through a session are collected on flush, and once the session
+# commits the touched employees' features are recomputed in a worker thread,
+# in a transaction of their own, so request handlers never wait on pandas.
+# Commit hooks (e.g. cache invalidation) run after that refresh commits.
+
+import asyncio
+import math
+from datetime import datetime
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, event, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.ml.analytics import summarize_vibe_history
+from app.models.schema import (
+    ActivityTrackerDataset,
+    EmployeeFeatures,
+    LeaveDataset,
+    OnboardingDataset,
+    PerformanceDataset,
+    RewardsDataset,
+    User,
+    VibeMeterDataset,
+)
+from app.utils.db import engine
+
+# Number of most recent activity rows averaged into the recent_* columns
+RECENT_ACTIVITY_ROWS = 10
+# Number of most recent vibe scores kept in recent_vibe_scores
+RECENT_VIBE_SCORES = 10
+# Vibe scores below this value count towards vibe_low_count
+LOW_VIBE_THRESHOLD = 5
+# Vibe statistics are on the 1-5 scale of employee_targeting_results.csv;
+# the vibemeter's top reading (6) counts as 5
+VIBE_FEATURE_MAX = 5
+# Employees processed per batch during a full rebuild
+REBUILD_BATCH_SIZE = 1000
+
+SOURCE_MODELS = {
+    "activity": ActivityTrackerDataset,
+    "leave": LeaveDataset,
+    "onboarding": OnboardingDataset,
+    "performance": PerformanceDataset,
+    "rewards": RewardsDataset,
+    "vibemeter": VibeMeterDataset,
+}
+
+COUNT_COLUMNS = [
+    "activity_days",
+    "leave_count",
+    "leave_days_total",
+    "reward_count",
+    "reward_points",
+    "vibe_count",
+    "vibe_low_count",
+]
+
+FEATURE_COLUMNS = [
+    column.name
+    for column in EmployeeFeatures.__table__.columns
+    if column.name not in ("employee_id", "updated_at")
+]
+
+INTEGER_COLUMNS = {
+    column.name
+    for column in EmployeeFeatures.__table__.columns
+    if isinstance(column.type, Integer)
+}
+
+_PENDING_KEY = "employee_features_pending"
+
+# Callables run as hook(connection, employee_ids) after feature rows change
+_refresh_hooks = []
+# Callables run as hook(employee_ids) once refreshed feature rows are committed
+_commit_hooks = []
+# Refreshes scheduled on the event loop, referenced until they finish
+_background_refreshes = set()
+
+
+def register_refresh_hook(hook):
+    """Run hook(connection, employee_ids) whenever feature rows are refreshed."""
+    _refresh_hooks.append(hook)
+    return hook
+
+
+def register_commit_hook(hook):
+    """Run hook(employee_ids) after refreshed feature rows are committed."""
+    _commit_hooks.append(hook)
+    return hook
+
+
+def _counts_by(df, column, value=None):
+    """Return a Series of {category: count or sum} dicts indexed by employee_id."""
+    grouped = df.groupby(["employee_id", column])
+    table = (grouped.size() if value is None else grouped[value].sum()).unstack(
+        fill_value=0
+    )
+    return pd.Series(
+        [
+            {key: int(count) for key, count in row.items() if count}
+            for row in table.to_dict("records")
+        ],
+        index=table.index,
+        dtype=object,
+    )
+
+
+def compute_employee_features(
+    activity_df,
+    leave_df,
+    onboarding_df,
+    performance_df,
+    rewards_df,
+    vibemeter_df,
+    employee_ids=None,
+):
+    """
+    Compute one feature row per employee from the raw dataset frames.
+
+    The frames use the database column names (employee_id, work_hours, ...).
+    When employee_ids is given the result contains exactly those employees,
+    with empty counts for employees that have no rows left.
+    """
+    parts = []
+
+    if not activity_df.empty:
+        activity = activity_df.sort_values(["employee_id", "date"], kind="stable")
+        grouped = activity.groupby("employee_id")
+        recent = grouped.tail(RECENT_ACTIVITY_ROWS).groupby("employee_id")
+        parts.append(
+            pd.DataFrame(
+                {
+                    "activity_days": grouped.size(),
+                    "avg_work_hours": grouped["work_hours"].mean(),
+                    "max_work_hours": grouped["work_hours"].max(),
+                    "recent_avg_work_hours": recent["work_hours"].mean(),
+                    "recent_avg_messages": recent["teams_messages_sent"].mean(),
+                    "recent_avg_emails": recent["emails_sent"].mean(),
+                    "recent_avg_meetings": recent["meetings_attended"].mean(),
+                    "last_activity_date": grouped["date"].max(),
+                }
+            )
+        )
+
+    if not leave_df.empty:
+        grouped = leave_df.groupby("employee_id")
+        parts.append(
+            pd.DataFrame(
+                {
+                    "leave_count": grouped.size(),
+                    "leave_days_total": grouped["leave_days"].sum(),
+                    "leave_types": _counts_by(leave_df, "leave_type"),
+                    "leave_days_by_type": _counts_by(
+                        leave_df, "leave_type", "leave_days"
+                    ),
+                }
+            )
+        )
+
+    if not performance_df.empty:
+        # Latest review period ("H2 2023" > "H1 2023" > "Annual 2023"), the
+        # earliest row of it when an employee has several
+        latest = (
+            performance_df.sort_values("review_period", ascending=False, kind="stable")
+            .groupby("employee_id")
+            .head(1)
+            .set_index("employee_id")
+        )
+        parts.append(
+            pd.DataFrame(
+                {
+                    "performance_review_period": latest["review_period"],
+                    "performance_rating": latest["performance_rating"],
+                    "manager_feedback": latest["manager_feedback"],
+                    "promotion_consideration": latest["promotion_consideration"],
+                }
+            )
+        )
+
+    if not rewards_df.empty:
+        grouped = rewards_df.groupby("employee_id")
+        parts.append(
+            pd.DataFrame(
+                {
+                    "reward_count": grouped.size(),
+                    "reward_points": grouped["reward_points"].sum(),
+                    "reward_types": _counts_by(rewards_df, "award_type"),
+                }
+            )
+        )
+
+    if not vibemeter_df.empty:
+        vibes = vibemeter_df.sort_values(
+            ["employee_id", "response_date"], kind="stable"
+        )
+        vibes = vibes.assign(
+            vibe_score=vibes["vibe_score"].clip(upper=VIBE_FEATURE_MAX)
+        )
+        grouped = vibes.groupby("employee_id")
+        recent = grouped.tail(RECENT_VIBE_SCORES).groupby("employee_id")
+        parts.append(
+            pd.DataFrame(
+                {
+                    "vibe_count": grouped.size(),
+                    "vibe_mean": grouped["vibe_score"].mean(),
+                    "vibe_min": grouped["vibe_score"].min(),
+                    "vibe_max": grouped["vibe_score"].max(),
+                    "vibe_std": grouped["vibe_score"].std(ddof=0),
+                    "vibe_low_count": (vibes["vibe_score"] < LOW_VIBE_THRESHOLD)
+                    .groupby(vibes["employee_id"])
+                    .sum(),
+                    "recent_vibe_scores": recent["vibe_score"].agg(list),
+                    "last_vibe_date": grouped["response_date"].max(),
+                }
+            )
+        )
+
+    if not onboarding_df.empty:
+        # The most recently recorded onboarding row
+        latest = onboarding_df.groupby("employee_id").tail(1).set_index("employee_id")
+        parts.append(
+            pd.DataFrame(
+                {
+                    "joining_date": latest["joining_date"],
+                    "onboarding_feedback": latest["onboarding_feedback"],
+                    "mentor_assigned": latest["mentor_assigned"],
+                    "initial_training_completed": latest["initial_training_completed"],
+                }
+            )
+        )
+
+    features = pd.concat(parts, axis=1) if parts else pd.DataFrame()
+    features = features.reindex(columns=FEATURE_COLUMNS)
+    if employee_ids is not None:
+        features = features.reindex(pd.Index(sorted(employee_ids)))
+    features.index.name = "employee_id"
+    features[COUNT_COLUMNS] = features[COUNT_COLUMNS].fillna(0).astype(int)
+    return features
+
+
+def to_db_value(value):
+    """Convert pandas/NumPy scalars into values the database driver accepts."""
+    if isinstance(value, list):
+        return [to_db_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_db_value(v) for k, v in value.items()}
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date()
+    if isinstance(value, np.generic):
+        return to_db_value(value.item())
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def feature_records(features):
+    """Turn a features frame into a list of plain dicts, one per employee."""
+    now = datetime.now()
+    records = []
+    for employee_id, row in zip(features.index, features.to_dict("records")):
+        record = {key: to_db_value(value) for key, value in row.items()}
+        for key in INTEGER_COLUMNS.intersection(record):
+            if record[key] is not None:
+                record[key] = int(record[key])
+        record["employee_id"] = employee_id
+        record["updated_at"] = now
+        records.append(record)
+    return records
+
+
+def load_source_frames(connection, employee_ids=None):
+    """Read the dataset tables (optionally for a set of employees) into frames."""
+    frames = {}
+    for name, model in SOURCE_MODELS.items():
+        table = model.__table__
+        query = select(table).order_by(table.c.id)
+        if employee_ids is not None:
+            query = query.where(table.c.employee_id.in_(list(employee_ids)))
+        result = connection.execute(query)
+        frames[f"{name}_df"] = pd.DataFrame(
+            result.mappings().all(), columns=result.keys()
+        )
+    return frames
+
+
+def refresh_employee_features(connection, employee_ids):
+    """Recompute and upsert the feature rows of the given employees."""
+    employee_ids = set(employee_ids)
+    if not employee_ids:
+        return 0
+
+    frames = load_source_frames(connection, employee_ids)
+    features = compute_employee_features(**frames, employee_ids=employee_ids)
+    records = feature_records(features)
+
+    statement = insert(EmployeeFeatures).values(records)
+    statement = statement.on_conflict_do_update(
+        index_elements=[EmployeeFeatures.employee_id],
+        set_={
+            column: statement.excluded[column]
+            for column in FEATURE_COLUMNS + ["updated_at"]
+        },
+    )
+    connection.execute(statement)
+
+    for hook in _refresh_hooks:
+        hook(connection, employee_ids)
+    return len(records)
+
+
+def refresh_committed_employees(employee_ids):
+    """
+    Refresh the features of employees whose dataset rows were committed, in
+    a transaction of their own, then run the commit hooks.
+    """
+    try:
+        with engine.begin() as connection:
+            refresh_employee_features(connection, employee_ids)
+    except Exception as e:
+        print(f"Refreshing features of {len(employee_ids)} employees failed: {e}")
+        return
+    _run_commit_hooks(employee_ids)
+
+
+def _run_commit_hooks(employee_ids):
+    for hook in _commit_hooks:
+        try:
+            hook(employee_ids)
+        except Exception as e:
+            print(f"Feature commit hook {hook.__name__} failed: {e}")
+
+
+async def refresh_after_commit(employee_ids):
+    """Async variant of refresh_committed_employees() run in a worker thread."""
+    await asyncio.to_thread(refresh_committed_employees, employee_ids)
+
+
+def rebuild_employee_features(engine, batch_size=REBUILD_BATCH_SIZE):
+    """Recompute the whole employee_features table, batch by batch."""
+    with engine.begin() as connection:
+        employee_ids = connection.execute(
+            select(User.employee_id).order_by(User.employee_id)
+        ).scalars()
+        employee_ids = list(employee_ids)
+
+    total = 0
+    for start in range(0, len(employee_ids), batch_size):
+        batch = employee_ids[start : start + batch_size]
+        with engine.begin() as connection:
+            total += refresh_employee_features(connection, batch)
+        _run_commit_hooks(batch)
+        print(f"Rebuilt features for {total}/{len(employee_ids)} employees")
+
+    with engine.begin() as connection:
+        connection.execute(
+            EmployeeFeatures.__table__.delete().where(
+                EmployeeFeatures.employee_id.not_in(employee_ids)
+            )
+        )
+    return total
+
+
+def _touched_employee_ids(session):
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, tuple(SOURCE_MODELS.values())) and obj.employee_id:
+            yield obj.employee_id
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_touched_employees(session, flush_context):
+    """Remember which employees had dataset rows written in this flush."""
+    touched = set(_touched_employee_ids(session))
+    if touched:
+        session.info.setdefault(_PENDING_KEY, set()).update(touched)
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_committed_employees(session):
+    """Refresh the touched employees once their rows are committed."""
+    employee_ids = session.info.pop(_PENDING_KEY, None)
+    if not employee_ids:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Not on the event loop (scripts, worker threads): nothing to block
+        refresh_committed_employees(employee_ids)
+        return
+    task = loop.create_task(refresh_after_commit(employee_ids))
+    _background_refreshes.add(task)
+    task.add_done_callback(_background_refreshes.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_touched_employees(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def employee_features_frame(connection, employee_ids=None):
+    """Read employee_features rows into a frame indexed by employee_id."""
+    table = EmployeeFeatures.__table__
+    query = select(table)
+    if employee_ids is not None:
+        query = query.where(table.c.employee_id.in_(list(employee_ids)))
+    result = connection.execute(query)
+    frame = pd.DataFrame(result.mappings().all(), columns=result.keys())
+    return frame.set_index("employee_id")
+
+
+def load_employee_features():
+    """Every employee_features row, as a frame indexed by employee_id."""
+    with engine.connect() as connection:
+        return employee_features_frame(connection)
+
+
+def load_vibe_trends():
+    """
+    Time-series statistics (see app.ml.analytics) of every employee's vibe
+    history, from the vibemeter rows and on the scale of employee_features.
+    """
+    table = VibeMeterDataset.__table__
+    with engine.connect() as connection:
+        result = connection.execute(
+            select(table.c.employee_id, table.c.response_date, table.c.vibe_score)
+        )
+        history = pd.DataFrame(result.all(), columns=list(result.keys()))
+    return summarize_vibe_history(
+        history.assign(vibe_score=history["vibe_score"].clip(upper=VIBE_FEATURE_MAX))
+    )
+
+
+def features_generation():
+    """Changes whenever an employee_features row is written or deleted."""
+    table = EmployeeFeatures.__table__
+    with engine.connect() as connection:
+        count, updated_at = connection.execute(
+            select(func.count(), func.max(table.c.updated_at))
+        ).one()
+    return f"{count}:{updated_at.isoformat() if updated_at else ''}"
+
+
+if __name__ == "__main__":
+    count = rebuild_employee_features(engine)
+    print(f"✅ employee_features rebuilt for {count} employees")
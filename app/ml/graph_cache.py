@@ -0,0 +1,101 @@
+# Memoized knowledge graph results.
+#
+# GraphBuilderAgent.run is pure for a given dataset, so its results (knowledge
+# graph, issues and the report metrics derived from the graph) are cached per
+# employee: a bounded in-process LRU in front of a shared Redis tier. Keys
+# carry the fingerprint of the dataset files the snapshot was loaded from and
+# the updated_at of the employee's employee_features row, so a new snapshot
+# only misses for the employees whose features changed, and lookups need no
+# round trip before the local tier.
+
+import asyncio
+import json
+import threading
+
+import networkx as nx
+import numpy as np
+from cachetools import LRUCache
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.ml.chatbot import ReportGeneratorAgent
+from app.utils.redis_client import redis_client
+
+_local_cache = LRUCache(maxsize=settings.GRAPH_CACHE_SIZE)
+_local_lock = threading.Lock()
+
+
+def _cache_key(snapshot, employee_id):
+    features = snapshot.graph_builder.employee_features(employee_id)
+    stamp = features["updated_at"] if features is not None else None
+    return f"graph:{snapshot.fingerprint}:{employee_id}:{stamp}"
+
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def serialize_result(result):
+    """Encode a cached result as JSON for the Redis tier."""
+    return json.dumps(
+        {
+            "graph": nx.node_link_data(result["graph"], edges="links"),
+            "issues": result["issues"],
+            "metrics": result["metrics"],
+        },
+        default=_to_json,
+    )
+
+
+def deserialize_result(payload):
+    data = json.loads(payload)
+    data["graph"] = nx.node_link_graph(data["graph"], edges="links")
+    return data
+
+
+def compute_result(snapshot, employee_id):
+    """Run the snapshot's graph builder and derive the report metrics."""
+    graph, issues = snapshot.graph_builder.run(employee_id)
+    report_generator = ReportGeneratorAgent()
+    metrics = report_generator.extract_metrics(
+        report_generator.graph_to_dict(graph), employee_id
+    )
+    return {"graph": graph, "issues": issues, "metrics": metrics}
+
+
+async def get_employee_analysis(snapshot, employee_id):
+    """
+    Return {"graph", "issues", "metrics"} for an employee, computing it only
+    when neither cache tier holds a result for the given snapshot and the
+    employee's current features.
+    """
+    key = _cache_key(snapshot, employee_id)
+
+    with _local_lock:
+        result = _local_cache.get(key)
+    if result is not None:
+        return result
+
+    try:
+        payload = await redis_client.get(key)
+    except RedisError:
+        payload = None
+
+    if payload is not None:
+        result = deserialize_result(payload)
+    else:
+        result = await asyncio.to_thread(compute_result, snapshot, employee_id)
+        try:
+            await redis_client.set(
+                key, serialize_result(result), ex=settings.GRAPH_CACHE_TTL
+            )
+        except RedisError as e:
+            print(f"Could not cache graph for {employee_id}: {e}")
+
+    with _local_lock:
+        _local_cache[key] = result
+    return result
@@ -0,0 +1,131 @@
+# Versioned dataset snapshots for the chat workers.
+#
+# A snapshot bundles the loaded dataset frames, the employee_features rows and
+# the vibe trends with the GraphBuilderAgent built from them. New snapshots are built in the background and swapped in
+# atomically; sessions keep using the snapshot they started with, and retired
+# snapshots are freed as soon as the last session holding them ends.
+
+import asyncio
+import hashlib
+import os
+import threading
+import weakref
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.ml.chatbot import DATASET_PATHS, GraphBuilderAgent, load_datasets
+from app.ml.features import (
+    features_generation,
+    load_employee_features,
+    load_vibe_trends,
+)
+
+
+def dataset_fingerprint(paths=DATASET_PATHS):
+    """Identify the dataset files' contents by their size and mtime."""
+    digest = hashlib.sha1()
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+@dataclass(eq=False)
+class DatasetSnapshot:
+    version: int
+    fingerprint: str
+    features_generation: str
+    frames: tuple
+    graph_builder: GraphBuilderAgent
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+class SnapshotManager:
+    def __init__(
+        self,
+        loader=load_datasets,
+        features_loader=load_employee_features,
+        trends_loader=load_vibe_trends,
+        fingerprint=dataset_fingerprint,
+        generation=features_generation,
+    ):
+        self._loader = loader
+        self._features_loader = features_loader
+        self._trends_loader = trends_loader
+        self._fingerprint = fingerprint
+        self._generation = generation
+        self._current = None
+        self._version = 0
+        # Serialises rebuilds; readers never wait on it
+        self._rebuild_lock = threading.Lock()
+        # Guards the swap of the current snapshot
+        self._swap_lock = threading.Lock()
+        self._retired = weakref.WeakSet()
+
+    def current(self):
+        """Return the current snapshot, building the first one if needed."""
+        snapshot = self._current
+        if snapshot is None:
+            snapshot = self.rebuild(force=False)
+        return snapshot
+
+    async def acquire(self):
+        """Async variant of current() that never blocks the event loop."""
+        snapshot = self._current
+        if snapshot is None:
+            snapshot = await asyncio.to_thread(self.rebuild, False)
+        return snapshot
+
+    def rebuild(self, force=True):
+        """
+        Load the datasets into a new snapshot and swap it in.
+
+        Without force the current snapshot is kept when neither the dataset
+        files nor the employee_features rows have changed since it was built.
+        """
+        with self._rebuild_lock:
+            current = self._current
+            fingerprint = self._fingerprint()
+            generation = self._generation()
+            if (
+                not force
+                and current is not None
+                and current.fingerprint == fingerprint
+                and current.features_generation == generation
+            ):
+                return current
+
+            frames = self._loader()
+            graph_builder = GraphBuilderAgent(
+                *frames, self._features_loader(), self._trends_loader()
+            )
+
+            with self._swap_lock:
+                self._version += 1
+                snapshot = DatasetSnapshot(
+                    self._version, fingerprint, generation, frames, graph_builder
+                )
+                if current is not None:
+                    self._retired.add(current)
+                self._current = snapshot
+
+        print(f"Dataset snapshot v{snapshot.version} ({fingerprint}) is live")
+        return snapshot
+
+    async def refresh(self, force=False):
+        """Rebuild in a worker thread so live sessions are not interrupted."""
+        return await asyncio.to_thread(self.rebuild, force)
+
+    def stats(self):
+        current = self._current
+        return {
+            "version": current.version if current else None,
+            "fingerprint": current.fingerprint if current else None,
+            "features_generation": current.features_generation if current else None,
+            "created_at": current.created_at.isoformat() if current else None,
+            # Retired snapshots still held by in-flight sessions
+            "retired_in_use": sorted(s.version for s in self._retired),
+        }
+
+
+snapshot_manager = SnapshotManager()
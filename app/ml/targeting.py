@@ -0,0 +1,264 @@
+# Vectorized risk-scoring engine.
+#
+# Computes the employee targeting columns (Risk_Score, Should_Target,
+# Primary_Concern, Outreach_Category, Issues and the individual flags) for
+# every employee in one pass over the employee_features table, stores them in
+# employee_targeting and can export them to employee_targeting_results.csv.
+# Run on the dataset CSVs the rules reproduce that file exactly, which
+# benchmarks/targeting_check.py checks in CI.
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.ml.features import (
+    employee_features_frame,
+    register_refresh_hook,
+    to_db_value,
+)
+from app.models.schema import EmployeeTargeting
+
+TARGETING_CSV_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__), "..", "data", "employee_targeting_results.csv"
+    )
+)
+
+# Employees with a risk score at or above this value are targeted for outreach
+TARGET_THRESHOLD = 3
+# Number of most recent vibe scores compared against the overall average
+RECENT_VIBE_WINDOW = 3
+LOW_MOOD_THRESHOLD = 3
+OVERWORKED_HOURS = 9
+MIN_LEAVE_DAYS = 5
+LOW_PERFORMANCE_RATING = 3
+HIGH_PERFORMANCE_RATING = 4
+IMPROVEMENT_FEEDBACK = "Needs Improvement"
+UPSERT_BATCH_SIZE = 5000
+
+# Issues in priority order: (flag column, weight, description, outreach category)
+ISSUES = [
+    (
+        "low_mood_flag",
+        3,
+        "Low mood: Average vibe score is below neutral",
+        "emotional_wellbeing",
+    ),
+    (
+        "negative_trend_flag",
+        2,
+        "Declining mood: Recent vibe scores are lower than average",
+        "emotional_wellbeing",
+    ),
+    (
+        "overworked_flag",
+        2,
+        "Overworked: High average working hours",
+        "workload",
+    ),
+    (
+        "insufficient_leave_flag",
+        1,
+        "Needs break: Low leave utilization",
+        None,
+    ),
+    (
+        "performance_concern_flag",
+        2,
+        "Performance concerns: Low rating or improvement needed",
+        "performance",
+    ),
+    (
+        "recognition_concern_flag",
+        1,
+        "Recognition concerns: High performer without awards",
+        "recognition",
+    ),
+    (
+        "onboarding_concern_flag",
+        2,
+        "Onboarding concerns: Issues with training, mentorship, or feedback",
+        "onboarding",
+    ),
+]
+
+TARGETING_COLUMNS = [
+    column.name
+    for column in EmployeeTargeting.__table__.columns
+    if column.name not in ("employee_id", "computed_at")
+]
+
+
+def _recent_vibe_mean(recent_vibe_scores):
+    """Mean of the last RECENT_VIBE_WINDOW scores of every employee."""
+    scores = recent_vibe_scores.explode().dropna().astype(float)
+    recent = scores.groupby(level=0).tail(RECENT_VIBE_WINDOW)
+    return recent.groupby(level=0).mean().reindex(recent_vibe_scores.index)
+
+
+def score_employees(features):
+    """
+    Compute the targeting columns for every row of an employee_features frame.
+
+    Returns a frame indexed by employee_id with the employee_targeting columns.
+    """
+    result = pd.DataFrame(index=features.index)
+
+    # Vibe
+    has_vibes = features["vibe_count"] > 0
+    result["avg_vibe_score"] = features["vibe_mean"].where(has_vibes)
+    result["recent_vibe_trend"] = (
+        _recent_vibe_mean(features["recent_vibe_scores"]) - result["avg_vibe_score"]
+    )
+    result["low_mood_flag"] = result["avg_vibe_score"] < LOW_MOOD_THRESHOLD
+    result["negative_trend_flag"] = result["recent_vibe_trend"] < 0
+
+    # Workload
+    result["avg_work_hours"] = features["avg_work_hours"]
+    result["max_work_hours"] = features["max_work_hours"]
+    result["overworked_flag"] = result["avg_work_hours"] > OVERWORKED_HOURS
+
+    # Leave
+    result["total_leave_days"] = features["leave_days_total"].where(
+        features["leave_count"] > 0
+    )
+    result["insufficient_leave_flag"] = result["total_leave_days"] < MIN_LEAVE_DAYS
+
+    # Performance
+    has_review = features["performance_rating"].notna()
+    result["performance_rating"] = features["performance_rating"]
+    result["has_improvement_feedback"] = (
+        features["manager_feedback"].eq(IMPROVEMENT_FEEDBACK).where(has_review)
+    )
+    result["performance_concern_flag"] = (
+        result["performance_rating"] < LOW_PERFORMANCE_RATING
+    ) | result["has_improvement_feedback"].eq(True)
+
+    # Recognition
+    has_rewards = features["reward_count"] > 0
+    result["reward_points"] = features["reward_points"].where(has_rewards)
+    result["award_count"] = features["reward_count"].where(has_rewards)
+    # As in employee_targeting_results.csv the award count of employees
+    # without reward rows is unknown, not zero, so they are not flagged
+    result["recognition_concern_flag"] = (
+        result["performance_rating"] >= HIGH_PERFORMANCE_RATING
+    ) & result["award_count"].eq(0)
+
+    # Onboarding
+    has_onboarding = features["joining_date"].notna()
+    result["joining_date"] = features["joining_date"]
+    result["mentor_assigned"] = features["mentor_assigned"]
+    result["initial_training_completed"] = features["initial_training_completed"]
+    result["onboarding_concern_flag"] = has_onboarding & (
+        features["mentor_assigned"].eq(False)
+        | features["initial_training_completed"].eq(False)
+    )
+
+    # Score and summarise the raised flags
+    flags = result[[flag for flag, _, _, _ in ISSUES]].to_numpy(dtype=bool)
+    weights = np.array([weight for _, weight, _, _ in ISSUES])
+    descriptions = np.array([description for _, _, description, _ in ISSUES])
+
+    result["risk_score"] = flags @ weights
+    result["should_target"] = result["risk_score"] >= TARGET_THRESHOLD
+    result["issue_count"] = flags.sum(axis=1)
+
+    has_issue = flags.any(axis=1)
+    result["primary_concern"] = np.where(
+        has_issue, descriptions[flags.argmax(axis=1)], "None"
+    )
+
+    category_flags = flags & np.array([c is not None for _, _, _, c in ISSUES])
+    categories = np.array([c or "None" for _, _, _, c in ISSUES])
+    result["outreach_category"] = np.where(
+        result["should_target"] & category_flags.any(axis=1),
+        categories[category_flags.argmax(axis=1)],
+        "None",
+    )
+
+    issues = pd.Series("", index=result.index)
+    for column, (_, _, description, _) in zip(flags.T, ISSUES):
+        issues = issues + np.where(column, f"{description}; ", "")
+    result["issues"] = issues.str[:-2].where(has_issue, "None")
+
+    return result[TARGETING_COLUMNS]
+
+
+def _upsert_targeting(connection, targeting):
+    now = datetime.now()
+    records = []
+    for employee_id, row in zip(targeting.index, targeting.to_dict("records")):
+        record = {key: to_db_value(value) for key, value in row.items()}
+        record["employee_id"] = employee_id
+        record["computed_at"] = now
+        records.append(record)
+
+    for start in range(0, len(records), UPSERT_BATCH_SIZE):
+        statement = insert(EmployeeTargeting).values(
+            records[start : start + UPSERT_BATCH_SIZE]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[EmployeeTargeting.employee_id],
+            set_={
+                column: statement.excluded[column]
+                for column in TARGETING_COLUMNS + ["computed_at"]
+            },
+        )
+        connection.execute(statement)
+    return len(records)
+
+
+@register_refresh_hook
+def refresh_employee_targeting(connection, employee_ids):
+    """Rescore the given employees from their (just refreshed) feature rows."""
+    features = employee_features_frame(connection, employee_ids)
+    if features.empty:
+        return 0
+    return _upsert_targeting(connection, score_employees(features))
+
+
+def refresh_all_targeting(engine):
+    """Rescore every employee in one vectorized pass and store the results."""
+    with engine.begin() as connection:
+        targeting = score_employees(employee_features_frame(connection))
+        if not targeting.empty:
+            _upsert_targeting(connection, targeting)
+        connection.execute(
+            EmployeeTargeting.__table__.delete().where(
+                EmployeeTargeting.employee_id.not_in(list(targeting.index))
+            )
+        )
+    print(f"Scored {len(targeting)} employees for targeting")
+    return targeting
+
+
+def to_csv_frame(targeting):
+    """Rename targeting columns to the employee_targeting_results.csv layout."""
+    frame = targeting.reset_index()
+    frame.columns = [
+        "Employee_ID" if column == "employee_id" else column.title()
+        for column in frame.columns
+    ]
+    return frame.sort_values("Risk_Score", ascending=False, kind="stable")
+
+
+def load_targeting_frame(connection):
+    """Read the stored targeting results in the CSV layout, riskiest first."""
+    table = EmployeeTargeting.__table__
+    result = connection.execute(
+        select(table.c.employee_id, *(table.c[c] for c in TARGETING_COLUMNS))
+    )
+    targeting = pd.DataFrame(result.mappings().all(), columns=result.keys())
+    return to_csv_frame(targeting.set_index("employee_id"))
+
+
+if __name__ == "__main__":
+    from app.utils.db import engine
+
+    targeting = refresh_all_targeting(engine)
+    to_csv_frame(targeting).to_csv(TARGETING_CSV_PATH, index=False)
+    print(f"✅ Targeting results written to {TARGETING_CSV_PATH}")
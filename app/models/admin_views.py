@@ -0,0 +1,65 @@
+# Materialized views behind the admin dashboard (created by migration 0004).
+#
+# They live in their own MetaData so create_all never mistakes them for
+# tables. refresh_admin_views runs on a schedule and after ingestion; with
+# CONCURRENTLY the dashboard keeps reading the previous rows meanwhile.
+
+import time
+
+from sqlalchemy import Column, Date, Integer, MetaData, Numeric, String, Table, text
+
+metadata = MetaData()
+
+admin_vibe_monthly = Table(
+    "admin_vibe_monthly",
+    metadata,
+    Column("month", Date, primary_key=True),
+    Column("responses", Integer),
+    Column("employees", Integer),
+    Column("avg_score", Numeric(asdecimal=False)),
+    Column("satisfied_pct", Numeric(asdecimal=False)),
+    Column("avg_change_pct", Numeric(asdecimal=False)),
+    Column("satisfied_change", Numeric(asdecimal=False)),
+)
+
+admin_focus_group_risk = Table(
+    "admin_focus_group_risk",
+    metadata,
+    Column("focus_group_id", String, primary_key=True),
+    Column("name", String),
+    Column("members", Integer),
+    Column("targeted", Integer),
+    Column("avg_risk_score", Numeric(asdecimal=False)),
+)
+
+admin_concern_frequency = Table(
+    "admin_concern_frequency",
+    metadata,
+    Column("concern", String, primary_key=True),
+    Column("employees", Integer),
+)
+
+_POPULATED = text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :name")
+
+
+def refresh_admin_views(engine):
+    """Refresh every admin view; returns {view: seconds taken}."""
+    timings = {}
+    for view in metadata.sorted_tables:
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            # A view that was never populated cannot be refreshed concurrently
+            populated = connection.execute(_POPULATED, {"name": view.name}).scalar()
+            concurrently = "CONCURRENTLY " if populated else ""
+            connection.execute(
+                text(f"REFRESH MATERIALIZED VIEW {concurrently}{view.name}")
+            )
+        timings[view.name] = round(time.perf_counter() - start, 3)
+    print(f"Refreshed admin views: {timings}")
+    return timings
+
+
+if __name__ == "__main__":
+    from app.utils.db import engine
+
+    refresh_admin_views(engine)
@@ -0,0 +1,191 @@
+# Monthly range partitions of the daily dataset tables.
+#
+# activity_tracker_dataset and vibemeter_dataset gain one row per employee
+# per day, so both are partitioned by month on their date column. Queries
+# that filter on the date (the dashboard reads the last 30 days) only scan
+# the matching partitions. Rows outside every monthly partition land in a
+# DEFAULT partition; ensure_partitions moves them out when their month's
+# partition is created.
+
+from datetime import date
+
+from sqlalchemy import text
+
+# table -> partition key
+PARTITIONED_TABLES = {
+    "activity_tracker_dataset": "date",
+    "vibemeter_dataset": "response_date",
+}
+
+# Future months kept ready so inserts never fall into the default partition
+MONTHS_AHEAD = 3
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def default_partition_name(table):
+    return f"{table}_default"
+
+
+def months_between(start, end):
+    """First days of every month from start's month through end's month."""
+    month, last = month_start(start), month_start(end)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def existing_partitions(connection, table):
+    return set(
+        connection.execute(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+# NULL when the index is missing; a failed concurrent build leaves an
+# INVALID index that IF NOT EXISTS would skip
+INDEX_VALID = text(
+    "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE c.relname = :name"
+)
+
+# Partitions whose index is already attached to a partitioned index
+INDEXED_PARTITIONS = text(
+    "SELECT partition.relname FROM pg_inherits "
+    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+    "JOIN pg_index i ON i.indexrelid = pg_inherits.inhrelid "
+    "JOIN pg_class partition ON partition.oid = i.indrelid "
+    "WHERE parent.relname = :name"
+)
+
+
+def create_partitioned_index(connection, name, table, columns, unique=False):
+    """
+    Index a partitioned table without blocking writes. Postgres cannot build
+    an index on the parent CONCURRENTLY, so it is created ON ONLY the parent
+    (invalid, but instant) and every partition's index is built concurrently
+    and attached; the parent's turns valid once all are attached. Needs an
+    autocommit connection, and picks up where a failed run stopped.
+    """
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    suffix = "_".join(column.strip() for column in columns.split(","))
+    suffix += "_key" if unique else "_idx"
+
+    connection.execute(
+        text(f"CREATE {kind} IF NOT EXISTS {name} ON ONLY {table} ({columns})")
+    )
+    indexed = set(connection.execute(INDEXED_PARTITIONS, {"name": name}).scalars())
+    for partition in sorted(existing_partitions(connection, table) - indexed):
+        partition_index = f"{partition}_{suffix}"
+        valid = connection.execute(INDEX_VALID, {"name": partition_index}).scalar()
+        if valid is False:
+            connection.execute(text(f"DROP INDEX CONCURRENTLY {partition_index}"))
+        connection.execute(
+            text(
+                f"CREATE {kind} CONCURRENTLY IF NOT EXISTS {partition_index} "
+                f"ON {partition} ({columns})"
+            )
+        )
+        connection.execute(
+            text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+        )
+
+
+def create_partition(connection, table, month):
+    """
+    Create the partition for one month, moving any of its rows out of the
+    default partition first (Postgres refuses to attach it otherwise).
+    """
+    column = PARTITIONED_TABLES[table]
+    name = partition_name(table, month)
+    default = default_partition_name(table)
+    bounds = {"start": month, "end": add_months(month, 1)}
+
+    stranded = connection.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} "
+            f"WHERE {column} >= :start AND {column} < :end)"
+        ),
+        bounds,
+    ).scalar()
+    if not stranded:
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+            )
+        )
+        return
+
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS)"))
+    connection.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} "
+            f"WHERE {column} >= :start AND {column} < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    connection.execute(
+        text(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+        )
+    )
+
+
+def create_missing_partitions(
+    connection, start=None, end=None, months_ahead=None, tables=PARTITIONED_TABLES
+):
+    """
+    Make sure every partitioned table has a default partition and one
+    partition per month from start (default: this month) until months_ahead
+    months past end (default: today). Returns the partitions created.
+    """
+    if months_ahead is None:
+        months_ahead = MONTHS_AHEAD
+    today = date.today()
+    start = month_start(start or today)
+    end = add_months(max(month_start(end or today), month_start(today)), months_ahead)
+
+    created = []
+    for table in tables:
+        existing = existing_partitions(connection, table)
+        if default_partition_name(table) not in existing:
+            connection.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {default_partition_name(table)} "
+                    f"PARTITION OF {table} DEFAULT"
+                )
+            )
+        for month in months_between(start, end):
+            if partition_name(table, month) not in existing:
+                create_partition(connection, table, month)
+                created.append(partition_name(table, month))
+    if created:
+        print(f"Created partitions: {', '.join(created)}")
+    return created
+
+
+def ensure_partitions(engine, start=None, end=None, months_ahead=None):
+    """Scheduled job: create upcoming partitions in their own transaction."""
+    with engine.begin() as connection:
+        return create_missing_partitions(connection, start, end, months_ahead)
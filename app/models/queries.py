@@ -0,0 +1,138 @@
+# Shared query builders for the focus group, action and survey endpoints.
+#
+# Related groups are loaded with selectinload and member counts come from the
+# FocusGroup.member_count subquery, so every listing runs a fixed number of
+# statements however many rows it returns. Listings are paginated on the
+# keyset orderings below (see app/utils/pagination.py).
+
+from sqlalchemy import distinct, func, select
+from sqlalchemy.orm import selectinload, undefer
+
+from app.models.schema import (
+    Action,
+    EmployeeReport,
+    FocusGroup,
+    GroupSurveyAssociation,
+    LeaveDataset,
+    Question,
+    Survey,
+    User,
+    UserGroupAssociation,
+)
+from app.utils.pagination import Keyset
+
+# Newest first, ties broken by the primary key
+FOCUS_GROUPS_ORDER = Keyset(
+    (FocusGroup.created_at, FocusGroup.focus_group_id), descending=True
+)
+ACTIONS_ORDER = Keyset((Action.created_at, Action.action_id), descending=True)
+SURVEYS_ORDER = Keyset((Survey.created_at, Survey.survey_id), descending=True)
+REPORTS_ORDER = Keyset(
+    (EmployeeReport.generated_at, EmployeeReport.report_id), descending=True
+)
+PAST_LEAVES_ORDER = Keyset(
+    (LeaveDataset.leave_start_date, LeaveDataset.id), descending=True
+)
+QUESTIONS_ORDER = Keyset((Question.question_id,))
+GROUP_MEMBERS_ORDER = Keyset((User.employee_id,))
+
+
+def focus_groups_query(with_member_counts=True):
+    """All focus groups, optionally with member_count loaded in the same row."""
+    query = select(FocusGroup)
+    if with_member_counts:
+        query = query.options(undefer(FocusGroup.member_count))
+    return query
+
+
+def focus_group_detail_query(focus_group_id):
+    """A focus group with its actions and surveys; members are paginated."""
+    return (
+        select(FocusGroup)
+        .where(FocusGroup.focus_group_id == focus_group_id)
+        .options(
+            selectinload(FocusGroup.actions),
+            selectinload(FocusGroup.surveys),
+        )
+    )
+
+
+def actions_query(is_completed=None, with_member_counts=False):
+    """Actions with their target groups loaded in one extra statement."""
+    groups = selectinload(Action.target_groups)
+    if with_member_counts:
+        groups = groups.undefer(FocusGroup.member_count)
+    query = select(Action).options(groups)
+    if is_completed is not None:
+        query = query.where(Action.is_completed == is_completed)
+    return query
+
+
+def action_detail_query(action_id):
+    return actions_query(with_member_counts=True).where(Action.action_id == action_id)
+
+
+def surveys_query(with_member_counts=False):
+    """Surveys with their target groups loaded in one extra statement."""
+    groups = selectinload(Survey.target_groups)
+    if with_member_counts:
+        groups = groups.undefer(FocusGroup.member_count)
+    return select(Survey).options(groups)
+
+
+def survey_detail_query(survey_id):
+    return surveys_query(with_member_counts=True).where(Survey.survey_id == survey_id)
+
+
+def survey_member_count_query(survey_id):
+    """Distinct employees across a survey's target groups."""
+    return (
+        select(func.count(distinct(UserGroupAssociation.employee_id)))
+        .join(
+            GroupSurveyAssociation,
+            GroupSurveyAssociation.focus_group_id
+            == UserGroupAssociation.focus_group_id,
+        )
+        .where(GroupSurveyAssociation.survey_id == survey_id)
+    )
+
+
+def user_with_groups_query(employee_id):
+    """A user with their focus groups and each group's member count."""
+    return (
+        select(User)
+        .where(User.employee_id == employee_id)
+        .options(selectinload(User.focus_groups).undefer(FocusGroup.member_count))
+    )
+
+
+def group_members_query(focus_group_id):
+    return (
+        select(User)
+        .join(UserGroupAssociation)
+        .where(UserGroupAssociation.focus_group_id == focus_group_id)
+    )
+
+
+def employee_reports_query(employee_id):
+    return select(EmployeeReport).where(EmployeeReport.employee_id == employee_id)
+
+
+def past_leaves_query(employee_id, today):
+    """Leaves of an employee that ended before today."""
+    return select(LeaveDataset).where(
+        LeaveDataset.employee_id == employee_id, LeaveDataset.leave_end_date < today
+    )
+
+
+def format_group(group, with_member_count=False):
+    formatted_group = {
+        "focus_group_id": group.focus_group_id,
+        "name": group.name,
+        "description": group.description,
+        "created_at": str(group.created_at),
+        "metrics": group.metrics,
+    }
+    if with_member_count:
+        formatted_group["members"] = group.member_count
+    return formatted_group
@@ -1,7 +1,5 @@
-import os
 from datetime import datetime
 
-from dotenv import load_dotenv
 from sqlalchemy import (
     ARRAY,
     JSON,
@@ -12,25 +10,18 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Time,
-    create_engine,
+    func,
+    select,
 )
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import column_property, relationship
 
+from app.utils.db import Base
 from app.utils.helpers import generate_random_id
 
-load_dotenv()
-
-# Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-# Create engine and Base
-engine = create_engine(DATABASE_URL)
-Base = declarative_base()
-
 
 # -------------------------------
 # Table: user_group_association
@@ -38,8 +29,17 @@ Base = declarative_base()
 # Columns:
 # - user_id: String (Foreign Key to user.employee_id)
 # - focus_group_id: Integer (Foreign Key to focus_groups.focus_group_id)
+# Indexes:
+# - (focus_group_id, employee_id), for paging through a group's members
 class UserGroupAssociation(Base):
     __tablename__ = "user_group_association"
+    __table_args__ = (
+        Index(
+            "ix_user_group_association_focus_group_id_employee_id",
+            "focus_group_id",
+            "employee_id",
+        ),
+    )
 
     employee_id = Column(String, ForeignKey("user.employee_id"), primary_key=True)
     focus_group_id = Column(
@@ -93,6 +93,8 @@ class User(Base):
     vibemeter = relationship("VibeMeterDataset", back_populates="user")
     tasks = relationship("Task", back_populates="user")
     reports = relationship("EmployeeReport", back_populates="user")
+    features = relationship("EmployeeFeatures", back_populates="user", uselist=False)
+    targeting = relationship("EmployeeTargeting", back_populates="user", uselist=False)
 
     meetings = relationship(
         "Meeting", secondary="meeting_members", back_populates="members"
@@ -112,8 +114,16 @@ class User(Base):
 # - id: String (Primary Key)
 # - name: String (Group name)
 # - description: String (Optional)
+# - member_count: Integer (Deferred, load with undefer(FocusGroup.member_count))
+# Indexes:
+# - (created_at, focus_group_id), the listing's keyset order
 class FocusGroup(Base):
     __tablename__ = "focus_groups"
+    __table_args__ = (
+        Index(
+            "ix_focus_groups_created_at_focus_group_id", "created_at", "focus_group_id"
+        ),
+    )
 
     focus_group_id = Column(
         String,
@@ -126,6 +136,15 @@ class FocusGroup(Base):
     created_at = Column(TIMESTAMP, nullable=False, default=datetime.now)
     metrics = Column(ARRAY(String), nullable=True)
 
+    # Counted in SQL so listings do not load every member just to len() them
+    member_count = column_property(
+        select(func.count(UserGroupAssociation.employee_id))
+        .where(UserGroupAssociation.focus_group_id == focus_group_id)
+        .correlate_except(UserGroupAssociation)
+        .scalar_subquery(),
+        deferred=True,
+    )
+
     # Many-to-many relationship with User
     users = relationship(
         "User", secondary="user_group_association", back_populates="focus_groups"
@@ -149,10 +168,15 @@ class FocusGroup(Base):
 # - target_groups: List of Strings (Target group ids for the action)
 # - action: String (Action description)
 # - is_completed: Boolean (Defaults to False)
+# Indexes:
+# - (created_at, action_id), the listing's keyset order
 
 
 class Action(Base):
     __tablename__ = "actions"
+    __table_args__ = (
+        Index("ix_actions_created_at_action_id", "created_at", "action_id"),
+    )
 
     action_id = Column(
         String,
@@ -174,6 +198,9 @@ class Action(Base):
 
 class Survey(Base):
     __tablename__ = "survey"
+    __table_args__ = (
+        Index("ix_survey_created_at_survey_id", "created_at", "survey_id"),
+    )
 
     survey_id = Column(
         String,
@@ -231,12 +258,25 @@ class Question(Base):
 # - Emails_Sent: Integer
 # - Meetings_Attended: Integer
 # - Work_Hours: Float
+# Indexes:
+# - (employee_id, date), unique
+# Partitioned by month on date (see app/models/partitions.py)
 class ActivityTrackerDataset(Base):
     __tablename__ = "activity_tracker_dataset"
+    __table_args__ = (
+        Index(
+            "ix_activity_tracker_dataset_employee_id_date",
+            "employee_id",
+            "date",
+            unique=True,
+        ),
+        {"postgresql_partition_by": "RANGE (date)"},
+    )
 
+    # The partition key has to be part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
-    date = Column(Date, nullable=False)
+    date = Column(Date, primary_key=True)
     teams_messages_sent = Column(Integer, nullable=False)
     emails_sent = Column(Integer, nullable=False)
     meetings_attended = Column(Integer, nullable=False)
@@ -254,8 +294,17 @@ class ActivityTrackerDataset(Base):
 # - Leave_Days: Integer
 # - Leave_Start_Date: Date (converted from string date)
 # - Leave_End_Date: Date (converted from string date)
+# Indexes:
+# - (employee_id, leave_start_date)
 class LeaveDataset(Base):
     __tablename__ = "leave_dataset"
+    __table_args__ = (
+        Index(
+            "ix_leave_dataset_employee_id_leave_start_date",
+            "employee_id",
+            "leave_start_date",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
@@ -276,8 +325,11 @@ class LeaveDataset(Base):
 # - Onboarding_Feedback: String
 # - Mentor_Assigned: Boolean
 # - Initial_Training_Completed: Boolean
+# Indexes:
+# - (employee_id)
 class OnboardingDataset(Base):
     __tablename__ = "onboarding_dataset"
+    __table_args__ = (Index("ix_onboarding_dataset_employee_id", "employee_id"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
@@ -298,8 +350,17 @@ class OnboardingDataset(Base):
 # - Performance_Rating: Integer
 # - Manager_Feedback: String
 # - Promotion_Consideration: Boolean
+# Indexes:
+# - (employee_id, review_period)
 class PerformanceDataset(Base):
     __tablename__ = "performance_dataset"
+    __table_args__ = (
+        Index(
+            "ix_performance_dataset_employee_id_review_period",
+            "employee_id",
+            "review_period",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
@@ -319,8 +380,13 @@ class PerformanceDataset(Base):
 # - Award_Type: String
 # - Award_Date: Date (expected format YYYY-MM-DD)
 # - Reward_Points: Integer
+# Indexes:
+# - (employee_id, award_date)
 class RewardsDataset(Base):
     __tablename__ = "rewards_dataset"
+    __table_args__ = (
+        Index("ix_rewards_dataset_employee_id_award_date", "employee_id", "award_date"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
@@ -339,12 +405,25 @@ class RewardsDataset(Base):
 # - Response_Date: Date (expected format YYYY-MM-DD)
 # - Vibe_Score: Integer
 # - Emotion_Zone: String
+# Indexes:
+# - (employee_id, response_date), unique
+# Partitioned by month on response_date (see app/models/partitions.py)
 class VibeMeterDataset(Base):
     __tablename__ = "vibemeter_dataset"
+    __table_args__ = (
+        Index(
+            "ix_vibemeter_dataset_employee_id_response_date",
+            "employee_id",
+            "response_date",
+            unique=True,
+        ),
+        {"postgresql_partition_by": "RANGE (response_date)"},
+    )
 
+    # The partition key has to be part of the primary key
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
-    response_date = Column(Date, nullable=False)
+    response_date = Column(Date, primary_key=True)
     vibe_score = Column(Integer, nullable=False)
     emotion_zone = Column(String, nullable=False)
 
@@ -361,10 +440,13 @@ class VibeMeterDataset(Base):
 # - description: String (Optional)
 # - due_date: Date (Optional)
 # - is_completed: Boolean (Defaults to False)
+# Indexes:
+# - (employee_id, due_date)
 
 
 class Task(Base):
     __tablename__ = "task"
+    __table_args__ = (Index("ix_task_employee_id_due_date", "employee_id", "due_date"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     employee_id = Column(String, ForeignKey("user.employee_id"), nullable=False)
@@ -409,6 +491,14 @@ class Meeting(Base):
 
 class EmployeeReport(Base):
     __tablename__ = "employee_reports"
+    __table_args__ = (
+        Index(
+            "ix_employee_reports_employee_id_generated_at_report_id",
+            "employee_id",
+            "generated_at",
+            "report_id",
+        ),
+    )
 
     report_id = Column(
         String,
@@ -424,6 +514,112 @@ class EmployeeReport(Base):
     user = relationship("User", back_populates="reports")
 
 
-# Create all tables in the database
-Base.metadata.create_all(engine)
-print("✅ Schema created successfully!")
+# -------------------------------
+# Table: employee_features
+# -------------------------------
+# One row per employee with aggregates derived from the dataset tables.
+# Kept up to date by app.ml.features whenever a source row is written.
+# Columns:
+# - employee_id: String (Primary Key, Foreign Key to user.employee_id)
+# - activity_*: Work hours and collaboration averages (all rows / last 10 rows)
+# - leave_*: Leave counts and day totals, overall and by leave type
+# - performance_*: Latest performance review
+# - reward_*: Award count, total points and counts by award type
+# - vibe_*: Vibe score statistics and the most recent scores (oldest first)
+# - onboarding fields: Copied from the employee's onboarding record
+class EmployeeFeatures(Base):
+    __tablename__ = "employee_features"
+
+    employee_id = Column(String, ForeignKey("user.employee_id"), primary_key=True)
+
+    activity_days = Column(Integer, nullable=False, default=0)
+    avg_work_hours = Column(Float, nullable=True)
+    max_work_hours = Column(Float, nullable=True)
+    recent_avg_work_hours = Column(Float, nullable=True)
+    recent_avg_messages = Column(Float, nullable=True)
+    recent_avg_emails = Column(Float, nullable=True)
+    recent_avg_meetings = Column(Float, nullable=True)
+    last_activity_date = Column(Date, nullable=True)
+
+    leave_count = Column(Integer, nullable=False, default=0)
+    leave_days_total = Column(Integer, nullable=False, default=0)
+    leave_types = Column(JSON, nullable=True)
+    leave_days_by_type = Column(JSON, nullable=True)
+
+    performance_review_period = Column(String, nullable=True)
+    performance_rating = Column(Integer, nullable=True)
+    manager_feedback = Column(String, nullable=True)
+    promotion_consideration = Column(Boolean, nullable=True)
+
+    reward_count = Column(Integer, nullable=False, default=0)
+    reward_points = Column(Integer, nullable=False, default=0)
+    reward_types = Column(JSON, nullable=True)
+
+    vibe_count = Column(Integer, nullable=False, default=0)
+    vibe_mean = Column(Float, nullable=True)
+    vibe_min = Column(Integer, nullable=True)
+    vibe_max = Column(Integer, nullable=True)
+    vibe_std = Column(Float, nullable=True)
+    vibe_low_count = Column(Integer, nullable=False, default=0)
+    recent_vibe_scores = Column(ARRAY(Integer), nullable=True)
+    last_vibe_date = Column(Date, nullable=True)
+
+    joining_date = Column(Date, nullable=True)
+    onboarding_feedback = Column(String, nullable=True)
+    mentor_assigned = Column(Boolean, nullable=True)
+    initial_training_completed = Column(Boolean, nullable=True)
+
+    updated_at = Column(TIMESTAMP, nullable=False, default=datetime.now)
+
+    user = relationship("User", back_populates="features")
+
+
+# -------------------------------
+# Table: employee_targeting
+# -------------------------------
+# Output of the risk-scoring engine in app.ml.targeting, one row per employee.
+# Columns mirror app/data/employee_targeting_results.csv:
+# - risk_score: Integer (Weighted sum of the raised flags)
+# - should_target: Boolean (risk_score at or above the targeting threshold)
+# - primary_concern / outreach_category: String (Highest priority issue)
+# - issue_count / issues: Number and "; "-joined descriptions of the issues
+# - *_flag: Boolean flags together with the metrics they were derived from
+class EmployeeTargeting(Base):
+    __tablename__ = "employee_targeting"
+
+    employee_id = Column(String, ForeignKey("user.employee_id"), primary_key=True)
+    risk_score = Column(Integer, nullable=False, default=0)
+    should_target = Column(Boolean, nullable=False, default=False)
+    primary_concern = Column(String, nullable=False, default="None")
+    outreach_category = Column(String, nullable=False, default="None")
+    issue_count = Column(Integer, nullable=False, default=0)
+    issues = Column(String, nullable=False, default="None")
+
+    avg_vibe_score = Column(Float, nullable=True)
+    recent_vibe_trend = Column(Float, nullable=True)
+    low_mood_flag = Column(Boolean, nullable=False, default=False)
+    negative_trend_flag = Column(Boolean, nullable=False, default=False)
+
+    avg_work_hours = Column(Float, nullable=True)
+    max_work_hours = Column(Float, nullable=True)
+    overworked_flag = Column(Boolean, nullable=False, default=False)
+
+    total_leave_days = Column(Float, nullable=True)
+    insufficient_leave_flag = Column(Boolean, nullable=False, default=False)
+
+    performance_rating = Column(Float, nullable=True)
+    has_improvement_feedback = Column(Boolean, nullable=True)
+    performance_concern_flag = Column(Boolean, nullable=False, default=False)
+
+    reward_points = Column(Float, nullable=True)
+    award_count = Column(Float, nullable=True)
+    recognition_concern_flag = Column(Boolean, nullable=False, default=False)
+
+    joining_date = Column(Date, nullable=True)
+    mentor_assigned = Column(Boolean, nullable=True)
+    initial_training_completed = Column(Boolean, nullable=True)
+    onboarding_concern_flag = Column(Boolean, nullable=False, default=False)
+
+    computed_at = Column(TIMESTAMP, nullable=False, default=datetime.now)
+
+    user = relationship("User", back_populates="targeting")
@@ -0,0 +1,121 @@
+# Streaming export of the dataset tables and employee reports.
+#
+# Rows are read through a server-side cursor in batches of
+# EXPORT_BATCH_SIZE (yield_per) and written out as NDJSON or CSV batch by
+# batch, so memory stays flat however many rows an export covers. The
+# export opens its own session: the request's session is closed before a
+# streamed body is sent.
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.schema import (
+    ActivityTrackerDataset,
+    EmployeeReport,
+    LeaveDataset,
+    OnboardingDataset,
+    PerformanceDataset,
+    RewardsDataset,
+    VibeMeterDataset,
+)
+from app.utils.db import AsyncSessionLocal
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+@dataclass(frozen=True)
+class ExportSource:
+    model: type
+    # Column the start/end filters apply to; None when there is no date
+    date_column: Optional[str]
+
+    @property
+    def columns(self):
+        return list(self.model.__table__.columns)
+
+
+SOURCES = {
+    "activity": ExportSource(ActivityTrackerDataset, "date"),
+    "leave": ExportSource(LeaveDataset, "leave_start_date"),
+    "onboarding": ExportSource(OnboardingDataset, "joining_date"),
+    "performance": ExportSource(PerformanceDataset, None),
+    "rewards": ExportSource(RewardsDataset, "award_date"),
+    "vibemeter": ExportSource(VibeMeterDataset, "response_date"),
+    "reports": ExportSource(EmployeeReport, "generated_at"),
+}
+
+
+def export_query(source, employee_ids=None, start=None, end=None):
+    """
+    The rows to export, ordered like the (employee_id, <date>) indexes.
+    start and end are inclusive days.
+    """
+    model = source.model
+    query = select(*source.columns)
+    if employee_ids:
+        query = query.where(model.employee_id.in_(employee_ids))
+    order_by = [model.employee_id]
+    if source.date_column:
+        column = getattr(model, source.date_column)
+        if start:
+            query = query.where(column >= start)
+        if end:
+            query = query.where(column < end + timedelta(days=1))
+        order_by.append(column)
+    # Ties broken by whatever part of the primary key is not sorted on yet
+    ordered = {"employee_id", source.date_column}
+    tiebreak = [
+        column for column in model.__table__.primary_key if column.name not in ordered
+    ]
+    return query.order_by(*order_by, *tiebreak)
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def format_batch(rows, names, fmt):
+    """Serialise a batch of rows (tuples in names order) to text."""
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(names, map(_plain, row))), default=str) + "\n"
+            for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                json.dumps(value) if isinstance(value, (dict, list)) else _plain(value)
+                for value in row
+            ]
+        )
+    return buffer.getvalue()
+
+
+async def export_rows(dataset, fmt, employee_ids=None, start=None, end=None):
+    """Yield the export as encoded chunks, one per batch of rows."""
+    source = SOURCES[dataset]
+    names = [column.name for column in source.columns]
+    if fmt == "csv":
+        yield format_batch([names], names, fmt).encode()
+
+    query = export_query(source, employee_ids, start, end).execution_options(
+        yield_per=settings.EXPORT_BATCH_SIZE
+    )
+    exported = 0
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            exported += len(rows)
+            yield format_batch(rows, names, fmt).encode()
+    print(f"Exported {exported} {dataset} rows as {fmt}")
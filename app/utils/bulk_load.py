@@ -0,0 +1,272 @@
+# Bulk loading of the daily dataset tables.
+#
+# Rows arrive as a streamed NDJSON or CSV body and are validated in batches.
+# Each batch is copied into a temporary staging table with COPY and upserted
+# from there on (employee_id, <date>) in its own transaction, so a failing
+# batch does not undo the ones before it. Once a batch commits, the touched
+# employees' feature rows are refreshed in a worker thread. The targeting
+# rescore and admin view refresh that follow a load are left to the leader
+# worker (see request_refresh), which runs the other shared jobs too.
+
+import asyncio
+import csv
+import json
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date
+
+from pydantic import BaseModel, Field, ValidationError
+from redis.exceptions import RedisError
+from sqlalchemy import select, text
+
+from app.config import settings
+from app.ml.features import refresh_after_commit
+from app.ml.targeting import refresh_all_targeting
+from app.models.admin_views import refresh_admin_views
+from app.models.partitions import create_missing_partitions
+from app.models.schema import User
+from app.utils.db import async_engine, engine
+from app.utils.redis_client import redis_client
+
+FORMATS = ("ndjson", "csv")
+
+# Set after a load that changed rows; the leader clears it and refreshes
+REFRESH_REQUESTED_KEY = "ingest:refresh_requested"
+
+
+class VibeRow(BaseModel):
+    employee_id: str
+    response_date: date
+    vibe_score: int = Field(..., ge=1, le=6)
+    # Label of the neutral zone in the existing vibemeter data
+    emotion_zone: str = "Neutral Zone (OK)"
+
+
+class ActivityRow(BaseModel):
+    employee_id: str
+    date: date
+    teams_messages_sent: int = Field(..., ge=0)
+    emails_sent: int = Field(..., ge=0)
+    meetings_attended: int = Field(..., ge=0)
+    work_hours: float = Field(..., ge=0, le=24)
+
+
+@dataclass(frozen=True)
+class BulkTarget:
+    table: str
+    # Date column; (employee_id, key) is unique
+    key: str
+    row_model: type
+
+    @property
+    def columns(self):
+        return list(self.row_model.model_fields)
+
+
+TARGETS = {
+    "vibemeter": BulkTarget("vibemeter_dataset", "response_date", VibeRow),
+    "activity": BulkTarget("activity_tracker_dataset", "date", ActivityRow),
+}
+
+
+async def iter_lines(chunks):
+    """Split a stream of byte chunks into (line number, text) pairs."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.decode("utf-8").rstrip("\r")
+    if buffer:
+        yield line_no + 1, buffer.decode("utf-8").rstrip("\r")
+
+
+async def iter_records(chunks, fmt):
+    """Yield (line number, record dict or None, error or None) per data line."""
+    header = None
+    async for line_no, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            if fmt == "ndjson":
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+            elif header is None:
+                header = [name.strip().lower() for name in next(csv.reader([line]))]
+                continue
+            else:
+                values = next(csv.reader([line]))
+                if len(values) != len(header):
+                    raise ValueError(
+                        f"expected {len(header)} fields, got {len(values)}"
+                    )
+                record = dict(zip(header, values))
+        except ValueError as e:
+            yield line_no, None, str(e)
+            continue
+        yield line_no, {key.lower(): value for key, value in record.items()}, None
+
+
+def _error_message(error):
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+async def load_batch(target, rows):
+    """
+    Upsert validated rows, given as [(line number, row model)]. Returns
+    (inserted, updated, unknown employee lines).
+    """
+    columns = target.columns
+    key = f"employee_id, {target.key}"
+    staging = f"staging_{target.table}"
+    dates = [getattr(row, target.key) for _, row in rows]
+
+    # Partition DDL in its own short transaction, not under the batch's locks
+    async with async_engine.begin() as connection:
+        await connection.run_sync(
+            create_missing_partitions,
+            min(dates),
+            max(dates),
+            0,
+            [target.table],
+        )
+
+    async with async_engine.begin() as connection:
+        employee_ids = {row.employee_id for _, row in rows}
+        known = set(
+            (
+                await connection.execute(
+                    select(User.employee_id).where(User.employee_id.in_(employee_ids))
+                )
+            ).scalars()
+        )
+        unknown = [line for line, row in rows if row.employee_id not in known]
+        rows = [(line, row) for line, row in rows if row.employee_id in known]
+        if not rows:
+            return 0, 0, unknown
+
+        # Going through SQLAlchemy first opens the transaction that the
+        # ON COMMIT DROP table lives in
+        await connection.execute(
+            text(
+                f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+                f"SELECT 0 AS line, {', '.join(columns)} FROM {target.table} "
+                f"WITH NO DATA"
+            )
+        )
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            staging,
+            records=[
+                (line, *(getattr(row, column) for column in columns))
+                for line, row in rows
+            ],
+            columns=["line", *columns],
+        )
+        # The last row wins when a batch repeats an (employee, day)
+        updates = ", ".join(
+            f"{column} = EXCLUDED.{column}"
+            for column in columns
+            if column not in ("employee_id", target.key)
+        )
+        upsert = text(
+            f"INSERT INTO {target.table} ({', '.join(columns)}) "
+            f"SELECT DISTINCT ON ({key}) {', '.join(columns)} "
+            f"FROM {staging} ORDER BY {key}, line DESC "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates} "
+            f"RETURNING (xmax = 0) AS inserted"
+        )
+        inserted = (await connection.execute(upsert)).scalars().all()
+
+    await refresh_after_commit({row.employee_id for _, row in rows})
+    return sum(inserted), len(inserted) - sum(inserted), unknown
+
+
+async def ingest(dataset, chunks, fmt, batch_size=None):
+    """Validate and load a streamed body batch by batch; returns a report."""
+    target = TARGETS[dataset]
+    batch_size = batch_size or settings.INGEST_BATCH_SIZE
+    report = {"dataset": dataset, "format": fmt, "batches": []}
+    totals = Counter()
+    rows, errors, received = [], [], 0
+
+    async def flush():
+        nonlocal rows, errors, received
+        batch = {"batch": len(report["batches"]) + 1, "received": received}
+        try:
+            inserted, updated, unknown = (
+                await load_batch(target, rows) if rows else (0, 0, [])
+            )
+            errors.extend((line, "unknown employee_id") for line in unknown)
+            batch.update(inserted=inserted, updated=updated)
+        except Exception as e:
+            # Nothing from this batch was written
+            errors.extend((line, "batch failed") for line, _ in rows)
+            batch.update(inserted=0, updated=0, failed=str(e))
+        batch["rejected"] = len(errors)
+        batch["errors"] = [
+            {"line": line, "error": error}
+            for line, error in sorted(errors)[: settings.INGEST_MAX_ERRORS]
+        ]
+        totals.update(
+            {k: batch[k] for k in ("received", "inserted", "updated", "rejected")}
+        )
+        report["batches"].append(batch)
+        rows, errors, received = [], [], 0
+
+    async for line_no, record, error in iter_records(chunks, fmt):
+        received += 1
+        if error is None:
+            try:
+                rows.append((line_no, target.row_model.model_validate(record)))
+            except ValidationError as e:
+                error = _error_message(e)
+        if error is not None:
+            errors.append((line_no, error))
+        if received >= batch_size:
+            await flush()
+    if received:
+        await flush()
+
+    report["totals"] = {
+        key: totals[key] for key in ("received", "inserted", "updated", "rejected")
+    }
+    return report
+
+
+def refresh_after_ingest():
+    """Rescore targeting and refresh the admin aggregates over the new rows."""
+    refresh_all_targeting(engine)
+    refresh_admin_views(engine)
+
+
+async def request_refresh():
+    """Ask the leader to run refresh_after_ingest() at its next check."""
+    try:
+        await redis_client.set(REFRESH_REQUESTED_KEY, 1)
+    except RedisError as e:
+        # The leader's scheduled refreshes pick the rows up later
+        print(f"Could not request the post-ingest refresh: {e}")
+
+
+async def run_requested_refresh():
+    """
+    Run refresh_after_ingest() if a load asked for it since the last check;
+    returns whether it ran. Scheduled on the leader only, so a single worker
+    rescores however many workers took ingest requests.
+    """
+    try:
+        requested = await redis_client.delete(REFRESH_REQUESTED_KEY)
+    except RedisError as e:
+        print(f"Could not check for a post-ingest refresh: {e}")
+        return False
+    if requested:
+        await asyncio.to_thread(refresh_after_ingest)
+    return bool(requested)
@@ -0,0 +1,673 @@
+# Tagged Redis cache for API responses.
+#
+# Entries hold ready-to-send JSON bodies (encoded once with orjson, and
+# zstd-compressed from CACHE_COMPRESS_MIN_BYTES) behind a small binary
+# header, so a hit is returned as the raw Response body without being
+# parsed and re-encoded.
+#
+# Each entry also records the xxh3 hash of its body, sent as the ETag. A
+# request whose If-None-Match carries it gets a 304 straight from the cache,
+# without a database query or a body. Entries change only when rebuilt, so
+# routes send Cache-Control no-cache (revalidate every time) and clients
+# poll with conditional requests.
+#
+# Every entry is stored with the tags of the records it was built from: an
+# employee, a focus group, a survey, an action, or a whole listing. A tag is
+# a Redis set holding the keys that carry it. Writes call invalidate() with
+# the tags they touch, which deletes all of those keys at once. Entries no
+# longer go stale silently, so CACHE_TTL only bounds memory and can be days.
+# Each invalidation also bumps a generation counter and stamps its tags with
+# it. Computations read the counter before they start, and their result is
+# stored only if none of its tags was stamped later, so a value read before
+# a write cannot be stored after that write's invalidation.
+# Dataset writes invalidate their employees once the refreshed feature rows
+# commit, from the worker thread that refreshed them.
+#
+# Endpoints cache through the @cached decorator (cache-aside), which keeps a
+# hot key from being recomputed by every request at once:
+# - single flight: on a miss only the holder of a short Redis lock computes;
+#   the others wait for its result instead of hitting the database
+# - probabilistic early refresh (XFetch): shortly before an entry expires
+#   one request recomputes it, with a chance that grows as expiry nears and
+#   with how long the value took to compute
+# - stale-while-revalidate: entries are kept CACHE_STALE_SECONDS past their
+#   TTL; while one request refreshes an expired entry the others are
+#   served the previous value
+#
+# Each worker keeps a small in-process tier (CACHE_LOCAL_SIZE entries for at
+# most CACHE_LOCAL_TTL seconds) in front of Redis, so hot keys skip the
+# network round trip. invalidate() publishes the keys it deleted on
+# INVALIDATION_CHANNEL and every worker drops them from its own tier; the
+# short local TTL bounds staleness when a message is missed, and the tier is
+# cleared whenever the subscription (re)connects. Hits per tier are counted
+# in cache_stats for /metrics.
+#
+# The cache never fails a request: when Redis errors out (after the client's
+# own retries) both tiers are bypassed for CACHE_DEGRADE_SECONDS and every
+# request is served from the database, after which Redis is tried again.
+
+import asyncio
+import functools
+import inspect
+import json
+import math
+import random
+import struct
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+
+import xxhash
+import zstandard
+from cachetools import TLRUCache
+from fastapi import Request, Response
+from redis.exceptions import LockError, RedisError
+
+from app.config import settings
+from app.ml.features import register_commit_hook
+from app.utils.db_routing import read_from_primary
+from app.utils.helpers import encode_json
+from app.utils.memory_redis import register_script
+from app.utils.redis_client import (
+    binary_redis_client,
+    redis_client,
+    sync_redis_client,
+)
+
+# Tags of whole listings
+GROUPS_TAG = "groups"
+SURVEYS_TAG = "surveys"
+ACTIONS_TAG = "actions"
+QUESTIONS_TAG = "questions"
+
+# XFetch beta; above 1 favours refreshing earlier
+EARLY_REFRESH_BETA = 1.0
+# Seconds a request waits for another's computation before doing its own
+LOCK_WAIT_SECONDS = 5
+LOCK_POLL_SECONDS = 0.05
+
+# Entry layout: format version, compressed flag, expiry (epoch seconds,
+# 0 for none), seconds taken to compute and xxh3 hash of the body, then
+# the body. Entries of another version read as misses.
+ENTRY_VERSION = 2
+_HEADER = struct.Struct("!B?ddQ")
+_compressor = zstandard.ZstdCompressor(level=3)
+_decompressor = zstandard.ZstdDecompressor()
+
+# Cache-Control of responses about one employee, and of shared listings;
+# both make clients revalidate with If-None-Match before reusing a copy
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+SHARED_CACHE_CONTROL = "no-cache"
+
+# Pub/sub channel carrying the JSON list of keys each invalidation deleted
+INVALIDATION_CHANNEL = "cache:invalidate"
+# Seconds before the invalidation listener resubscribes after losing Redis
+RESUBSCRIBE_SECONDS = 5
+# Seconds the listener waits for a message before checking the connection
+LISTEN_POLL_SECONDS = 1.0
+
+# Tag sets outlive their keys so no key is left without its tags
+TAG_TTL_GRACE = 24 * 60 * 60
+
+# Counter bumped by every invalidation; each invalidated tag's
+# GENERATION_PREFIX key holds the value of its latest one, for
+# TAG_TTL_GRACE (far longer than any computation)
+GENERATION_KEY = "cache:generation"
+GENERATION_PREFIX = "generation:"
+
+# Deletes every key of every tag in KEYS together with the tag sets and
+# stamps the tags with a new generation (ARGV[2] is GENERATION_KEY, ARGV[3]
+# the stamps' TTL), then publishes the deleted keys on ARGV[1] and returns
+# them
+_INVALIDATE = """
+local generation = redis.call('INCR', ARGV[2])
+local deleted = {}
+for _, tag in ipairs(KEYS) do
+    redis.call('SET', 'generation:' .. tag, generation, 'EX', ARGV[3])
+    local keys = redis.call('SMEMBERS', tag)
+    for i = 1, #keys, 500 do
+        redis.call('DEL', unpack(keys, i, math.min(i + 499, #keys)))
+    end
+    for _, key in ipairs(keys) do
+        table.insert(deleted, key)
+    end
+    redis.call('DEL', tag)
+end
+if #deleted > 0 then
+    redis.call('PUBLISH', ARGV[1], cjson.encode(deleted))
+end
+return deleted
+"""
+
+
+def _invalidate_in_memory(client, keys, args):
+    """_INVALIDATE for the in-process Redis stand-in."""
+    generation = client.incr(args[1])
+    deleted = []
+    for tag in keys:
+        client.set(GENERATION_PREFIX + tag, generation, ex=int(args[2]))
+        members = sorted(client.smembers(tag))
+        client.delete(*members, tag)
+        deleted.extend(members)
+    if deleted:
+        client.publish(args[0], json.dumps(deleted))
+    return deleted
+
+
+register_script(_INVALIDATE, _invalidate_in_memory)
+
+# Stores ARGV[1] at KEYS[1] for ARGV[2] seconds and adds it to the tag sets
+# KEYS[2..] (kept ARGV[3] seconds), unless one of those tags was invalidated
+# after generation ARGV[4]; returns whether it stored
+_STORE = """
+for i = 2, #KEYS do
+    local stamp = redis.call('GET', 'generation:' .. KEYS[i])
+    if stamp and tonumber(stamp) > tonumber(ARGV[4]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    redis.call('EXPIRE', KEYS[i], ARGV[3])
+end
+return 1
+"""
+
+
+def _store_in_memory(client, keys, args):
+    """_STORE for the in-process Redis stand-in."""
+    key, tags = keys[0], keys[1:]
+    value, ttl, tag_ttl, generation = args
+    for tag in tags:
+        stamp = client.get(GENERATION_PREFIX + tag)
+        if stamp is not None and int(stamp) > int(generation):
+            return 0
+    client.set(key, value, ex=int(ttl))
+    for tag in tags:
+        client.sadd(tag, key)
+        client.expire(tag, int(tag_ttl))
+    return 1
+
+
+register_script(_STORE, _store_in_memory)
+
+
+class CacheStats:
+    def __init__(self):
+        self.lookups = Counter()
+        self.refreshes = Counter()
+        self.errors = Counter()
+
+    def snapshot(self):
+        lookups = sum(self.lookups.values())
+        local_hits = self.lookups["local"]
+        redis_lookups = lookups - local_hits
+        redis_hits = self.lookups["redis"]
+        return {
+            "lookups": lookups,
+            "local": {
+                "hits": local_hits,
+                "hit_ratio": round(local_hits / lookups, 4) if lookups else None,
+                "size": len(_local),
+            },
+            "redis": {
+                "hits": redis_hits,
+                "hit_ratio": (
+                    round(redis_hits / redis_lookups, 4) if redis_lookups else None
+                ),
+            },
+            "misses": self.lookups["miss"],
+            # Lookups made while Redis was bypassed after a failure
+            "bypassed": self.lookups["bypassed"],
+            "hit_ratio": (
+                round((local_hits + redis_hits) / lookups, 4) if lookups else None
+            ),
+            "refreshes": dict(self.refreshes),
+            "degraded": not cache_available(),
+            "redis_errors": dict(self.errors),
+        }
+
+
+cache_stats = CacheStats()
+
+# key -> (payload, monotonic expiry); an entry never outlives its Redis TTL
+# nor CACHE_LOCAL_TTL
+_local = TLRUCache(
+    maxsize=settings.CACHE_LOCAL_SIZE, ttu=lambda key, value, now: value[1]
+)
+_local_lock = threading.Lock()
+
+# Monotonic time until which the cache is bypassed after a Redis failure
+_bypass_until = 0.0
+
+
+def employee_tag(employee_id):
+    return f"employee:{employee_id}"
+
+
+def group_tag(focus_group_id):
+    return f"group:{focus_group_id}"
+
+
+def survey_tag(survey_id):
+    return f"survey:{survey_id}"
+
+
+def action_tag(action_id):
+    return f"action:{action_id}"
+
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: str
+    expiry: float
+    delta: float
+
+
+def _format_etag(digest):
+    return f'"{digest:016x}"'
+
+
+def body_etag(body):
+    return _format_etag(xxhash.xxh3_64_intdigest(body))
+
+
+def pack_entry(body, expiry=0.0, delta=0.0):
+    """Stored form of a JSON body (bytes)."""
+    digest = xxhash.xxh3_64_intdigest(body)
+    compressed = len(body) >= settings.CACHE_COMPRESS_MIN_BYTES
+    if compressed:
+        body = _compressor.compress(body)
+    return _HEADER.pack(ENTRY_VERSION, compressed, expiry, delta, digest) + body
+
+
+def unpack_entry(payload):
+    """The CacheEntry of a stored payload; None if it is not one."""
+    if len(payload) < _HEADER.size or payload[0] != ENTRY_VERSION:
+        return None
+    _, compressed, expiry, delta, digest = _HEADER.unpack_from(payload)
+    body = payload[_HEADER.size :]
+    if compressed:
+        body = _decompressor.decompress(body)
+    return CacheEntry(body, _format_etag(digest), expiry, delta)
+
+
+def etag_matches(if_none_match, etag):
+    """Whether an If-None-Match header value covers etag (weakly compared)."""
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def json_response(body, request=None, etag=None, cache_control=None):
+    """
+    Send already encoded JSON as is. Given the request it is answered as a
+    conditional GET: with an ETag (body_etag() unless passed) and a 304
+    when the client's If-None-Match already names it.
+    """
+    headers = {}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if request is not None:
+        headers["ETag"] = etag = etag or body_etag(body)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _local_put(entries, ttl):
+    expires = time.monotonic() + min(ttl, settings.CACHE_LOCAL_TTL)
+    with _local_lock:
+        for key, value in entries:
+            _local[key] = (value, expires)
+
+
+def _local_drop(keys):
+    with _local_lock:
+        for key in keys:
+            _local.pop(key, None)
+
+
+def clear_local():
+    with _local_lock:
+        _local.clear()
+
+
+def cache_available():
+    """False while the cache is bypassed after a Redis failure."""
+    return time.monotonic() >= _bypass_until
+
+
+def _redis_failed(operation, error):
+    global _bypass_until
+    _bypass_until = time.monotonic() + settings.CACHE_DEGRADE_SECONDS
+    # Invalidations may be missed meanwhile
+    clear_local()
+    cache_stats.errors[operation] += 1
+    print(
+        f"Redis {operation} failed, serving from the database for "
+        f"{settings.CACHE_DEGRADE_SECONDS}s: {error}"
+    )
+
+
+async def cache_get(key):
+    return (await cache_get_many([key]))[0]
+
+
+async def cache_get_many(keys):
+    """
+    Stored payloads of keys (None where missing), from this worker's tier
+    first; unpack_entry() them.
+    """
+    values = [None] * len(keys)
+    if not cache_available():
+        cache_stats.lookups["bypassed"] += len(keys)
+        return values
+    remote = []
+    with _local_lock:
+        for i, key in enumerate(keys):
+            entry = _local.get(key)
+            if entry is None:
+                remote.append(i)
+            else:
+                values[i] = entry[0]
+    cache_stats.lookups["local"] += len(keys) - len(remote)
+    if remote:
+        try:
+            found = await binary_redis_client.mget([keys[i] for i in remote])
+        except RedisError as e:
+            _redis_failed("read", e)
+            cache_stats.lookups["bypassed"] += len(remote)
+            return values
+        for i, value in zip(remote, found):
+            values[i] = value
+        hits = [(keys[i], value) for i, value in zip(remote, found) if value]
+        _local_put(hits, settings.CACHE_LOCAL_TTL)
+        cache_stats.lookups["redis"] += len(hits)
+        cache_stats.lookups["miss"] += len(remote) - len(hits)
+    return values
+
+
+async def cache_generation():
+    """
+    The invalidation generation to pass to cache_set() for a value about to
+    be computed, or None while the cache is bypassed.
+    """
+    if not cache_available():
+        return None
+    try:
+        return int(await redis_client.get(GENERATION_KEY) or 0)
+    except RedisError as e:
+        _redis_failed("read", e)
+        return None
+
+
+async def cache_set_many(entries, ttl=None, generation=None):
+    """
+    Store [(key, pack_entry() payload, tags)] in one round trip. Given the
+    cache_generation() read before the values were computed, entries with a
+    tag invalidated since then are dropped instead.
+    """
+    if not cache_available():
+        return
+    ttl = ttl or settings.CACHE_TTL
+    try:
+        async with binary_redis_client.pipeline(transaction=True) as pipe:
+            for key, value, tags in entries:
+                if generation is not None:
+                    tag_keys = [_tag_key(tag) for tag in tags]
+                    pipe.eval(
+                        _STORE,
+                        1 + len(tag_keys),
+                        key,
+                        *tag_keys,
+                        value,
+                        ttl,
+                        ttl + TAG_TTL_GRACE,
+                        generation,
+                    )
+                    continue
+                pipe.set(key, value, ex=ttl)
+                for tag in tags:
+                    pipe.sadd(_tag_key(tag), key)
+                    pipe.expire(_tag_key(tag), ttl + TAG_TTL_GRACE)
+            results = await pipe.execute()
+    except RedisError as e:
+        _redis_failed("write", e)
+        return
+    if generation is not None:
+        entries = [entry for entry, stored in zip(entries, results) if stored]
+        cache_stats.refreshes["stale_discarded"] += len(results) - len(entries)
+    _local_put([(key, value) for key, value, _ in entries], ttl)
+
+
+async def cache_set(key, value, tags=(), ttl=None, generation=None):
+    await cache_set_many([(key, value, tags)], ttl, generation)
+
+
+async def invalidate(*tags):
+    """
+    Drop every entry carrying any of the tags; returns how many went. Call
+    it after the write has committed. It is attempted even while the cache
+    is bypassed. A Redis failure is logged rather than failing the write,
+    and the entries then live out their TTL.
+    """
+    tags = {_tag_key(tag) for tag in tags}
+    if not tags:
+        return 0
+    try:
+        deleted = await redis_client.eval(
+            _INVALIDATE,
+            len(tags),
+            *tags,
+            INVALIDATION_CHANNEL,
+            GENERATION_KEY,
+            TAG_TTL_GRACE,
+        )
+    except RedisError as e:
+        _redis_failed("invalidate", e)
+        return 0
+    # Not left to the subscription, so this worker's next read sees the write
+    _local_drop(deleted)
+    return len(deleted)
+
+
+def invalidate_sync(*tags):
+    """invalidate() for code outside the event loop."""
+    tags = {_tag_key(tag) for tag in tags}
+    if not tags:
+        return 0
+    try:
+        deleted = sync_redis_client.eval(
+            _INVALIDATE,
+            len(tags),
+            *tags,
+            INVALIDATION_CHANNEL,
+            GENERATION_KEY,
+            TAG_TTL_GRACE,
+        )
+    except RedisError as e:
+        _redis_failed("invalidate", e)
+        return 0
+    _local_drop(deleted)
+    return len(deleted)
+
+
+async def listen_for_invalidations():
+    """
+    Drop the keys other workers invalidate from this worker's tier. Runs
+    until cancelled, resubscribing whenever the connection to Redis drops.
+    """
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages sent while unsubscribed are lost
+                clear_local()
+                while True:
+                    # Polled: a blocking read would hit the socket timeout
+                    # on a quiet channel
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=LISTEN_POLL_SECONDS
+                    )
+                    if message is not None:
+                        _local_drop(json.loads(message["data"]))
+        except RedisError as e:
+            print(f"Cache invalidation subscription lost: {e}")
+            _redis_failed("subscribe", e)
+            await asyncio.sleep(RESUBSCRIBE_SECONDS)
+
+
+def employee_tags(result, employee_id, **arguments):
+    """tags= for entries about one employee (taken from employee_id)."""
+    return [employee_tag(employee_id)]
+
+
+def _build(template, arguments):
+    if callable(template):
+        return template(**arguments)
+    return template.format(**arguments)
+
+
+def cached(key, tags=(), ttl=None, cache_control=PRIVATE_CACHE_CONTROL):
+    """
+    Cache-aside decorator for async endpoints that return JSON-serialisable
+    data; the decorated endpoint returns the encoded body as a Response,
+    on hits and misses alike, with the entry's ETag and cache_control, or a
+    304 when the request's If-None-Match matches. key is a format string
+    over the function's arguments ("employee_details:{employee_id}") or a
+    callable taking them. tags lists more such templates, or is a callable
+    taking the result followed by the arguments. ttl (default CACHE_TTL)
+    may also be a callable of the arguments. Exceptions are never cached.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, cache_request=None, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            cache_key = _build(key, arguments)
+
+            async def compute():
+                generation = await cache_generation()
+                start = time.monotonic()
+                with read_from_primary():
+                    result = await func(*args, **kwargs)
+                delta = time.monotonic() - start
+                entry_tags = (
+                    tags(result, **arguments)
+                    if callable(tags)
+                    else [_build(tag, arguments) for tag in tags]
+                )
+                fresh_for = (
+                    ttl(**arguments) if callable(ttl) else ttl or settings.CACHE_TTL
+                )
+                body = encode_json(result)
+                entry = CacheEntry(
+                    body, body_etag(body), time.time() + fresh_for, delta
+                )
+                if generation is not None:
+                    await cache_set(
+                        cache_key,
+                        pack_entry(body, entry.expiry, delta),
+                        entry_tags,
+                        ttl=fresh_for + settings.CACHE_STALE_SECONDS,
+                        generation=generation,
+                    )
+                return entry
+
+            entry = await _single_flight(cache_key, compute)
+            return json_response(
+                entry.body, cache_request, entry.etag, cache_control=cache_control
+            )
+
+        # FastAPI passes the request in for the conditional GET; direct
+        # callers (e.g. the cache warmer) leave it out
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(
+                    "cache_request",
+                    inspect.Parameter.KEYWORD_ONLY,
+                    default=None,
+                    annotation=Request,
+                ),
+            ]
+        )
+        return wrapper
+
+    return decorator
+
+
+def _needs_refresh(entry):
+    # XFetch: look an exponentially distributed distance past now, scaled by
+    # the time the value took to compute
+    jitter = entry.delta * EARLY_REFRESH_BETA * -math.log(1 - random.random())
+    return time.time() + jitter >= entry.expiry
+
+
+async def _read_entry(cache_key):
+    payload = await cache_get(cache_key)
+    return unpack_entry(payload) if payload else None
+
+
+async def _single_flight(cache_key, compute):
+    entry = await _read_entry(cache_key)
+    if entry is not None and _needs_refresh(entry):
+        # The local copy may be older than what another worker has refreshed
+        _local_drop([cache_key])
+        entry = await _read_entry(cache_key)
+    if entry is not None and not _needs_refresh(entry):
+        return entry
+    if not cache_available():
+        return await compute()
+
+    lock = redis_client.lock(f"lock:{cache_key}", timeout=settings.CACHE_LOCK_SECONDS)
+    try:
+        acquired = await lock.acquire(blocking=False)
+    except RedisError as e:
+        _redis_failed("lock", e)
+        return await compute()
+    if acquired:
+        cache_stats.refreshes["computed"] += 1
+        try:
+            return await compute()
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                # Held past its timeout; someone else may own it by now
+                pass
+            except RedisError as e:
+                _redis_failed("unlock", e)
+
+    if entry is not None:
+        # Someone else is refreshing; the current value will do meanwhile
+        cache_stats.refreshes["served_stale"] += 1
+        return entry
+
+    deadline = time.monotonic() + LOCK_WAIT_SECONDS
+    while time.monotonic() < deadline and cache_available():
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+        entry = await _read_entry(cache_key)
+        if entry is not None:
+            return entry
+    # The other computation is taking too long (or failed); do it ourselves
+    cache_stats.refreshes["wait_timeouts"] += 1
+    return await compute()
+
+
+@register_commit_hook
+def _invalidate_committed_employees(employee_ids):
+    """Drop the entries built from employees whose features were refreshed."""
+    invalidate_sync(*map(employee_tag, employee_ids))
@@ -0,0 +1,162 @@
+# Response compression.
+#
+# ASGI middleware that compresses response bodies with zstd or gzip,
+# whichever the client's Accept-Encoding prefers (zstd on a tie, as it is
+# faster at a better ratio). Only text and JSON bodies of at least
+# RESPONSE_COMPRESS_MIN_BYTES are compressed; smaller ones cost more to
+# compress than they save. Streamed bodies (the exports) are compressed
+# chunk by chunk and flushed as they go, so they keep streaming. A
+# compressed response's ETag is made weak, as its bytes differ from the
+# identity encoding's; If-None-Match compares ETags weakly, so clients still
+# revalidate with either.
+
+import zlib
+
+import zstandard
+
+from app.config import settings
+
+# Preferred first when the client weighs them equally
+ENCODINGS = ("zstd", "gzip")
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "text/",
+)
+
+_zstd = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+
+
+def choose_encoding(accept_encoding):
+    """The encoding to use for an Accept-Encoding header value, or None."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                continue
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class _Compressor:
+    """Streaming compressor for one response body."""
+
+    def __init__(self, encoding):
+        if encoding == "zstd":
+            self._stream = _zstd.compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._stream = zlib.compressobj(
+                GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data, more):
+        if more:
+            # Flushed so each chunk reaches the client as it is produced
+            return self._stream.compress(data) + self._stream.flush(self._flush_mode)
+        return self._stream.compress(data) + self._stream.flush()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = (
+            settings.RESPONSE_COMPRESS_MIN_BYTES
+            if minimum_size is None
+            else minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(
+            headers.get(b"accept-encoding", b"").decode("latin-1")
+        )
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows the size
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+            if start is None:
+                if compressor is None:
+                    # Decided against compressing on the first chunk
+                    return await send(message)
+                more = message.get("more_body", False)
+                return await send(
+                    {
+                        "type": "http.response.body",
+                        "body": compressor.compress(message.get("body", b""), more),
+                        "more_body": more,
+                    }
+                )
+
+            response_start, start = start, None
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if not self._should_compress(response_start, body, more):
+                await send(response_start)
+                return await send(message)
+            compressor = _Compressor(encoding)
+            body = compressor.compress(body, more)
+            await send(
+                self._compressed_start(
+                    response_start, encoding, None if more else len(body)
+                )
+            )
+            await send({"type": "http.response.body", "body": body, "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start, body, more):
+        headers = {key.lower(): value for key, value in start.get("headers", ())}
+        if b"content-encoding" in headers or start["status"] in (204, 304):
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        if not content_type.startswith(COMPRESSIBLE_TYPES):
+            return False
+        # A streamed body's size is unknown; it is assumed to be large
+        return more or len(body) >= self.minimum_size
+
+    @staticmethod
+    def _compressed_start(start, encoding, length):
+        """Response start for the compressed body (length None: streamed)."""
+        headers, vary = [], [b"Accept-Encoding"]
+        for key, value in start.get("headers", ()):
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary.insert(0, value)
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((key, value))
+        headers.append((b"vary", b", ".join(vary)))
+        headers.append((b"content-encoding", encoding.encode()))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**start, "headers": headers}
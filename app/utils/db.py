@@ -2,14 +2,60 @@ import os
 
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from app.utils.db_pool import engine_options, pool_stats
+from app.utils.db_routing import RoutingSession
+
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional read replica for GET requests (see app.utils.db_routing)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+
+def to_async_url(url):
+    """Point a postgresql:// URL at the asyncpg driver."""
+    url = make_url(url).set(drivername="postgresql+asyncpg")
+    # asyncpg takes `ssl` instead of libpq's `sslmode`
+    if "sslmode" in url.query:
+        url = url.difference_update_query(["sslmode"]).update_query_dict(
+            {"ssl": url.query["sslmode"]}
+        )
+    return url
+
 
-engine = create_engine(DATABASE_URL)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+engine = pool_stats["sync"].attach(create_engine(DATABASE_URL, **engine_options()))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(is_async=True))
+pool_stats["async"].attach(async_engine.sync_engine)
+
+async_replica_engine = None
+if DATABASE_REPLICA_URL:
+    async_replica_engine = create_async_engine(
+        to_async_url(DATABASE_REPLICA_URL),
+        **engine_options(is_async=True, name="replica"),
+    )
+    pool_stats["replica"].attach(async_replica_engine.sync_engine)
+
+
+class ReplicaRoutingSession(RoutingSession):
+    replica_bind = async_replica_engine.sync_engine if async_replica_engine else None
+
+
+# Objects stay usable after commit so handlers can serialise them without
+# another round trip
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=ReplicaRoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
@@ -19,3 +65,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,160 @@
+# Connection pool configuration and instrumentation.
+#
+# Both the sync and the async engine are built from the same DB_POOL_*
+# settings. Their pools record how long callers wait for a connection, how
+# many connections are checked out and which ones have been held for longer
+# than DB_POOL_LEAK_SECONDS (usually a session that was never closed).
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.config import settings
+
+_CHECKOUT_KEY = "checked_out_at"
+
+
+class PoolStats:
+    def __init__(self, name):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self._checked_out = {}
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def attach(self, engine):
+        """Listen to the pool events of a (sync) engine; survives dispose()."""
+        self.engine = engine
+
+        @event.listens_for(engine, "connect")
+        def _connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(engine, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info[_CHECKOUT_KEY] = time.monotonic()
+            with self._lock:
+                self.checkouts += 1
+                self._checked_out[id(connection_record)] = connection_record
+
+        @event.listens_for(engine, "checkin")
+        def _checkin(dbapi_connection, connection_record):
+            connection_record.info.pop(_CHECKOUT_KEY, None)
+            with self._lock:
+                self._checked_out.pop(id(connection_record), None)
+
+        @event.listens_for(engine, "invalidate")
+        def _invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+        return engine
+
+    def snapshot(self):
+        pool = self.engine.pool if self.engine is not None else None
+        now = time.monotonic()
+        with self._lock:
+            held = [
+                now - record.info[_CHECKOUT_KEY]
+                for record in self._checked_out.values()
+                if _CHECKOUT_KEY in record.info
+            ]
+            stats = {
+                "pool": type(pool).__name__ if pool is not None else None,
+                "checked_out": len(held),
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (
+                    round(self.wait_total / self.checkouts * 1000, 3)
+                    if self.checkouts
+                    else 0.0
+                ),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "longest_held_s": round(max(held), 3) if held else 0.0,
+                "suspected_leaks": sum(
+                    age > settings.DB_POOL_LEAK_SECONDS for age in held
+                ),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                idle=pool.checkedin(),
+                overflow=pool.overflow(),
+            )
+        return stats
+
+
+pool_stats = {name: PoolStats(name) for name in ("sync", "async", "replica")}
+
+
+class _TimedConnectMixin:
+    """Record how long each checkout waited for a connection."""
+
+    def connect(self):
+        start = time.perf_counter()
+        timed_out = True
+        try:
+            connection = super().connect()
+            timed_out = False
+            return connection
+        finally:
+            pool_stats[self.logging_name].record_wait(
+                time.perf_counter() - start, timed_out
+            )
+
+
+class InstrumentedQueuePool(_TimedConnectMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedConnectMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedConnectMixin, NullPool):
+    pass
+
+
+def engine_options(is_async=False, name=None):
+    """create_engine keyword arguments for the configured pool mode."""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        # Also the key of the engine's entry in pool_stats
+        "pool_logging_name": name or ("async" if is_async else "sync"),
+    }
+    if settings.DB_PGBOUNCER:
+        # pgbouncer owns pooling; prepared statements do not survive
+        # transaction pooling, so asyncpg must not cache them
+        options["poolclass"] = InstrumentedNullPool
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
@@ -0,0 +1,99 @@
+# Read-replica routing for the async sessions.
+#
+# Requests with a safe method (GET, HEAD, OPTIONS) read from the replica at
+# DATABASE_REPLICA_URL; every other request, and anything a session writes,
+# uses the primary. A successful write sets a short-lived cookie that keeps
+# the client's reads on the primary until the replica has caught up, so users
+# always see their own writes.
+#
+# Values computed for the shared response cache are read from the primary
+# (read_from_primary()): the cookie only pins the writer, so another
+# client's request could otherwise refill an entry the write just
+# invalidated with the replica's older rows, for the entry's whole TTL.
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+PRIMARY = "primary"
+REPLICA = "replica"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+PIN_COOKIE = "db_read_primary"
+
+# Where the current request's sessions read from; background jobs and
+# websockets keep the default
+_route = ContextVar("db_route", default=PRIMARY)
+
+
+class RoutingStats:
+    def __init__(self):
+        self.requests = Counter()
+        self.statements = Counter()
+
+    def snapshot(self):
+        return {"requests": dict(self.requests), "statements": dict(self.statements)}
+
+
+routing_stats = RoutingStats()
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica engine when the current request
+    allows it. Once a session flushes or runs DML it stays on the primary.
+    """
+
+    replica_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        target = PRIMARY
+        if self.replica_bind is not None and not self.info.get("wrote"):
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info["wrote"] = True
+            elif _route.get() == REPLICA:
+                target = REPLICA
+        routing_stats.statements[target] += 1
+        if target == REPLICA:
+            return self.replica_bind
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+@contextmanager
+def read_from_primary():
+    """Send the reads of the enclosed code to the primary."""
+    token = _route.set(PRIMARY)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+async def route_reads(request, call_next):
+    """HTTP middleware choosing the read target of each request."""
+    if request.method not in SAFE_METHODS:
+        reason, route = "write", PRIMARY
+    elif PIN_COOKIE in request.cookies:
+        reason, route = "pinned", PRIMARY
+    else:
+        reason, route = "read", REPLICA
+    routing_stats.requests[reason] += 1
+
+    token = _route.set(route)
+    try:
+        response = await call_next(request)
+    finally:
+        _route.reset(token)
+
+    if reason == "write" and response.status_code < 400:
+        response.set_cookie(
+            PIN_COOKIE,
+            "1",
+            max_age=settings.DB_READ_YOUR_WRITES_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
@@ -3,15 +3,47 @@ import random
 import smtplib
 import string
 
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = 587
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 
 
-def format_response(data):
+def format_response(data, pagination=None):
     # Helper to format API responses consistently
-    return {"data": data, "status": "success"}
+    response = {"data": data, "status": "success"}
+    if pagination is not None:
+        response["pagination"] = pagination
+    return response
+
+
+def encode_json(value):
+    """
+    Encode a response body as JSON bytes with orjson. Datetimes and NumPy
+    values are handled natively; anything else orjson does not know (e.g.
+    pydantic models) goes through FastAPI's jsonable_encoder.
+    """
+    return orjson.dumps(
+        value,
+        default=jsonable_encoder,
+        option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    The app's default response class: JSON encoded by encode_json(). FastAPI
+    still runs jsonable_encoder over a returned dict before rendering it, so
+    routes with large bodies (or NumPy values) return
+    json_response(encode_json(...)) from app.utils.cache instead.
+    """
+
+    def render(self, content):
+        return encode_json(content)
 
 
 def send_verification_email(email: str, token: str):
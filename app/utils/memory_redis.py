@@ -0,0 +1,330 @@
+# In-process stand-in for Redis.
+#
+# Selected with REDIS_BACKEND=memory for tests and local runs without a Redis
+# server. It covers the commands this codebase uses (strings, sets, expiry,
+# pipelines, locks, pub/sub) with the same return types as redis-py, shared
+# by every client in the process. Lua scripts cannot run here: each script
+# the code evaluates registers a Python equivalent with register_script().
+
+import asyncio
+import threading
+import time
+import uuid
+
+from redis.exceptions import LockError, ResponseError
+
+# Lua source -> func(client, keys, args)
+_scripts = {}
+
+
+def register_script(script, func):
+    """Run func in place of the Lua script when a stand-in client evals it."""
+    _scripts[script] = func
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.RLock()
+        # key -> (value, monotonic expiry or None); values are bytes or sets
+        self.data = {}
+        # channel -> [(loop, queue)] of the subscribed stand-in pub/subs
+        self.subscribers = {}
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+
+_store = _Store()
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class MemoryRedis:
+    """Blocking stand-in for redis.Redis."""
+
+    def __init__(self, decode_responses=False):
+        self.decode_responses = decode_responses
+
+    def _decode(self, value):
+        if value is None or not self.decode_responses:
+            return value
+        return value.decode()
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with _store.lock:
+            value = _store.get(key)
+        if isinstance(value, set):
+            raise ResponseError("WRONGTYPE Operation against a key of another type")
+        return self._decode(value)
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        ttl = ex if ex is not None else px / 1000 if px is not None else None
+        with _store.lock:
+            if nx and _store.get(key) is not None:
+                return None
+            expires = time.monotonic() + ttl if ttl is not None else None
+            _store.data[key] = (_encode(value), expires)
+        return True
+
+    def delete(self, *keys):
+        deleted = 0
+        with _store.lock:
+            for key in keys:
+                if _store.get(key) is not None:
+                    del _store.data[key]
+                    deleted += 1
+        return deleted
+
+    def incr(self, key):
+        with _store.lock:
+            value = int(_store.get(key) or 0) + 1
+            _store.data[key] = (_encode(value), _store.data.get(key, (0, None))[1])
+        return value
+
+    def sadd(self, key, *members):
+        with _store.lock:
+            current = _store.get(key)
+            if current is None:
+                current = set()
+                _store.data[key] = (current, None)
+            added = {_encode(member) for member in members} - current
+            current.update(added)
+        return len(added)
+
+    def smembers(self, key):
+        with _store.lock:
+            members = set(_store.get(key) or ())
+        return {self._decode(member) for member in members}
+
+    def expire(self, key, seconds):
+        with _store.lock:
+            value = _store.get(key)
+            if value is None:
+                return False
+            _store.data[key] = (value, time.monotonic() + seconds)
+        return True
+
+    def publish(self, channel, message):
+        message = {"type": "message", "channel": channel, "data": _encode(message)}
+        with _store.lock:
+            subscribers = list(_store.subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+        return len(subscribers)
+
+    def eval(self, script, numkeys, *args):
+        func = _scripts.get(script)
+        if func is None:
+            raise ResponseError("script not available in the memory backend")
+        with _store.lock:
+            return func(self, list(args[:numkeys]), list(args[numkeys:]))
+
+    def flushall(self):
+        with _store.lock:
+            _store.data.clear()
+        return True
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    def lock(self, name, timeout=None):
+        return MemoryLock(self, name, timeout)
+
+
+class MemoryPipeline:
+    """Queues commands and runs them together (atomically) on execute()."""
+
+    def __init__(self, client):
+        self._client = client
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        commands, self._commands = self._commands, []
+        with _store.lock:
+            return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._commands = []
+
+
+class MemoryLock:
+    def __init__(self, client, name, timeout):
+        self._client = client
+        self.name = name
+        self.timeout = timeout
+        self.token = None
+
+    def acquire(self, blocking=True, blocking_timeout=None):
+        token = uuid.uuid4().hex
+        deadline = (
+            time.monotonic() + blocking_timeout
+            if blocking_timeout is not None
+            else None
+        )
+        while not self._client.set(self.name, token, ex=self.timeout, nx=True):
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(0.01)
+        self.token = token
+        return True
+
+    def release(self):
+        with _store.lock:
+            if self.token is None or _store.get(self.name) != self.token.encode():
+                raise LockError("Cannot release a lock that's no longer owned")
+            del _store.data[self.name]
+        self.token = None
+
+
+class AsyncMemoryRedis:
+    """Stand-in for redis.asyncio.Redis over the same store."""
+
+    def __init__(self, decode_responses=False):
+        self._client = MemoryRedis(decode_responses)
+
+    def __getattr__(self, name):
+        command = getattr(self._client, name)
+
+        async def run(*args, **kwargs):
+            return command(*args, **kwargs)
+
+        return run
+
+    def pipeline(self, transaction=True):
+        return AsyncMemoryPipeline(self._client.pipeline(transaction))
+
+    def lock(self, name, timeout=None):
+        return AsyncMemoryLock(self._client.lock(name, timeout))
+
+    def pubsub(self):
+        return AsyncMemoryPubSub(self._client)
+
+
+class AsyncMemoryPipeline:
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+
+    def __getattr__(self, name):
+        queue = getattr(self._pipeline, name)
+
+        def queue_command(*args, **kwargs):
+            queue(*args, **kwargs)
+            return self
+
+        return queue_command
+
+    async def execute(self):
+        return self._pipeline.execute()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._pipeline.__exit__(*exc_info)
+
+
+class AsyncMemoryLock:
+    def __init__(self, lock):
+        self._lock = lock
+
+    async def acquire(self, blocking=True, blocking_timeout=None):
+        deadline = (
+            time.monotonic() + blocking_timeout
+            if blocking_timeout is not None
+            else None
+        )
+        while not self._lock.acquire(blocking=False):
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            await asyncio.sleep(0.01)
+        return True
+
+    async def release(self):
+        self._lock.release()
+
+
+class AsyncMemoryPubSub:
+    def __init__(self, client):
+        self._client = client
+        self._queue = asyncio.Queue()
+        self._entry = (asyncio.get_running_loop(), self._queue)
+        self.channels = []
+
+    async def subscribe(self, *channels):
+        with _store.lock:
+            for channel in channels:
+                _store.subscribers.setdefault(channel, []).append(self._entry)
+                self.channels.append(channel)
+                self._queue.put_nowait(
+                    {
+                        "type": "subscribe",
+                        "channel": channel,
+                        "data": len(self.channels),
+                    }
+                )
+
+    async def unsubscribe(self):
+        with _store.lock:
+            for channel in self.channels:
+                _store.subscribers[channel].remove(self._entry)
+        self.channels = []
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        """Next message, waiting up to timeout seconds (forever for None)."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    self._queue.get(),
+                    (
+                        max(deadline - time.monotonic(), 0.001)
+                        if deadline is not None
+                        else None
+                    ),
+                )
+            except asyncio.TimeoutError:
+                return None
+            if message["type"] == "message" or not ignore_subscribe_messages:
+                return {
+                    **message,
+                    "data": (
+                        self._client._decode(message["data"])
+                        if message["type"] == "message"
+                        else message["data"]
+                    ),
+                }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.unsubscribe()
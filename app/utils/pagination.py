@@ -0,0 +1,125 @@
+# Keyset (cursor) pagination for the list endpoints.
+#
+# A page is read as WHERE (sort keys) > (last row's keys) ORDER BY ... LIMIT
+# rather than with OFFSET, so a deep page costs the same as the first and
+# rows written meanwhile never shift a page. Every ordering ends with a
+# unique column, which keeps the keys stable. Cursors are opaque to clients:
+# URL-safe base64 of the last row's key values. Totals cost a COUNT over the
+# whole listing, so they are only computed when asked for.
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import func, literal, select, tuple_
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class PageParams:
+    cursor: Optional[str] = None
+    limit: int = settings.PAGE_SIZE_DEFAULT
+    include_total: bool = False
+
+    @property
+    def cache_key(self):
+        return f"{self.limit}:{int(self.include_total)}:{self.cursor or ''}"
+
+
+def page_params(
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page; omit for the first"
+    ),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    include_total: bool = Query(False, description="Also count every row"),
+):
+    """Dependency reading the standard cursor, limit and include_total params."""
+    return PageParams(cursor, limit, include_total)
+
+
+@dataclass(frozen=True)
+class Keyset:
+    # Sort columns, most significant first; the last one must be unique
+    columns: tuple
+    descending: bool = False
+
+    def order_by(self):
+        return [
+            column.desc() if self.descending else column.asc()
+            for column in self.columns
+        ]
+
+    def after(self, values):
+        """Condition selecting the rows that sort after the given key values."""
+        keys = tuple_(*self.columns)
+        bounds = tuple_(
+            *(
+                literal(value, column.type)
+                for column, value in zip(self.columns, values)
+            )
+        )
+        return keys < bounds if self.descending else keys > bounds
+
+    def values(self, item):
+        return [getattr(item, column.key) for column in self.columns]
+
+
+def _dump(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load(value, column):
+    python_type = column.type.python_type
+    if python_type in (date, datetime) and isinstance(value, str):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    payload = json.dumps([_dump(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, keyset):
+    """Key values of a cursor for keyset; 400 when it was not issued for it."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(keyset.columns):
+            raise ValueError("wrong number of keys")
+        return [_load(value, column) for value, column in zip(values, keyset.columns)]
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+async def paginate(db, query, keyset, params):
+    """
+    One page of the entities selected by query, in keyset order. Returns
+    (items, pagination) where pagination holds the cursor of the next page
+    (None on the last) and, when params.include_total is set, the row count.
+    """
+    pagination = {"limit": params.limit}
+    if params.include_total:
+        pagination["total"] = await db.scalar(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+    if params.cursor:
+        query = query.where(keyset.after(decode_cursor(params.cursor, keyset)))
+
+    items = (
+        await db.scalars(query.order_by(*keyset.order_by()).limit(params.limit + 1))
+    ).all()
+    has_more = len(items) > params.limit
+    items = items[: params.limit]
+    pagination["next_cursor"] = (
+        encode_cursor(keyset.values(items[-1])) if has_more else None
+    )
+    return items, pagination
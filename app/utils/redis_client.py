@@ -1,8 +1,66 @@
+# Redis clients shared by the cache layers.
+#
+# Each client draws from its own bounded connection pool. Commands time out
+# after REDIS_SOCKET_TIMEOUT, connection errors and timeouts are retried
+# REDIS_RETRIES times with exponential backoff, and pooled connections left
+# idle for REDIS_HEALTH_CHECK_SECONDS are pinged before reuse. A command
+# that still fails raises a RedisError, which the caches treat as a miss.
+# REDIS_BACKEND=memory swaps in the in-process stand-in from
+# app/utils/memory_redis.py, for tests and runs without a Redis server.
+
+import redis as sync_redis
 import redis.asyncio as redis
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.exceptions import ConnectionError, TimeoutError
+from redis.retry import Retry
+
+from app.config import settings
+from app.utils.memory_redis import AsyncMemoryRedis, MemoryRedis
+
+# Retry delays in seconds: base doubling per attempt, capped
+RETRY_BACKOFF_BASE = 0.02
+RETRY_BACKOFF_CAP = 0.5
+
+
+def create_redis_client(blocking=False, decode_responses=True):
+    """
+    A Redis client configured from settings: redis.asyncio unless blocking,
+    returning str (decode_responses) or bytes.
+    """
+    if settings.REDIS_BACKEND == "memory":
+        client_class = MemoryRedis if blocking else AsyncMemoryRedis
+        return client_class(decode_responses=decode_responses)
+
+    module = sync_redis if blocking else redis
+    retry = (Retry if blocking else AsyncRetry)(
+        ExponentialBackoff(cap=RETRY_BACKOFF_CAP, base=RETRY_BACKOFF_BASE),
+        settings.REDIS_RETRIES,
+    )
+    pool = module.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        # Seconds to wait for a free connection once all are in use
+        timeout=settings.REDIS_POOL_TIMEOUT,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+        socket_keepalive=True,
+        retry=retry,
+        retry_on_error=[ConnectionError, TimeoutError],
+        health_check_interval=settings.REDIS_HEALTH_CHECK_SECONDS,
+        decode_responses=decode_responses,
+    )
+    return module.Redis(connection_pool=pool)
+
+
+redis_client = create_redis_client()
+
+# Blocking client for code that runs outside the event loop (e.g. SQLAlchemy
+# session events and worker threads)
+sync_redis_client = create_redis_client(blocking=True)
 
-redis_client = redis.Redis(
-    host="localhost",
-    port=6379,
-    db=0,
-    decode_responses=True,
-)
+# Returns bytes, for cached response bodies (see app/utils/cache.py)
+binary_redis_client = create_redis_client(decode_responses=False)
@@ -0,0 +1,110 @@
+import asyncio
+import inspect
+import threading
+
+from sqlalchemy import text
+
+from app.utils.db import engine
+
+# Arbitrary key for pg_advisory_lock held by the worker that runs the shared
+# jobs (see app/migrations for the migration lock)
+LEADER_LOCK_ID = 7_351_903
+
+
+class LeaderLock:
+    """
+    Session-level advisory lock that makes one worker of the deployment the
+    leader. It is held on a dedicated connection for as long as the worker
+    lives; when that connection drops, the next worker to ask takes over.
+    """
+
+    def __init__(self, engine, lock_id=LEADER_LOCK_ID):
+        self._engine = engine
+        self._lock_id = lock_id
+        self._connection = None
+        self._guard = threading.Lock()
+
+    def held(self):
+        """Whether this worker is the leader, acquiring the lock if it is free."""
+        with self._guard:
+            if self._connection is not None:
+                try:
+                    self._connection.execute(text("SELECT 1"))
+                    return True
+                except Exception as e:
+                    print(f"Lost the scheduler leader lock: {e}")
+                    self._close()
+            connection = self._engine.connect().execution_options(
+                isolation_level="AUTOCOMMIT"
+            )
+            try:
+                acquired = connection.execute(
+                    text("SELECT pg_try_advisory_lock(:id)"), {"id": self._lock_id}
+                ).scalar()
+            except Exception:
+                connection.close()
+                raise
+            if not acquired:
+                connection.close()
+                return False
+            self._connection = connection
+            print("This worker now runs the scheduled shared jobs")
+            return True
+
+    def release(self):
+        with self._guard:
+            if self._connection is None:
+                return
+            try:
+                self._connection.execute(
+                    text("SELECT pg_advisory_unlock(:id)"), {"id": self._lock_id}
+                )
+            except Exception as e:
+                print(f"Could not release the scheduler leader lock: {e}")
+            self._close()
+
+    def _close(self):
+        try:
+            self._connection.close()
+        except Exception:
+            pass
+        self._connection = None
+
+
+leader_lock = LeaderLock(engine)
+
+
+async def run_periodically(
+    interval, func, *args, run_immediately=False, leader_only=False
+):
+    """
+    Run a job every `interval` seconds: awaited on the event loop when it is
+    a coroutine function, otherwise in a worker thread. Jobs that are
+    leader_only are skipped on every worker but the one holding leader_lock.
+    """
+    if not run_immediately:
+        await asyncio.sleep(interval)
+    while True:
+        try:
+            if leader_only and not await asyncio.to_thread(leader_lock.held):
+                pass
+            elif inspect.iscoroutinefunction(func):
+                await func(*args)
+            else:
+                await asyncio.to_thread(func, *args)
+        except Exception as e:
+            print(f"Scheduled job {func.__name__} failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def schedule_job(interval, func, *args, run_immediately=False, leader_only=False):
+    """Start a periodic background job and return its task."""
+    return asyncio.create_task(
+        run_periodically(
+            interval,
+            func,
+            *args,
+            run_immediately=run_immediately,
+            leader_only=leader_only,
+        )
+    )
@@ -0,0 +1,195 @@
+"""
+Benchmark the per-employee query paths with and without the composite
+(employee_id, <date>) indexes added by migration 0002.
+
+Synthetic copies of the dataset tables are generated in a scratch schema of
+the database at DATABASE_URL (nothing outside that schema is touched):
+
+    python -m benchmarks.index_benchmark --employees 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+from app.migrations.versions.v0002_dataset_employee_indexes import INDEXES
+
+SCHEMA = "index_benchmark"
+
+TABLES = """
+CREATE TABLE activity_tracker_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL, date date NOT NULL,
+    teams_messages_sent int, emails_sent int, meetings_attended int,
+    work_hours float
+);
+CREATE TABLE leave_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL, leave_type varchar,
+    leave_days int, leave_start_date date NOT NULL, leave_end_date date
+);
+CREATE TABLE onboarding_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL, joining_date date,
+    onboarding_feedback varchar, mentor_assigned bool,
+    initial_training_completed bool
+);
+CREATE TABLE performance_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL,
+    review_period varchar NOT NULL, performance_rating int,
+    manager_feedback varchar, promotion_consideration bool
+);
+CREATE TABLE rewards_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL, award_type varchar,
+    award_date date NOT NULL, reward_points int
+);
+CREATE TABLE vibemeter_dataset (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL,
+    response_date date NOT NULL, vibe_score int, emotion_zone varchar
+);
+CREATE TABLE task (
+    id serial PRIMARY KEY, employee_id varchar NOT NULL, title varchar,
+    description varchar, due_date date, is_completed bool
+);
+"""
+
+# (table, rows per employee, SELECT list generating one row per (e, n))
+FILL = [
+    (
+        "activity_tracker_dataset",
+        "days",
+        "emp, CURRENT_DATE - n, (random() * 50)::int, (random() * 20)::int, "
+        "(random() * 8)::int, 4 + random() * 7",
+    ),
+    (
+        "leave_dataset",
+        4,
+        "emp, 'Annual Leave', 2, CURRENT_DATE + (n * 45 - 90), "
+        "CURRENT_DATE + (n * 45 - 88)",
+    ),
+    ("onboarding_dataset", 1, "emp, DATE '2023-01-01', 'Good', true, true"),
+    ("performance_dataset", 2, "emp, 'H' || n || ' 2024', 3, 'Meets', false"),
+    ("rewards_dataset", 2, "emp, 'Star', CURRENT_DATE - n * 60, 100"),
+    (
+        "vibemeter_dataset",
+        12,
+        "emp, CURRENT_DATE - n * 7, 1 + (random() * 5)::int, 'Neutral'",
+    ),
+    ("task", 5, "emp, 'Task', NULL, CURRENT_DATE + n, false"),
+]
+
+QUERIES = {
+    "dashboard work hours (30 days)": (
+        "SELECT date, work_hours FROM activity_tracker_dataset "
+        "WHERE employee_id = :emp AND date >= CURRENT_DATE - 30 ORDER BY date"
+    ),
+    "upcoming leaves": (
+        "SELECT * FROM leave_dataset WHERE employee_id = :emp "
+        "AND leave_start_date > CURRENT_DATE ORDER BY leave_start_date"
+    ),
+    "vibe history": (
+        "SELECT response_date, vibe_score FROM vibemeter_dataset "
+        "WHERE employee_id = :emp ORDER BY response_date"
+    ),
+    "profile awards": "SELECT * FROM rewards_dataset WHERE employee_id = :emp",
+    "joining date": (
+        "SELECT joining_date FROM onboarding_dataset WHERE employee_id = :emp LIMIT 1"
+    ),
+    "latest review": (
+        "SELECT * FROM performance_dataset WHERE employee_id = :emp "
+        "ORDER BY review_period DESC LIMIT 1"
+    ),
+    "task list": "SELECT * FROM task WHERE employee_id = :emp ORDER BY due_date",
+}
+
+
+def employee_id(n):
+    return f"EMP{n:06d}"
+
+
+def populate(connection, employees, days):
+    connection.execute(text(TABLES))
+    for table, per_employee, select_list in FILL:
+        rows = days if per_employee == "days" else per_employee
+        columns = connection.execute(
+            text(
+                "SELECT string_agg(column_name, ', ' ORDER BY ordinal_position) "
+                "FROM information_schema.columns "
+                "WHERE table_schema = :schema AND table_name = :table "
+                "AND column_name <> 'id'"
+            ),
+            {"schema": SCHEMA, "table": table},
+        ).scalar()
+        start = time.perf_counter()
+        connection.execute(
+            text(
+                f"INSERT INTO {table} ({columns}) "
+                f"SELECT {select_list} FROM "
+                f"(SELECT 'EMP' || lpad(e::text, 6, '0') AS emp FROM "
+                f"generate_series(1, {employees}) e) emps, "
+                f"generate_series(1, {rows}) n"
+            )
+        )
+        connection.execute(text(f"ANALYZE {table}"))
+        count = connection.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+        print(f"  {table}: {count:,} rows in {time.perf_counter() - start:.1f}s")
+
+
+def time_queries(connection, employees, runs):
+    sample = [employee_id(random.randint(1, employees)) for _ in range(runs)]
+    results = {}
+    for label, sql in QUERIES.items():
+        statement = text(sql)
+        connection.execute(statement, {"emp": sample[0]}).all()  # warm up
+        timings = []
+        for emp in sample:
+            start = time.perf_counter()
+            connection.execute(statement, {"emp": emp}).all()
+            timings.append((time.perf_counter() - start) * 1000)
+        results[label] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--employees", type=int, default=100_000)
+    parser.add_argument("--days", type=int, default=30, help="activity rows each")
+    parser.add_argument("--runs", type=int, default=50, help="queries per path")
+    parser.add_argument("--keep", action="store_true", help="keep the schema")
+    args = parser.parse_args()
+
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"SET search_path TO {SCHEMA}"))
+        try:
+            print(f"Generating data for {args.employees:,} employees...")
+            populate(conn, args.employees, args.days)
+
+            before = time_queries(conn, args.employees, args.runs)
+
+            print("Creating composite indexes...")
+            for name, (table, columns) in INDEXES.items():
+                start = time.perf_counter()
+                conn.execute(text(f"CREATE INDEX {name} ON {table} ({columns})"))
+                conn.execute(text(f"ANALYZE {table}"))
+                print(f"  {name}: {time.perf_counter() - start:.1f}s")
+
+            after = time_queries(conn, args.employees, args.runs)
+        finally:
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+    print(f"\nMedian of {args.runs} runs (ms), {args.employees:,} employees:")
+    print(f"{'query':<34}{'no index':>12}{'indexed':>12}{'speedup':>10}")
+    for label in QUERIES:
+        speedup = before[label] / after[label] if after[label] else float("inf")
+        print(f"{label:<34}{before[label]:>12.2f}{after[label]:>12.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Check read-replica routing end to end against two Postgres databases.
+
+The two databases do not need to replicate: each gets a marker table naming
+it, so every response shows which one served the read.
+
+    python -m benchmarks.replica_routing_check \\
+        postgresql://localhost/vibemeter postgresql://localhost/vibemeter_replica
+
+CI runs it through make check-replica-routing against two Postgres services
+and fails the build on a non-zero exit.
+"""
+
+import argparse
+import os
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+MARKER_TABLE = "replica_routing_check"
+
+
+def create_markers(primary_url, replica_url):
+    for url, source in ((primary_url, "primary"), (replica_url, "replica")):
+        engine = create_engine(url)
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {MARKER_TABLE}"))
+            connection.execute(
+                text(f"CREATE TABLE {MARKER_TABLE} (source varchar, note varchar)")
+            )
+            connection.execute(
+                text(f"INSERT INTO {MARKER_TABLE} VALUES (:source, 'marker')"),
+                {"source": source},
+            )
+        engine.dispose()
+
+
+def drop_markers(*urls):
+    for url in urls:
+        engine = create_engine(url)
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE IF EXISTS {MARKER_TABLE}"))
+        engine.dispose()
+
+
+def build_app():
+    # Imported late so app.utils.db picks up the URLs set in main()
+    from app.utils.db import get_async_db
+    from app.utils.db_routing import route_reads
+
+    app = FastAPI()
+    app.middleware("http")(route_reads)
+
+    read_source = text(f"SELECT source FROM {MARKER_TABLE} LIMIT 1")
+
+    @app.get("/source")
+    async def source(db=Depends(get_async_db)):
+        return {"source": await db.scalar(read_source)}
+
+    @app.post("/write")
+    async def write(db=Depends(get_async_db)):
+        await db.execute(
+            text(f"INSERT INTO {MARKER_TABLE} (source, note) VALUES ('-', 'write')")
+        )
+        await db.commit()
+        return {"source": await db.scalar(read_source)}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("primary_url")
+    parser.add_argument("replica_url")
+    parser.add_argument("--pin-seconds", type=int, default=1)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.primary_url
+    os.environ["DATABASE_REPLICA_URL"] = args.replica_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from app.config import settings
+    from app.utils.db_routing import routing_stats
+
+    settings.DB_READ_YOUR_WRITES_SECONDS = args.pin_seconds
+    create_markers(args.primary_url, args.replica_url)
+    try:
+        client = TestClient(build_app())
+        steps = [
+            ("GET before any write", "get", "replica"),
+            ("POST write", "post", "primary"),
+            ("GET right after the write", "get", "primary"),
+            ("GET after the pin expired", "sleep", "replica"),
+        ]
+        failures = 0
+        for label, action, expected in steps:
+            if action == "sleep":
+                time.sleep(args.pin_seconds + 0.5)
+                action = "get"
+            if action == "get":
+                response = client.get("/source")
+            else:
+                response = client.post("/write")
+            source = response.json()["source"]
+            ok = source == expected
+            failures += not ok
+            print(f"{'ok ' if ok else 'FAIL'} {label}: served by {source}")
+        print(f"routing: {routing_stats.snapshot()}")
+    finally:
+        drop_markers(args.primary_url, args.replica_url)
+
+    if failures:
+        raise SystemExit(f"{failures} routing check(s) failed")
+
+
+if __name__ == "__main__":
+    main()
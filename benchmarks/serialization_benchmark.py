@@ -0,0 +1,166 @@
+"""
+Compare FastAPI's default JSON encoding with the orjson encoder, and the
+compressed sizes, on payloads shaped like the largest responses.
+
+The payloads are synthetic: a full page (PAGE_SIZE_MAX) of get_all_surveys
+and a get_group_details with a full page of members. Encode times are the
+median of the runs; sizes are in bytes:
+
+    python -m benchmarks.serialization_benchmark --runs 50
+"""
+
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.utils.compression import _Compressor
+from app.utils.helpers import encode_json
+
+QUESTIONS_PER_SURVEY = 10
+GROUPS_PER_SURVEY = 3
+ACTIONS_PER_GROUP = 20
+SURVEYS_PER_GROUP = 20
+
+
+def group(index):
+    return {
+        "focus_group_id": f"GRP{index:07d}",
+        "name": f"Focus group {index}",
+        "description": "Employees flagged by the engagement model " * 3,
+        "created_at": datetime(2024, 1, 1) + timedelta(days=index),
+        "metrics": ["vibe_score", "leave_days", "work_hours"],
+    }
+
+
+def question(index):
+    return {
+        "question_id": f"Q{index:09d}",
+        "question": f"How would you rate your week, question {index}?",
+        "type": "rating",
+        "options": ["1", "2", "3", "4", "5"],
+    }
+
+
+def survey(index):
+    return {
+        "survey_id": f"SRV{index:07d}",
+        "title": f"Pulse survey {index}",
+        "description": "A short check-in on workload and wellbeing " * 2,
+        "ends_at": datetime(2024, 6, 1) + timedelta(days=index),
+        "is_active": index % 2 == 0,
+        "created_at": datetime(2024, 1, 1) + timedelta(days=index),
+        "questions": [question(i) for i in range(QUESTIONS_PER_SURVEY)],
+    }
+
+
+def pagination(count):
+    return {"page_size": count, "next_cursor": "eyJpZCI6IjEyMyJ9", "has_more": True}
+
+
+def all_surveys_payload():
+    surveys = []
+    for index in range(settings.PAGE_SIZE_MAX):
+        surveys.append(
+            {
+                **survey(index),
+                "target_groups": [group(i) for i in range(GROUPS_PER_SURVEY)],
+            }
+        )
+    return {
+        "data": surveys,
+        "status": "success",
+        "pagination": pagination(len(surveys)),
+    }
+
+
+def group_details_payload():
+    members = [
+        {
+            "employee_id": f"EMP{index:04d}",
+            "email": f"employee{index}@example.com",
+            "is_verified": index % 3 != 0,
+            "profile_picture": f"https://example.com/avatars/{index}.png",
+        }
+        for index in range(settings.PAGE_SIZE_MAX)
+    ]
+    actions = [
+        {
+            "action_id": f"ACT{index:07d}",
+            "purpose": "Reduce overtime in the team " * 2,
+            "created_at": datetime(2024, 2, 1) + timedelta(days=index),
+            "title": f"Action {index}",
+            "metric": ["work_hours"],
+            "steps": [{"step": i, "text": f"Step {i} of the plan"} for i in range(5)],
+            "is_completed": False,
+        }
+        for index in range(ACTIONS_PER_GROUP)
+    ]
+    return {
+        "data": {
+            **group(0),
+            "users": members,
+            "users_pagination": pagination(len(members)),
+            "actions": actions,
+            "surveys": [survey(index) for index in range(SURVEYS_PER_GROUP)],
+        },
+        "status": "success",
+    }
+
+
+def fastapi_default(payload):
+    # What a route returning a dict goes through with the default JSONResponse
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def timed(func, arg, runs):
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(arg)
+        seconds.append(time.perf_counter() - start)
+    return result, statistics.median(seconds)
+
+
+def compress(body, encoding):
+    return _Compressor(encoding).compress(body, False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = {
+        "get_all_surveys": all_surveys_payload(),
+        "get_group_details": group_details_payload(),
+    }
+    for name, payload in payloads.items():
+        default_body, default_seconds = timed(fastapi_default, payload, args.runs)
+        body, seconds = timed(encode_json, payload, args.runs)
+        print(f"{name}:")
+        print(
+            f"  encode  jsonable_encoder+json: {default_seconds * 1000:8.2f}ms "
+            f"{len(default_body):>9} bytes"
+        )
+        print(
+            f"  encode  orjson:                {seconds * 1000:8.2f}ms "
+            f"{len(body):>9} bytes ({default_seconds / seconds:.1f}x faster)"
+        )
+        for encoding in ("gzip", "zstd"):
+            compressed, compress_seconds = timed(
+                lambda data: compress(data, encoding), body, args.runs
+            )
+            print(
+                f"  {encoding:<7} orjson body:           "
+                f"{compress_seconds * 1000:8.2f}ms {len(compressed):>9} bytes "
+                f"({len(body) / len(compressed):.1f}x smaller)"
+            )
+
+
+if __name__ == "__main__":
+    main()